@@ -84,10 +84,13 @@ class VaspCalcBase(CalcJob):
         kpoints = tempfolder.get_abs_path('KPOINTS')
 
         remote_copy_list = []
+        remote_symlink_list = []
 
         self.verify_inputs()
         if self._is_restart():
-            remote_copy_list.extend(self.remote_copy_restart_folder())
+            restart_copy_list, restart_symlink_list = self.remote_copy_restart_folder()
+            remote_copy_list.extend(restart_copy_list)
+            remote_symlink_list.extend(restart_symlink_list)
         self.write_incar(incar)
         self.write_poscar(structure)
         self.write_potcar(potentials)
@@ -96,12 +99,14 @@ class VaspCalcBase(CalcJob):
         # calcinfo
         calcinfo = CalcInfo()
         calcinfo.uuid = self.uuid
-        calcinfo.retrieve_list = self.max_retrieve_list()
+        # Subclasses decide what has to be retrieved, see ``max_retrieve_list`` for everything VASP may write
+        calcinfo.retrieve_list = []
         codeinfo = CodeInfo()
         codeinfo.code_uuid = self.inputs.code.uuid
         codeinfo.code_pk = self.inputs.code.pk
         calcinfo.codes_info = [codeinfo]
         calcinfo.remote_copy_list = remote_copy_list
+        calcinfo.remote_symlink_list = remote_symlink_list
         # here we need to do the charge density and wave function copy
         # as we need access to the calcinfo
         calcinfo.local_copy_list = []
@@ -110,14 +115,39 @@ class VaspCalcBase(CalcJob):
         return calcinfo
 
     def remote_copy_restart_folder(self):
-        """Add all files required for restart to the list of files to be copied from the previous calculation."""
+        """
+        Return the remote copy and symlink lists staging the restart files from the previous calculation.
+
+        Which files are staged is decided by ``restart_files``. Files listed by ``restart_symlink_files``
+        are only read by the new calculation and are symlinked if the previous calculation ran on the same
+        computer, all others are copied.
+        """
         restart_folder = self.inputs.restart_folder
         computer = self.node.computer
+        remote_path = restart_folder.get_remote_path()
+        symlink_files = self.restart_symlink_files() if restart_folder.computer.uuid == computer.uuid else []
+        copy_list = []
+        symlink_list = []
+        for name in self.restart_files(restart_folder.listdir()):
+            if name in symlink_files:
+                symlink_list.append((computer.uuid, os.path.join(remote_path, name), name))
+            else:
+                copy_list.append((computer.uuid, os.path.join(remote_path, name), '.'))
+        return copy_list, symlink_list
+
+    def restart_files(self, available):  # pylint: disable=no-self-use
+        """
+        Subclass hook to select the files to be staged from the restart folder.
+
+        :param available: list of the file names in the restart folder.
+        :return: by default all files, except the input files written anew and the AiiDA submission files.
+        """
         excluded = ['KPOINTS', 'POSCAR', 'INCAR', 'POTCAR', '_aiidasubmit.sh', '.aiida']
-        copy_list = [(computer.uuid, os.path.join(restart_folder.get_remote_path(), name), '.')
-                     for name in restart_folder.listdir()
-                     if name not in excluded]
-        return copy_list
+        return [name for name in available if name not in excluded]
+
+    def restart_symlink_files(self):  # pylint: disable=no-self-use
+        """Subclass hook to list the restart files that are not written to and can be symlinked instead of copied."""
+        return []
 
     def verify_inputs(self):
         """
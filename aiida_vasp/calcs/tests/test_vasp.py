@@ -26,6 +26,23 @@ def test_write_incar(vasp_calc_and_ref):
             assert result_incar_fo.readlines() == reference['incar']
 
 
+@ONLY_ONE_CALC
+def test_input_file_cache(vasp_calc_and_ref):
+    """Writing the same input nodes again is served from the rendered input file cache."""
+    from aiida_vasp.calcs.vasp import input_file_cache_info, invalidate_input_file_cache
+    vasp_calc, reference = vasp_calc_and_ref
+    invalidate_input_file_cache()
+    with managed_temp_file() as temp_file:
+        vasp_calc.write_incar(temp_file)
+        vasp_calc.write_poscar(temp_file)
+        assert input_file_cache_info().currsize == 2
+        hits = input_file_cache_info().hits
+        vasp_calc.write_incar(temp_file)
+        assert input_file_cache_info().hits == hits + 1
+        with open(temp_file, 'r') as result_incar_fo:
+            assert result_incar_fo.readlines() == reference['incar']
+
+
 @ONLY_ONE_CALC
 def test_write_potcar(vasp_calc_and_ref):
     """Check that POTCAR is written correctly."""
@@ -101,9 +118,8 @@ def test_prepare(vasp_calc, vasp_chgcar, vasp_wavecar, vasp_inputs, localhost_di
     for file_name in ['INCAR', 'KPOINTS', 'POSCAR', 'POTCAR']:
         assert file_name in input_files
 
-    assert 'EIGENVAL' in calcinfo.retrieve_temporary_list
-    assert 'DOSCAR' in calcinfo.retrieve_temporary_list
-    assert 'wannier90*' in calcinfo.retrieve_temporary_list
+    # only the files needed to parse the default quantities are retrieved
+    assert set(calcinfo.retrieve_temporary_list) == {'OUTCAR', 'vasprun.xml'}
 
     inputs_dict.update({'icharg': 2})
 
@@ -119,6 +135,81 @@ def test_prepare(vasp_calc, vasp_chgcar, vasp_wavecar, vasp_inputs, localhost_di
     assert 'WAVECAR' in [item[1] for item in calcinfo.local_copy_list]
 
 
+@ONLY_ONE_CALC
+def test_prepare_restart(vasp_calc, vasp_inputs, localhost, localhost_dir):
+    """Check that only the files read on restart are staged, symlinked if they are not written to."""
+    from aiida.common.folders import Folder
+    create_authinfo(localhost, store=True)
+    restart_dir = localhost_dir.mkdir('restart')
+    for file_name in ['INCAR', 'POSCAR', 'CONTCAR', 'OUTCAR', 'vasprun.xml', 'WAVECAR', 'CHGCAR']:
+        restart_dir.join(file_name).write('')
+    restart_folder = get_data_node('remote', computer=localhost, remote_path=restart_dir.strpath)
+
+    def staged(parameters):
+        parameters.update({'gga': 'PE', 'gga_compat': False, 'lorbit': 11, 'sigma': 0.5, 'magmom': '30 * 2*0.'})
+        inputs = vasp_inputs(parameters=parameters)
+        inputs.restart_folder = restart_folder
+        calc = vasp_calc(inputs=inputs)
+        calcinfo = calc.prepare_for_submission(Folder(localhost_dir.join('prepare').ensure(dir=True).strpath))
+        copied = [os.path.basename(item[1]) for item in calcinfo.remote_copy_list]
+        symlinked = [os.path.basename(item[1]) for item in calcinfo.remote_symlink_list]
+        return sorted(copied), sorted(symlinked)
+
+    # VASP defaults to reading the WAVECAR if it exists
+    assert staged({}) == (['WAVECAR'], [])
+    assert staged({'istart': 0, 'icharg': 2}) == ([], [])
+    assert staged({'istart': 0, 'icharg': 11, 'lcharg': False}) == ([], ['CHGCAR'])
+    assert staged({'istart': 1, 'icharg': 1, 'lwave': False}) == (['CHGCAR'], ['WAVECAR'])
+
+
+@ONLY_ONE_CALC
+def test_check_restart_folder(vasp_calc, vasp_inputs, vasp_params, localhost, tmpdir):
+    """The files read from the restart folder are checked through the outputs of the calculation that created it."""
+    from aiida.common.exceptions import InputValidationError
+    from aiida.common.links import LinkType
+    from aiida.orm import CalcJobNode
+    chgcar_path = tmpdir.join('CHGCAR')
+    chgcar_lines = ['other system', '1.0', '5. 0. 0.', '0. 5. 0.', '0. 0. 5.', 'Xx', '1', 'Direct', '0. 0. 0.', '', '8 8 8']
+    chgcar_path.write('\n'.join(chgcar_lines) + '\n')
+    creator = CalcJobNode(computer=localhost, process_type='aiida.calculations:vasp.vasp').store()
+    restart_folder = get_data_node('remote', computer=localhost, remote_path=tmpdir.strpath)
+    for link_label, node in [('remote_folder', restart_folder), ('chgcar', get_data_class('vasp.chargedensity')(file=chgcar_path.strpath))]:
+        node.add_incoming(creator, link_type=LinkType.CREATE, link_label=link_label)
+        node.store()
+
+    def verify(parameters):
+        inputs = vasp_inputs(parameters=dict(vasp_params.get_dict(), **parameters))
+        inputs.restart_folder = restart_folder
+        vasp_calc(inputs=inputs).verify_inputs()
+
+    # The CHGCAR is only checked if it is read
+    verify({'istart': 0, 'icharg': 2})
+    with pytest.raises(InputValidationError) as exception:
+        verify({'istart': 0, 'icharg': 1})
+    assert 'the CHGCAR is for the atoms 1 Xx' in str(exception.value)
+
+
+@ONLY_ONE_CALC
+@pytest.mark.parametrize(['parser_name', 'retrieved'], [(None, {'OUTCAR', 'vasprun.xml'}), ('vasp.vasp2w90', {'OUTCAR', 'vasprun.xml'}),
+                                                        ('arithmetic.add', {'CONTCAR', 'OUTCAR', 'vasprun.xml', 'EIGENVAL', 'DOSCAR'})])
+def test_parser_retrieve_list(vasp_calc, vasp_inputs, parser_name, retrieved):
+    """The files needed by a VaspParser are retrieved, for other parsers the full list is retrieved."""
+    inputs = vasp_inputs()
+    if parser_name is not None:
+        inputs.metadata.options['parser_name'] = parser_name
+    calc = vasp_calc(inputs=inputs)
+    assert set(calc.parser_retrieve_list()) == retrieved
+
+
+@ONLY_ONE_CALC
+def test_parser_remote_files(vasp_calc, vasp_inputs):
+    """Files the parser references in the remote folder get an info file written by the job script."""
+    inputs = vasp_inputs(settings={'parser_settings': {'add_chgcar': {'remote': True}}})
+    calc = vasp_calc(inputs=inputs)
+    assert calc.parser_remote_files() == [(get_data_class('vasp.chargedensity'), None)]
+    assert 'CHGCAR' not in calc.parser_retrieve_list()
+
+
 @ONLY_ONE_CALC
 def test_verify_success(vasp_calc_and_ref):
     """Check that correct inputs are successfully verified."""
@@ -7,19 +7,41 @@ The calculation class that prepares a specific VASP calculation.
 #encoding: utf-8
 # pylint: disable=abstract-method
 # explanation: pylint wrongly complains about (aiida) Node not implementing query
-from aiida.plugins import DataFactory
+import os
+
+from aiida.common import InputValidationError
+from aiida.plugins import DataFactory, ParserFactory
 
 from aiida_vasp.parsers.file_parsers.incar import IncarParser
 from aiida_vasp.parsers.file_parsers.potcar import MultiPotcarIo
 from aiida_vasp.parsers.file_parsers.poscar import PoscarParser
 from aiida_vasp.parsers.file_parsers.kpoints import KpointsParser
+from aiida_vasp.parsers.settings import ParserSettings
+from aiida_vasp.parsers.vasp import DEFAULT_OPTIONS, VaspParser
 from aiida_vasp.utils.aiida_utils import get_data_node, get_data_class
 from aiida_vasp.calcs.base import VaspCalcBase
 from aiida_vasp.utils.inheritance import update_docstring
+from aiida_vasp.utils.lru_cache import LRUCache
 
 PARAMETER_CLS = DataFactory('dict')
 SINGLEFILE_CLS = DataFactory('singlefile')
 
+# Rendered INCAR, KPOINTS and POSCAR files, keyed by the file name, the UUID of the (stored, hence
+# immutable) input node and the settings affecting the rendering. Many calculations of a workchain or a
+# screening campaign share these inputs, which then only have to be rendered once per process.
+INPUT_FILE_CACHE = LRUCache(maxsize=128)
+
+
+def input_file_cache_info():
+    """Return the hits, misses, maxsize and current size of the rendered input file cache."""
+    return INPUT_FILE_CACHE.info()
+
+
+def invalidate_input_file_cache():
+    """Clear the rendered input file cache."""
+    INPUT_FILE_CACHE.invalidate()
+
+
 _IMMIGRANT_EXTRA_KWARGS = """
 vasp.vasp specific kwargs:
 
@@ -34,13 +56,23 @@ class VaspCalculation(VaspCalcBase):
     General-purpose VASP calculation.
 
     ---------------------------------
-    By default retrieves only the 'OUTCAR', 'vasprun.xml', 'EIGENVAL', 'DOSCAR'
-    and Wannier90 input / output files. These files are deleted after parsing.
+    By default retrieves only the files the parser needs for the quantities requested
+    in ``settings['parser_settings']`` (for the default settings 'OUTCAR' and 'vasprun.xml').
+    If ``metadata.options.parser_name`` is not a VaspParser, whose files are unknown, 'CONTCAR',
+    'OUTCAR', 'vasprun.xml', 'EIGENVAL' and 'DOSCAR' are retrieved.
+    These files are deleted after parsing.
     Additional retrieve files can be specified via the
     ``settings['ADDITIONAL_RETRIEVE_TEMPORARY_LIST']`` input. In addition, if you want to keep
     any files after parsing, put them in ``settings['ADDITIONAL_RETRIEVE_LIST']`` which is empty
     by default.
 
+    When restarting from ``restart_folder``, only the WAVECAR and CHGCAR read according to
+    ISTART and ICHARG are staged. They are symlinked instead of copied if LWAVE, respectively
+    LCHARG, are set to False, as they are then not written to by the new calculation. The same
+    applies to ``charge_density`` and ``wavefunctions`` inputs referencing a file in a remote folder
+    on the same computer (see ``aiida_vasp.data.remote_file``), references to files on other
+    computers are rejected.
+
     Floating point precision for writing POSCAR files can be adjusted using
     ``settings['poscar_precision']``, default: 10
 
@@ -68,7 +100,9 @@ class VaspCalculation(VaspCalcBase):
     """
 
     _ALWAYS_RETRIEVE_LIST = []
-    _ALWAYS_RETRIEVE_TEMPORARY_LIST = ['CONTCAR', 'OUTCAR', 'vasprun.xml', 'EIGENVAL', 'DOSCAR', 'wannier90*']
+    _ALWAYS_RETRIEVE_TEMPORARY_LIST = []
+    # Retrieved for parsers other than the VaspParser
+    _FULL_RETRIEVE_TEMPORARY_LIST = ['CONTCAR', 'OUTCAR', 'vasprun.xml', 'EIGENVAL', 'DOSCAR']
     _query_type_string = 'vasp.vasp'
     _plugin_type_string = 'vasp.vasp'
 
@@ -124,7 +158,7 @@ class VaspCalculation(VaspCalcBase):
         spec.exit_code(1002, 'ERROR_NOT_ABLE_TO_PARSE_QUANTITY', message='the parser is not able to parse the requested quantity')
 
     def prepare_for_submission(self, tempfolder):
-        """Add EIGENVAL, DOSCAR, and all files starting with wannier90 to the list of files to be retrieved."""
+        """Add the files required by the parser and the ones requested in the settings to the files to be retrieved."""
         calcinfo = super(VaspCalculation, self).prepare_for_submission(tempfolder)
         try:
             additional_retrieve_list = self.inputs.settings.get_attribute('ADDITIONAL_RETRIEVE_LIST')
@@ -135,13 +169,90 @@ class VaspCalculation(VaspCalcBase):
         except (KeyError, AttributeError):
             additional_retrieve_temporary_list = []  # pylint: disable=invalid-name
         calcinfo.retrieve_list = list(set(self._ALWAYS_RETRIEVE_LIST + additional_retrieve_list))
-        calcinfo.retrieve_temporary_list = list(set(self._ALWAYS_RETRIEVE_TEMPORARY_LIST + additional_retrieve_temporary_list))
+        retrieve_temporary_list = set(self._ALWAYS_RETRIEVE_TEMPORARY_LIST + self.parser_retrieve_list())
+        retrieve_temporary_list.update(additional_retrieve_temporary_list)
+        # the parser references the files left in the remote folder by their info files, written after VASP has finished
+        remote_info_commands = []
+        for data_class, filename in self.parser_remote_files():
+            info_file = data_class.remote_info_file(filename)
+            remote_info_commands.append('{} > {}'.format(data_class.remote_info_command(filename), info_file))
+            retrieve_temporary_list.add(info_file)
+        if remote_info_commands:
+            calcinfo.append_text = '\n'.join(remote_info_commands)
+        # files that are kept anyway do not need to be retrieved twice
+        calcinfo.retrieve_temporary_list = list(retrieve_temporary_list.difference(calcinfo.retrieve_list))
         return calcinfo
 
+    def _parser_settings(self):
+        """
+        Return the ParserSettings of the parser set in ``metadata.options.parser_name``, or the default parser.
+
+        Only the settings of a VaspParser are known, for any other parser None is returned.
+        """
+        parser_name = self.inputs.metadata.options.get('parser_name') or self._default_parser
+        if not issubclass(ParserFactory(parser_name), VaspParser):
+            return None
+        settings = self.inputs.get('settings')
+        parser_settings = settings.get_dict().get('parser_settings') if settings else None
+        return ParserSettings(dict(parser_settings or {}), DEFAULT_OPTIONS)
+
+    def parser_retrieve_list(self):
+        """
+        Return the files the parser needs for the quantities requested in ``settings['parser_settings']``.
+
+        For parsers other than a VaspParser the full list of files is returned.
+        """
+        parser_settings = self._parser_settings()
+        if parser_settings is None:
+            return list(self._FULL_RETRIEVE_TEMPORARY_LIST)
+        return parser_settings.required_files
+
+    def parser_remote_files(self):
+        """Return the data class and file name of the output nodes the parser references in the remote folder."""
+        parser_settings = self._parser_settings()
+        if parser_settings is None:
+            return []
+        return [(get_data_class(node_dict.type), node_dict.get('filename'))
+                for _, node_dict in sorted(parser_settings.nodes.items())
+                if node_dict.get('remote')]
+
     def verify_inputs(self):
         super(VaspCalculation, self).verify_inputs()
         if not hasattr(self, 'elements'):
             self._prestore()
+        self._check_restart_files()
+
+    def _check_restart_files(self):
+        """
+        Check the header metadata of the CHGCAR and WAVECAR that are read against the inputs.
+
+        On a restart, the files in the restart folder are checked through the output nodes of the calculation
+        that created it, only the ones it was told to add (e.g. with ``{'add_chgcar': {'remote': True}}``) are known.
+        """
+        restart_files = {}
+        if self._need_chgcar() and 'charge_density' in self.inputs:
+            restart_files['CHGCAR'] = self.inputs.charge_density
+        if self._need_wavecar() and 'wavefunctions' in self.inputs:
+            restart_files['WAVECAR'] = self.inputs.wavefunctions
+        if self._is_restart():
+            restart_outputs = self._restart_folder_outputs()
+            restart_files.update({name: restart_outputs[name] for name in self.restart_files(list(restart_outputs))})
+        problems = []
+        for _, node in sorted(restart_files.items()):
+            problems += node.check_compatibility(self._parameters, self._structure(), self.inputs.get('kpoints'))
+        if problems:
+            raise InputValidationError('The restart files can not be read by this calculation: {}'.format('; '.join(problems)))
+
+    def _restart_folder_outputs(self):
+        """Return the CHGCAR and WAVECAR output nodes of the calculation that created the restart folder by file name."""
+        creator = self.inputs.restart_folder.creator
+        if creator is None:
+            return {}
+        outputs = {}
+        for name, link_name in [('CHGCAR', 'chgcar'), ('WAVECAR', 'wavecar')]:
+            if link_name in creator.outputs:
+                outputs[name] = creator.outputs[link_name]
+        return outputs
 
     def _prestore(self):
         """Set attributes prior to storing."""
@@ -216,6 +327,36 @@ class VaspCalculation(VaspCalcBase):
         istart = self._parameters.get('istart', istrt_d)
         return bool(istart in [1, 2, 3])
 
+    def restart_files(self, available):
+        """
+        Select the files to be staged from the restart folder according to ISTART and ICHARG.
+
+        The defaults follow VASP: ISTART is 1 if a WAVECAR is present, ICHARG is 0 if ISTART is not 0, else 2.
+        Only the WAVECAR (ISTART 1, 2, 3) and the CHGCAR (ICHARG 1, 11) are read by VASP on restart,
+        all other output files of the previous calculation are left where they are.
+        """
+        istart = self._parameters.get('istart', 1 if 'WAVECAR' in available else 0)
+        icharg = self._parameters.get('icharg', 0 if istart else 2)
+        required = []
+        if istart in [1, 2, 3]:
+            required.append('WAVECAR')
+        if icharg in [1, 11]:
+            required.append('CHGCAR')
+        return [name for name in required if name in available]
+
+    def restart_symlink_files(self):
+        """
+        Symlink the WAVECAR and CHGCAR from the restart folder if the new calculation does not write them.
+
+        VASP would otherwise write through the symlink and overwrite the files of the previous calculation.
+        """
+        symlink_files = []
+        if self._parameters.get('lwave', True) is False:
+            symlink_files.append('WAVECAR')
+        if self._parameters.get('lcharg', True) is False:
+            symlink_files.append('CHGCAR')
+        return symlink_files
+
     def _structure(self):
         """
         Get the input structure as AiiDa StructureData.
@@ -260,8 +401,8 @@ class VaspCalculation(VaspCalcBase):
 
         :param dst: absolute path of the file to write to
         """
-        incar_parser = IncarParser(data=self.inputs.parameters)
-        incar_parser.write(dst)
+        parameters = self.inputs.parameters
+        self._write_cached(dst, _input_file_key('INCAR', parameters), IncarParser(data=parameters).write)
 
     def write_poscar(self, dst):  # pylint: disable=unused-argument
         """
@@ -275,8 +416,8 @@ class VaspCalculation(VaspCalcBase):
         settings = self.inputs.get('settings')
         settings = settings.get_dict() if settings else {}
         poscar_precision = settings.get('poscar_precision', 10)
-        poscar_parser = PoscarParser(data=self._structure(), precision=poscar_precision)
-        poscar_parser.write(dst)
+        key = _input_file_key('POSCAR', self.inputs.structure, poscar_precision)
+        self._write_cached(dst, key, lambda path: PoscarParser(data=self._structure(), precision=poscar_precision).write(path))
 
     def write_potcar(self, dst):
         """
@@ -297,16 +438,53 @@ class VaspCalculation(VaspCalcBase):
 
         :param dst: absolute path of the file to write to
         """
-        kpoint_parser = KpointsParser(data=self.inputs.kpoints)
-        kpoint_parser.write(dst)
+        kpoints = self.inputs.kpoints
+        self._write_cached(dst, _input_file_key('KPOINTS', kpoints), KpointsParser(data=kpoints).write)
+
+    @staticmethod
+    def _write_cached(dst, key, write):
+        """
+        Write an input file from ``INPUT_FILE_CACHE``, or render it with ``write(dst)`` and cache it.
+
+        :param key: the cache key, None for inputs that must not be cached.
+        """
+        content = INPUT_FILE_CACHE.get(key) if key is not None else None
+        if content is not None:
+            with open(dst, 'wb') as handler:
+                handler.write(content)
+            return
+        write(dst)
+        if key is not None and os.path.isfile(dst):
+            with open(dst, 'rb') as handler:
+                INPUT_FILE_CACHE.put(key, handler.read())
 
     def write_chgcar(self, dst, calcinfo):  # pylint: disable=unused-argument
-        charge_density = self.inputs.charge_density
-        calcinfo.local_copy_list.append((charge_density.uuid, charge_density.filename, dst))
+        self._stage_file(self.inputs.charge_density, dst, calcinfo)
 
     def write_wavecar(self, dst, calcinfo):  # pylint: disable=unused-argument
-        wave_functions = self.inputs.wavefunctions
-        calcinfo.local_copy_list.append((wave_functions.uuid, wave_functions.filename, dst))
+        self._stage_file(self.inputs.wavefunctions, dst, calcinfo)
+
+    def _stage_file(self, node, dst, calcinfo):
+        """
+        Stage the file of a ChargedensityData or WavefunData node as dst.
+
+        Files stored in the repository are copied from there. Files referenced in a remote folder on the
+        same computer are copied remotely, or symlinked if the calculation does not write to them.
+        Remote references on other computers are not transferred, they have to be stored in the repository first.
+        """
+        if not node.is_remote:
+            calcinfo.local_copy_list.append((node.uuid, node.filename, dst))
+            return
+        computer = self.node.computer
+        if node.computer.uuid != computer.uuid:
+            raise InputValidationError('The {} references a file on the computer {}, but the calculation runs on {}. '
+                                       'Restarting from a file on another computer requires a node storing the file.'.format(
+                                           node.__class__.__name__, node.computer.label, computer.label))
+        file_name = os.path.basename(dst)
+        if file_name in self.restart_symlink_files():
+            calcinfo.remote_symlink_list.append((computer.uuid, node.remote_path, file_name))
+        else:
+            calcinfo.remote_copy_list.append((computer.uuid, node.remote_path, file_name))
 
     @classmethod
     def _immigrant_add_inputs(cls, transport, remote_path, sandbox_path, builder, **kwargs):
@@ -321,6 +499,13 @@ class VaspCalculation(VaspCalcBase):
             builder.wavefunctions = get_wavecar_input(sandbox_path)
 
 
+def _input_file_key(file_name, node, *settings):
+    """Return the cache key of an input file rendered from node, None if the node is not stored and might still change."""
+    if not node.is_stored:
+        return None
+    return (file_name, node.uuid) + settings
+
+
 def ordered_unique_list(in_list):
     """List unique elements in input list, in order of first occurrence."""
     out_list = []
@@ -18,6 +18,7 @@ class Vasp2w90Calculation(VaspCalculation):
 
     _default_parser = 'vasp.vasp2w90'
     _DEFAULT_PARAMETERS = {'lwannier90': True}
+    _ALWAYS_RETRIEVE_TEMPORARY_LIST = ['wannier90*']
 
     @classmethod
     def define(cls, spec):
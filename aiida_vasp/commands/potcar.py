@@ -27,8 +27,7 @@ def try_grab_description(ctx, param, value):
     """
     potcar_data_cls = get_data_class('vasp.potcar')
     group_name = ctx.params['name']
-    existing_groups = potcar_data_cls.get_potcar_groups()
-    existing_group_names = [group.label for group in existing_groups]
+    existing_group_names = [family.label for family in potcar_data_cls.get_potcar_family_summaries()]
     if not value:
         if group_name in existing_group_names:
             return potcar_data_cls.get_potcar_group(group_name).description
@@ -68,15 +67,15 @@ def listfamilies(element, symbol, description):
     """List available families of VASP potcar files."""
 
     potcar_data_cls = get_data_class('vasp.potcar')
-    groups = potcar_data_cls.get_potcar_groups(filter_elements=element, filter_symbols=symbol)
+    families = potcar_data_cls.get_potcar_family_summaries(filter_elements=element, filter_symbols=symbol)
 
     table = [['Family', 'Num Potentials']]
     if description:
         table[0].append('Description')
-    for group in groups:
-        row = [group.label, len(group.nodes)]
+    for family in families:
+        row = [family.label, family.num_potentials]
         if description:
-            row.append(group.description)
+            row.append(family.description)
         table.append(row)
     if len(table) > 1:
         click.echo(tabulate.tabulate(table, headers='firstrow'))
@@ -110,3 +109,19 @@ def exportfamily(path, name, dry_run, as_archive, verbose):
     click.echo('{} POTCAR files exported.'.format(len(files)))
     if dry_run:
         click.echo('Nothing written due to "--dry-run"')
+
+
+@potcar.command()
+@options.DRY_RUN(help='Only count the POTCAR files that would be migrated.')
+def migrate(dry_run):
+    """Convert POTCAR files stored in an older format to the current one."""
+
+    potcar_file_cls = get_data_class('vasp.potcar_file')
+    with cli_spinner():
+        migrated = potcar_file_cls.migrate_old_versions(dry_run=dry_run)
+
+    click.echo('{} POTCAR files migrated.'.format(len(migrated)))
+    if dry_run:
+        click.echo('Nothing written due to "--dry-run"')
+    elif migrated:
+        click.echo('The nodes in the old format are no longer used and can be deleted with "verdi node delete".')
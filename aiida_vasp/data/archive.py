@@ -7,8 +7,9 @@ Archive data class: store multiple files together in a compressed archive in the
 # pylint: disable=abstract-method
 # explanation: pylint wrongly complains about (aiida) Node not implementing query
 import tarfile
+import time
 import os
-from io import StringIO
+from io import StringIO, BytesIO
 from aiida.orm.nodes import Data
 
 
@@ -17,6 +18,7 @@ class ArchiveData(Data):
 
     def __init__(self, *args, **kwargs):
         self._filelist = []
+        self._contentlist = []
         super(ArchiveData, self).__init__(*args, **kwargs)
 
     def get_archive(self):
@@ -31,6 +33,10 @@ class ArchiveData(Data):
             dst_filename = os.path.basename(src_abs)
         self._filelist.append((src_abs, dst_filename))
 
+    def add_contents(self, contents, dst_filename):
+        """Add a file to the archive from its contents (bytes), without going through the file system."""
+        self._contentlist.append((contents, dst_filename))
+
     def _make_archive(self):
         """Create the archive file on disk with all it's contents."""
         self.put_object_from_filelike(StringIO(), 'archive.tar.gz')
@@ -40,12 +46,19 @@ class ArchiveData(Data):
         for src, dstn in self._filelist:
             archive.add(src, arcname=dstn)
 
+        for contents, dstn in self._contentlist:
+            tarinfo = tarfile.TarInfo(name=dstn)
+            tarinfo.size = len(contents)
+            tarinfo.mtime = time.time()
+            archive.addfile(tarinfo, fileobj=BytesIO(contents))
+
         archive.close()
 
     # pylint: disable=arguments-differ
     def store(self, *args, **kwargs):
         self._make_archive()
         del self._filelist
+        del self._contentlist
         super(ArchiveData, self).store(*args, **kwargs)
 
     @property
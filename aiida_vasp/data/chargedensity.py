@@ -2,12 +2,124 @@
 Representation of CHGCAR files.
 
 -------------------------------
-Charge density data node (stores CHGCAR files in the repository).
+Charge density data node (stores CHGCAR files in the repository or references them in a remote folder).
 """
 # pylint: disable=abstract-method
 # explanation: pylint wrongly complains about (aiida) Node not implementing query
+from collections import Counter
+
 from aiida.orm import SinglefileData
 
+from aiida_vasp.data.header import FileHeaderMixin, lattice_problem
+from aiida_vasp.data.remote_file import RemoteFileMixin, remote_chunk_command
+
+CHGCAR_HEADER_CHUNK = 4096
+# The bytes of a CHGCAR left in the remote folder that are retrieved to read its header (about 4000 atoms)
+CHGCAR_REMOTE_HEADER_SIZE = 64 * CHGCAR_HEADER_CHUNK
+
+
+class ChargedensityData(RemoteFileMixin, FileHeaderMixin, SinglefileData):
+    """
+    CHGCAR file.
+
+    The header attribute contains the 'lattice', the 'species', the number of atoms of each species
+    ('counts') and the FFT 'grid' (NGXF, NGYF, NGZF) of the charge density.
+    """
+
+    _DEFAULT_FILENAME = 'CHGCAR'
+
+    @staticmethod
+    def read_header(read_bytes):
+        return read_chgcar_header(read_bytes)
+
+    @classmethod
+    def _remote_header_commands(cls, path):
+        return [remote_chunk_command(path, 0, CHGCAR_REMOTE_HEADER_SIZE)]
+
+    def check_compatibility(self, parameters, structure=None, kpoints=None):
+        """
+        Check the CHGCAR against the structure and the FFT grid.
+
+        A CHGCAR can only be read for a structure with the same number of atoms of each species,
+        the lattice and the grid (NGXF, NGYF, NGZF) are compared if they are given.
+        """
+        problems = []
+        header = self.header
+        counts = header.get('counts')
+        if counts is not None and structure is not None:
+            symbols = structure.get_ase().get_chemical_symbols()
+            if header.get('species'):
+                chgcar_counts = Counter()
+                for specie, count in zip(header['species'], counts):
+                    chgcar_counts[specie.split('_')[0].split('/')[0]] += count
+                structure_counts = Counter(symbols)
+            else:
+                # VASP 4 format, only the counts can be compared
+                chgcar_counts, structure_counts = sorted(counts), sorted(Counter(symbols).values())
+            if chgcar_counts != structure_counts:
+                problems.append('the CHGCAR is for the atoms {}, the structure has {}'.format(_format_counts(chgcar_counts),
+                                                                                                 _format_counts(structure_counts)))
+        problem = lattice_problem('CHGCAR', header.get('lattice'), parameters, structure)
+        if problem:
+            problems.append(problem)
+        grid = [parameters.get(key) for key in ['ngxf', 'ngyf', 'ngzf']]
+        if header.get('grid') is not None and any(value is not None for value in grid):
+            if any(value is not None and int(value) != chgcar_value for value, chgcar_value in zip(grid, header['grid'])):
+                problems.append('NGXF, NGYF, NGZF = {} differ from the grid {} of the CHGCAR'.format(grid, header['grid']))
+        return problems
+
+
+def _format_counts(counts):
+    if isinstance(counts, dict):
+        return ', '.join('{} {}'.format(count, specie) for specie, count in sorted(counts.items()))
+    return ', '.join(map(str, counts))
+
+
+def read_chgcar_header(read_bytes):
+    """
+    Read the structure and grid header of a CHGCAR file.
+
+    :param read_bytes: callable, ``read_bytes(offset, size)`` returns at most size bytes of the file starting at offset.
+
+    Reads chunks of increasing size from the start of the file, until the grid line following the positions is complete.
+    """
+    size = CHGCAR_HEADER_CHUNK
+    while True:
+        chunk = read_bytes(0, size)
+        try:
+            return _parse_chgcar_header(chunk)
+        except EOFError:
+            if len(chunk) < size:
+                # the whole file has been read
+                raise
+            size *= 4
+
 
-class ChargedensityData(SinglefileData):
-    pass
+def _parse_chgcar_header(chunk):
+    """Parse the header from the start of a CHGCAR file, raise EOFError if the chunk does not contain all of it."""
+    lines = chunk.decode('utf-8', 'replace').splitlines(True)
+    if lines and not lines[-1].endswith('\n'):
+        # the last line might be cut off
+        lines = lines[:-1]
+    if len(lines) < 8:
+        raise EOFError('the chunk does not contain the CHGCAR header')
+    scaling = float(lines[1].split()[0])
+    lattice = [[scaling * float(value) for value in line.split()[:3]] for line in lines[2:5]]
+    species = lines[5].split()
+    if all(specie.isdigit() for specie in species):
+        # VASP 4 format, no species line
+        species = []
+        counts_line = 5
+    else:
+        counts_line = 6
+    counts = [int(count) for count in lines[counts_line].split()]
+    # skip the coordinate mode line and the positions, the grid follows after a blank line
+    index = counts_line + 2 + sum(counts)
+    while index < len(lines) and not lines[index].strip():
+        index += 1
+    if index >= len(lines):
+        raise EOFError('the chunk does not contain the CHGCAR grid')
+    grid = [int(value) for value in lines[index].split()[:3]]
+    if len(grid) != 3:
+        raise ValueError('invalid grid line in CHGCAR: {}'.format(lines[index]))
+    return {'lattice': lattice, 'species': species, 'counts': counts, 'grid': grid}
@@ -0,0 +1,89 @@
+"""
+File header metadata.
+
+---------------------
+Mixin for SinglefileData based nodes, which reads the header of the file when it is set and
+stores it as the 'header' attribute, so that it can be queried and checked without reading the file.
+"""
+# pylint: disable=abstract-method
+# explanation: pylint wrongly complains about (aiida) Node not implementing query
+import struct
+
+import numpy as np
+from aiida.common import AIIDA_LOGGER as aiidalogger
+
+# Relative difference of the lattice vectors up to which a file is read for the cell of a structure, the files
+# of a converged relaxation are written for a cell slightly different from the final structure
+LATTICE_TOLERANCE = 1e-2
+
+
+class FileHeaderMixin(object):  # pylint: disable=useless-object-inheritance
+    """
+    Store the metadata from the header of the file as the 'header' attribute.
+
+    Subclasses implement ``read_header`` and ``check_compatibility``. Files for which the header
+    can not be read (e.g. files of a different format) get an empty header.
+    """
+
+    @staticmethod
+    def read_header(read_bytes):
+        """
+        Read the header metadata.
+
+        :param read_bytes: callable, ``read_bytes(offset, size)`` returns at most size bytes of the file starting at offset.
+        :return: dict with the header metadata.
+        :raises: ValueError, EOFError or struct.error if the header can not be read.
+        """
+        raise NotImplementedError
+
+    def check_compatibility(self, parameters, structure=None, kpoints=None):
+        """
+        Check whether the file can be read by a calculation with the given inputs.
+
+        :param parameters: dict of INCAR parameters with lowercase keys.
+        :param structure: the input StructureData.
+        :param kpoints: the input KpointsData.
+        :return: a list of messages describing the incompatibilities, empty if none were found.
+        """
+        raise NotImplementedError
+
+    @property
+    def header(self):
+        return self.get_attribute('header', {})
+
+    def set_file(self, *args, **kwargs):  # pylint: disable=arguments-differ
+        """Set the file and read its header."""
+        super(FileHeaderMixin, self).set_file(*args, **kwargs)
+        with self.open(mode='rb') as handler:
+            self.set_header(lambda offset, size: _read_at(handler, offset, size))
+
+    def set_header(self, read_bytes):
+        """Read the header with ``read_bytes(offset, size)`` and store it in the attributes."""
+        try:
+            header = self.read_header(read_bytes)
+        except (ValueError, EOFError, IndexError, struct.error) as err:
+            aiidalogger.debug('Could not read the header of {}: {}'.format(self.get_attribute('filename', None), err))
+            header = {}
+        self.set_attribute('header', header)
+
+
+def lattice_problem(filename, lattice, parameters, structure):
+    """
+    Describe the difference between the lattice of the file and the cell of the structure, None if they agree.
+
+    Calculations that relax the cell (ISIF >= 3) restart from the files of a different cell and are not checked.
+    """
+    if lattice is None or structure is None:
+        return None
+    if parameters.get('nsw', 0) > 0 and parameters.get('isif', 2) >= 3:
+        return None
+    lattice = np.array(lattice)
+    cell = np.array(structure.cell)
+    if np.all(np.linalg.norm(lattice - cell, axis=1) <= LATTICE_TOLERANCE * np.linalg.norm(cell, axis=1)):
+        return None
+    return 'the {} was written for the lattice {}, the structure has the cell {}'.format(filename, lattice.tolist(), cell.tolist())
+
+
+def _read_at(handler, offset, size):
+    handler.seek(offset)
+    return handler.read(size)
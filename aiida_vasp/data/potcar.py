@@ -117,8 +117,12 @@ import hashlib
 import tarfile
 import tempfile
 import shutil
-from contextlib import contextmanager
-from collections import namedtuple
+import calendar
+from contextlib import contextmanager, closing
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import cmp_to_key
+from io import BytesIO
 
 from py import path as py_path  # pylint: disable=no-name-in-module,no-member
 from pymatgen.io.vasp import PotcarSingle
@@ -128,10 +132,32 @@ from aiida.common.exceptions import UniquenessError, NotExistent
 from aiida.orm import Group
 from aiida.orm import Data
 from aiida.orm import QueryBuilder
+from aiida.orm import load_node
 
 from aiida_vasp.data.archive import ArchiveData
-from aiida_vasp.utils.aiida_utils import get_current_user, querybuild
+from aiida_vasp.utils.aiida_utils import get_current_user, querybuild, backend_transaction
 from aiida_vasp.utils.delegates import delegate_method_kwargs
+from aiida_vasp.utils.lru_cache import LRUCache
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# The uuids of the resolved PotcarData nodes, keyed by (family name, full name). Lives as long as the process
+# (e.g. a daemon worker), so that repeated submissions do not query for the same potentials. Only uuids are
+# kept, the nodes are loaded on a hit, so nodes deleted by another process are resolved again.
+POTCAR_LOOKUP_CACHE = LRUCache(maxsize=1024)
+
+# Below this number of files, hashing and parsing POTCARs is faster than starting a process pool
+POTCAR_POOL_MIN_FILES = 16
+# Number of new POTCARs stored per database transaction during a family upload
+POTCAR_UPLOAD_BATCH_SIZE = 100
+
+# Numerical POTCAR header values stored as (lowercase) attributes, so that they can be read without the file
+POTCAR_NUMERIC_KEYWORDS = ('ENMAX', 'ENMIN', 'EAUG', 'ZVAL', 'RCORE', 'RWIGS', 'POMASS')
+
+PotcarFamilySummary = namedtuple('PotcarFamilySummary', ['id', 'label', 'description', 'num_potentials', 'elements', 'symbols'])
 
 
 def normalize_potcar_contents(potcar_contents):
@@ -154,6 +180,78 @@ def sha512_potcar(potcar_contents):
     return sha512_hash.hexdigest()
 
 
+def get_potcar_file_metadata(file_path=None, contents=None):
+    """
+    Read the attributes identifying a POTCAR file.
+
+    Those are the sha512 hash of the contents, the metadata parsed by pymatgen (including the values of
+    ``POTCAR_NUMERIC_KEYWORDS`` found in the header) and the names derived from the location of the
+    file, which is expected to be ``<potential_set>/<full_name>/POTCAR``.
+
+    :param file_path: path to the POTCAR file
+    :param contents: the contents of the POTCAR file, if given, ``file_path`` is not read. Without
+        a path, the full name is taken from the symbol and the potential set is left empty.
+    """
+    if contents is None:
+        with py_path.local(file_path).open('r') as potcar_fo:
+            contents = potcar_fo.read()
+    try:
+        contents = contents.decode()
+    except AttributeError:
+        pass
+    potcar = PotcarSingle(contents)
+    metadata = {
+        'sha512': sha512_potcar(contents),
+        'title': potcar.keywords['TITEL'],
+        'functional': potcar.functional,
+        'element': potcar.element,
+        'symbol': potcar.symbol
+    }
+    for keyword in POTCAR_NUMERIC_KEYWORDS:
+        if keyword in potcar.keywords:
+            metadata[keyword.lower()] = potcar.keywords[keyword]
+    if file_path is None:
+        metadata.update({'original_filename': 'POTCAR', 'full_name': potcar.symbol, 'potential_set': ''})
+    else:
+        file_path = py_path.local(file_path)
+        metadata.update({
+            'original_filename': file_path.relto(file_path.join('..', '..', '..')),  # familyfolder/Element/POTCAR
+            'full_name': file_path.dirpath().basename,
+            'potential_set': file_path.parts()[-3].basename
+        })
+    return metadata
+
+
+def _read_potcar_file_metadata(file_path, contents=None):
+    """Return (file_path, metadata, None) or (file_path, None, error) if the file can not be read as a POTCAR."""
+    try:
+        return file_path, get_potcar_file_metadata(file_path, contents=contents), None
+    except (KeyError, AttributeError, IndexError) as err:
+        return file_path, None, err
+
+
+def read_potcar_files_metadata(file_paths, processes=None, contents=None):
+    """
+    Read the metadata of many POTCAR files, using a pool of worker processes.
+
+    :param file_paths: list of paths to POTCAR files
+    :param processes: number of worker processes, defaults to the number of CPUs. No pool is
+        used for ``processes=1`` or only a few files.
+    :param contents: dict {file_path: contents} for files that are not to be read from disk,
+        like the ones found inside archives by the :py:class:`PotcarWalker`.
+    :return: list of (file_path, metadata, error) tuples in the order of ``file_paths``, see
+        :py:func:`get_potcar_file_metadata` for the metadata. Files that could not be read have
+        a metadata of None and the raised exception as error.
+    """
+    file_paths = [str(file_path) for file_path in file_paths]
+    contents = contents or {}
+    file_contents = [contents.get(file_path) for file_path in file_paths]
+    if processes == 1 or len(file_paths) < POTCAR_POOL_MIN_FILES:
+        return [_read_potcar_file_metadata(file_path, file_content) for file_path, file_content in zip(file_paths, file_contents)]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(_read_potcar_file_metadata, file_paths, file_contents))
+
+
 @contextmanager
 def temp_dir():
     """Temporary directory context manager that deletes the tempdir after use."""
@@ -174,18 +272,37 @@ def temp_potcar(contents):
         yield potcar_file
 
 
+def extraction_path(file_path):
+    """Return the path of the folder a .tar archive is extracted into (next to it, named like it without extension)."""
+    return file_path.dirpath().join(file_path.basename.split('.tar')[0])
+
+
 def extract_tarfile(file_path):
     """Extract a .tar archive into an appropriately named folder, return the path of the folder, avoid extracting if folder exists."""
-    new_path = None
-    with tarfile.open(str(file_path)) as archive:
-        new_dir = file_path.basename.split('.tar')[0]
-        new_path = file_path.dirpath().join(new_dir)
-        if not new_path.exists():
+    new_path = extraction_path(file_path)
+    if not new_path.exists():
+        with tarfile.open(str(file_path)) as archive:
             archive.extractall(str(new_path))
 
     return new_path
 
 
+@contextmanager
+def open_export_archive(path):
+    """Open a tar archive for writing, compressed with zstd for ``.zst`` paths and with gzip otherwise."""
+    if path.ext != '.zst':
+        with closing(tarfile.open(str(path), 'w:gz')) as archive:
+            yield archive
+        return
+    if zstandard is None:
+        raise ImportError('The zstandard package must be installed to write {}'.format(path))
+    with path.open('wb') as dest_fo:
+        compressor = zstandard.ZstdCompressor().stream_writer(dest_fo)
+        with closing(tarfile.open(fileobj=compressor, mode='w|')) as archive:
+            yield archive
+        compressor.flush(zstandard.FLUSH_FRAME)
+
+
 def by_older(left, right):
     if left.ctime < right.ctime:
         return -1
@@ -206,41 +323,57 @@ class PotcarWalker(object):  # pylint: disable=useless-object-inheritance
     """
     Walk the file system and find POTCAR files under a given directory.
 
-    Build a list of potcars including their full path and wether they are archived inside a tar archive.
+    Build a list of potcars including their full path. Tar archives (also nested ones) are read in
+    place instead of being extracted. The POTCAR files inside them are listed with the path they
+    would have after extracting the archive into a folder next to it (see :py:func:`extraction_path`),
+    and their contents are kept in ``archived``, by path.
     """
 
     def __init__(self, path):
         self.path = py_path.local(path)
         self.potcars = set()
+        self.archived = {}
 
     def walk(self):
-        """Walk the folder tree to find POTCAR, extracting any tar archives along the way."""
+        """Walk the folder tree to find POTCAR, reading any tar archives along the way."""
         if self.path.isfile():
-            extracted = self.file_dispatch(self.path.dirname, [], self.path.basename)
-            if extracted:
-                self.path = extracted
-                self.walk()
+            self.file_dispatch(self.path.dirname, [], self.path.basename)
         else:
             for root, dirs, files in os.walk(str(self.path)):
                 for file_name in files:
                     self.file_dispatch(root, dirs, file_name)
 
-    def file_dispatch(self, root, dirs, file_name):
+    def file_dispatch(self, root, dirs, file_name):  # pylint: disable=unused-argument
         """Add POTCAR files to the list and dispatch handling of different kinds of files to other methods."""
         file_path = py_path.local(root).join(file_name)
         if tarfile.is_tarfile(str(file_path)):
-            return self.handle_tarfile(dirs, file_path)
-        if 'POTCAR' in file_name:
+            self.handle_tarfile(file_path)
+        elif 'POTCAR' in file_name:
             self.potcars.add(file_path)
-        return None
 
-    @classmethod
-    def handle_tarfile(cls, dirs, file_path):
-        """Handle .tar archives: extract and add the extracted folder to be searched."""
-        new_dir = extract_tarfile(file_path)
-        if new_dir not in dirs:
-            dirs.append(str(new_dir))
-        return new_dir
+    def handle_tarfile(self, file_path):
+        """Handle .tar archives: stream through the members without extracting them."""
+        with tarfile.open(str(file_path)) as archive:
+            self._walk_archive(archive, extraction_path(file_path))
+
+    def _walk_archive(self, archive, path):
+        """Add the POTCAR members of an open archive, which would be extracted to path, descending into nested archives."""
+        for member in archive:
+            if not member.isfile():
+                continue
+            member_path = path.join(member.name)
+            with closing(archive.extractfile(member)) as member_fo:
+                try:
+                    nested_archive = tarfile.open(fileobj=member_fo)
+                except tarfile.ReadError:
+                    nested_archive = None
+                if nested_archive is not None:
+                    with nested_archive:
+                        self._walk_archive(nested_archive, extraction_path(member_path))
+                elif 'POTCAR' in member_path.basename:
+                    member_fo.seek(0)
+                    self.potcars.add(member_path)
+                    self.archived[str(member_path)] = member_fo.read()
 
 
 class PotcarMetadataMixin(object):  # pylint: disable=useless-object-inheritance
@@ -253,11 +386,12 @@ class PotcarMetadataMixin(object):  # pylint: disable=useless-object-inheritance
         label = cls._query_label
         if not query:
             query = querybuild(cls, tag=label)
+        model_version = kwargs.pop('model_version', cls._VERSION)
         filters = {}
         for attr_name, attr_val in kwargs.items():
             filters['attributes.{}'.format(attr_name)] = {'==': attr_val}
         if cls._HAS_MODEL_VERSIONING:
-            filters['attributes._MODEL_VERSION'] = {'==': kwargs.get('model_version', cls._VERSION)}
+            filters['attributes._MODEL_VERSION'] = {'==': model_version}
         query.add_filter(label, filters)
         return query
 
@@ -268,7 +402,6 @@ class PotcarMetadataMixin(object):  # pylint: disable=useless-object-inheritance
         if not query_builder.count():
             raise NotExistent()
         results = [result[0] for result in query_builder.all()]
-        from functools import cmp_to_key
         results.sort(key=cmp_to_key(by_older))
         return results
 
@@ -290,6 +423,29 @@ class PotcarMetadataMixin(object):  # pylint: disable=useless-object-inheritance
         """Answers the question wether a node with attributes given in kwargs exists."""
         return bool(cls.query_by_attrs(**kwargs).count() >= 1)
 
+    @classmethod
+    def find_by_sha512s(cls, sha512s, model_version=None):
+        """
+        Find the nodes for many sha512 hashes with a single query.
+
+        :param model_version: look for nodes of this version instead of the current one.
+        :return: dict {sha512: node} for the hashes that exist, with the oldest node for each hash.
+        """
+        if not sha512s:
+            return {}
+        label = cls._query_label
+        query = querybuild(cls, tag=label)
+        filters = {'attributes.sha512': {'in': list(sha512s)}}
+        if cls._HAS_MODEL_VERSIONING:
+            filters['attributes._MODEL_VERSION'] = {'==': model_version or cls._VERSION}
+        query.add_filter(label, filters)
+        nodes = [result[0] for result in query.all()]
+        nodes.sort(key=cmp_to_key(by_older))
+        found = {}
+        for node in nodes:
+            found.setdefault(node.sha512, node)
+        return found
+
     @property
     def sha512(self):
         """Sha512 hash of the POTCAR file (readonly)."""
@@ -330,6 +486,16 @@ class PotcarMetadataMixin(object):  # pylint: disable=useless-object-inheritance
         """The name of the original file uploaded into AiiDA."""
         return self.get_attribute('potential_set')
 
+    @property
+    def enmax(self):
+        """ENMAX of the POTCAR potential (readonly), None for nodes stored before it was recorded."""
+        return self.get_attribute('enmax', None)
+
+    @property
+    def zval(self):
+        """Number of valence electrons (ZVAL) of the POTCAR potential (readonly), None for nodes stored before it was recorded."""
+        return self.get_attribute('zval', None)
+
     def verify_unique(self):
         """Raise a UniquenessError if an equivalent node exists."""
         from copy import deepcopy
@@ -378,19 +544,28 @@ class PotcarFileData(ArchiveData, PotcarMetadataMixin, VersioningMixin):
 
     When writing a calculation plugin or workchain, do not use this as an input type,
     use :class:`aiida_vasp.data.potcar.PotcarData` instead!
+
+    Since version 2, the POTCAR file is stored as a single repository object, compressed with zstd
+    if the ``zstandard`` package is available, instead of a ``tar.gz`` archive. Nodes of version 1
+    can still be read and are converted with :py:meth:`migrate_old_versions`.
     """
 
     _query_label = 'potcar_file'
     _query_type_string = 'data.vasp.potcar_file.'
     _plugin_type_string = 'data.vasp.potcar_file.PotcarFileData.'
-    _VERSION = 1
+    _VERSION = 2
+    _OBJECT_NAME = 'POTCAR'
+    _COMPRESSED_OBJECT_NAME = 'POTCAR.zst'
 
     def __init__(self, *args, **kwargs):
-        # remove file in kwargs as this is not accepted in the subsequent inits
+        # remove file and contents in kwargs as these are not accepted in the subsequent inits
         path = kwargs.pop('file', None)
+        contents = kwargs.pop('contents', None)
         super(PotcarFileData, self).__init__(*args, **kwargs)
         if path is not None:
             self.init_with_kwargs(file=path)
+        elif contents is not None:
+            self.init_with_kwargs(contents=contents)
 
     @delegate_method_kwargs(prefix='_init_with_')
     def init_with_kwargs(self, **kwargs):
@@ -400,24 +575,43 @@ class PotcarFileData(ArchiveData, PotcarMetadataMixin, VersioningMixin):
         """Initiqalize from a file path."""
         self.add_file(filepath)
 
-    def add_file(self, src_abs, dst_filename=None):
-        """Add the POTCAR file to the archive and set attributes."""
-        src_path = py_path.local(src_abs)
+    def _init_with_contents(self, contents):
+        """Initialize from the contents of a POTCAR file."""
+        self.add_contents(contents)
+
+    def add_file(self, src_abs, dst_filename=None, metadata=None):
+        """
+        Add the POTCAR file to the archive and set attributes.
+
+        :param metadata: the attributes as returned by :py:func:`get_potcar_file_metadata`, if they were
+            already read (as during a family upload). Otherwise the file is read again to get them.
+        """
         self.set_version()
-        if self._filelist:
+        if self._filelist or self._contentlist:
             raise AttributeError('Can only hold one POTCAR file')
         super(PotcarFileData, self).add_file(src_abs, dst_filename)
-        self.set_attribute('sha512', self.get_file_sha512(src_abs))
-        potcar = PotcarSingle.from_file(src_abs)
-        self.set_attribute('title', potcar.keywords['TITEL'])
-        self.set_attribute('functional', potcar.functional)
-        self.set_attribute('element', potcar.element)
-        self.set_attribute('symbol', potcar.symbol)
-        src_rel = src_path.relto(src_path.join('..', '..', '..'))  # familyfolder/Element/POTCAR
-        self.set_attribute('original_filename', src_rel)
-        dir_name = src_path.dirpath().basename
-        self.set_attribute('full_name', dir_name)
-        self.set_attribute('potential_set', src_path.parts()[-3].basename)
+        if metadata is None:
+            metadata = get_potcar_file_metadata(src_abs)
+        for attr_name, attr_val in metadata.items():
+            self.set_attribute(attr_name, attr_val)
+
+    def add_contents(self, contents, file_path=None, metadata=None):
+        """
+        Add a POTCAR file to the archive from its contents (bytes) and set attributes.
+
+        :param file_path: the (possibly archived) location of the file, the full name and potential set are derived from it.
+        :param metadata: the attributes as returned by :py:func:`get_potcar_file_metadata`, if they were already read.
+        """
+        self.set_version()
+        if self._filelist or self._contentlist:
+            raise AttributeError('Can only hold one POTCAR file')
+        if not isinstance(contents, bytes):
+            contents = contents.encode('utf-8')
+        super(PotcarFileData, self).add_contents(contents, 'POTCAR')
+        if metadata is None:
+            metadata = get_potcar_file_metadata(file_path, contents=contents)
+        for attr_name, attr_val in metadata.items():
+            self.set_attribute(attr_name, attr_val)
 
     @classmethod
     def get_file_sha512(cls, path):
@@ -440,25 +634,50 @@ class PotcarFileData(ArchiveData, PotcarMetadataMixin, VersioningMixin):
         self.verify_unique()
         return super(PotcarFileData, self).store(*args, **kwargs)
 
+    def _make_archive(self):
+        """Store the POTCAR file as a single repository object (zstd compressed if possible) instead of a tar archive."""
+        if self._contentlist:
+            contents = self._contentlist[0][0]
+        else:
+            with open(self._filelist[0][0], 'rb') as potcar_fo:
+                contents = potcar_fo.read()
+        if zstandard is not None:
+            self.put_object_from_filelike(BytesIO(zstandard.ZstdCompressor().compress(contents)),
+                                          self._COMPRESSED_OBJECT_NAME,
+                                          mode='wb',
+                                          encoding=None)
+        else:
+            self.put_object_from_filelike(BytesIO(contents), self._OBJECT_NAME, mode='wb', encoding=None)
+
     @contextmanager
-    def get_file_obj(self):
+    def get_file_obj(self, model_version=None):
         """Open a readonly file object to read the stored POTCAR file."""
-        file_obj = None
-        try:
-            file_obj = self.archive.extractfile(self.archive.members[0])
-            yield file_obj
-        finally:
-            if file_obj:
-                file_obj.close()
-
-    def export_archive(self, archive, dry_run=False):
-        """Add the stored POTCAR file to an archive for export."""
-        with self.get_file_obj() as potcar_fo:
-            arcname = '{}/POTCAR'.format(self.symbol)
-            tarinfo = self.archive.members[0]
-            tarinfo.name = arcname
-            if not dry_run:
-                archive.addfile(tarinfo, fileobj=potcar_fo)
+        if model_version is None:
+            model_version = self.model_version
+        if model_version < 2:
+            file_obj = None
+            try:
+                file_obj = self.archive.extractfile(self.archive.members[0])
+                yield file_obj
+            finally:
+                if file_obj:
+                    file_obj.close()
+        else:
+            yield BytesIO(self._read_content(model_version))
+
+    def export_archive(self, archive, dry_run=False, contents=None):
+        """
+        Add the stored POTCAR file to an archive for export.
+
+        :param contents: the contents of the file, if they have already been read.
+        """
+        if contents is None:
+            contents = self.get_content()
+        tarinfo = tarfile.TarInfo(name='{}/POTCAR'.format(self.symbol))
+        tarinfo.size = len(contents)
+        tarinfo.mtime = calendar.timegm(self.ctime.utctimetuple())
+        if not dry_run:
+            archive.addfile(tarinfo, fileobj=BytesIO(contents))
         return tarinfo.name
 
     def export_file(self, path, dry_run=False):
@@ -495,7 +714,20 @@ class PotcarFileData(ArchiveData, PotcarMetadataMixin, VersioningMixin):
         return path
 
     def get_content(self):
-        with self.get_file_obj() as potcar_fo:
+        """Return the contents of the stored POTCAR file as bytes."""
+        return self._read_content(self.model_version)
+
+    def _read_content(self, model_version):
+        """Read the contents from the repository, without accessing the database (safe to use from threads)."""
+        if model_version < 2:
+            with self.get_file_obj(model_version) as potcar_fo:
+                return potcar_fo.read()
+        if self._COMPRESSED_OBJECT_NAME in self.list_object_names():
+            if zstandard is None:
+                raise ImportError('The zstandard package must be installed to read the POTCAR file of {}'.format(self))
+            with self.open(self._COMPRESSED_OBJECT_NAME, mode='rb') as potcar_fo:
+                return zstandard.ZstdDecompressor().decompress(potcar_fo.read())
+        with self.open(self._OBJECT_NAME, mode='rb') as potcar_fo:
             return potcar_fo.read()
 
     def get_pymatgen(self):
@@ -515,11 +747,49 @@ class PotcarFileData(ArchiveData, PotcarMetadataMixin, VersioningMixin):
             node.store()
         return node, created
 
+    @classmethod
+    def migrate_old_versions(cls, dry_run=False):
+        """
+        Store a node in the current format for every PotcarFileData node of an older version.
+
+        The new nodes keep the names of the old ones and get the header values as attributes. The
+        existing PotcarData nodes (and their families) find the new nodes, as they have the same hash.
+        The old nodes are left in place, but are no longer found by queries for the current version.
+
+        :return: the list of old nodes that were (or with ``dry_run`` would be) migrated.
+        """
+        label = 'versioned'
+        query = querybuild(cls, tag=label)
+        query.add_filter(label, {'attributes._MODEL_VERSION': {'<': cls._VERSION}})
+        old_nodes = [result[0] for result in query.all()]
+        migrated = [node for node in old_nodes if not cls.exists(sha512=node.sha512)]
+        if dry_run:
+            return migrated
+
+        for start in range(0, len(migrated), POTCAR_UPLOAD_BATCH_SIZE):
+            with backend_transaction():
+                for old_node in migrated[start:start + POTCAR_UPLOAD_BATCH_SIZE]:
+                    contents = old_node.get_content()
+                    metadata = get_potcar_file_metadata(contents=contents)
+                    for attr_name in ('original_filename', 'full_name', 'potential_set'):
+                        metadata[attr_name] = old_node.get_attribute(attr_name)
+                    node = cls()
+                    node.add_contents(contents, metadata=metadata)
+                    node.store()
+        return migrated
+
     @classmethod
     def get_or_create_from_contents(cls, contents):
         """Get or create (store) a PotcarFileData node from a string containing the POTCAR contents."""
-        with temp_potcar(contents) as potcar_file:
-            return cls.get_or_create(potcar_file)
+        sha512 = cls.get_contents_sha512(contents)
+        if cls.exists(sha512=sha512):
+            created = False
+            node = cls.find_one(sha512=sha512)
+        else:
+            created = True
+            node = cls(contents=contents)
+            node.store()
+        return node, created
 
 
 class PotcarData(Data, PotcarMetadataMixin, VersioningMixin):
@@ -550,8 +820,11 @@ class PotcarData(Data, PotcarMetadataMixin, VersioningMixin):
             self.set_attribute(attr_name, potcar_file_node.get_attribute(attr_name))
 
     def find_file_node(self):
-        """Find and return the matching PotcarFileData node."""
-        return PotcarFileData.find_one(**self.attributes)
+        """Find and return the matching PotcarFileData node, falling back to nodes stored in an older format."""
+        try:
+            return PotcarFileData.find_one(**self.attributes)
+        except NotExistent:
+            return PotcarFileData.find_one(sha512=self.sha512, model_version=1)
 
     # pylint: disable=arguments-differ
     def store(self, *args, **kwargs):
@@ -586,8 +859,12 @@ class PotcarData(Data, PotcarMetadataMixin, VersioningMixin):
     @classmethod
     def get_or_create_from_contents(cls, contents):
         """Get or create (store) a PotcarData node from a string containing the POTCAR contents."""
-        with temp_potcar(contents) as potcar_file:
-            return cls.get_or_create_from_file(str(potcar_file))
+        sha512 = PotcarFileData.get_contents_sha512(contents)
+        file_node = PotcarFileData.find_one(sha512=sha512) if PotcarFileData.exists(sha512=sha512) else PotcarFileData(contents=contents)
+        node, created = cls.get_or_create(file_node)
+        if not file_node.is_stored:
+            file_node.store()
+        return node, created
 
     @classmethod
     def file_not_uploaded(cls, file_path):
@@ -611,6 +888,65 @@ class PotcarData(Data, PotcarMetadataMixin, VersioningMixin):
             group = None
         return group
 
+    @classmethod
+    def get_potcar_family_summaries(cls, filter_elements=None, filter_symbols=None):
+        """
+        Summarize all groups of type PotcarFamily with a single query, possibly with some filters.
+
+        No nodes are loaded, only the element and symbol attributes of the potentials are projected.
+
+        :param filter_elements: list of strings.
+               If present, returns only the families that contain one POTCAR for
+               every element present in the list. A single element can be passed as a string.
+        :param filter_symbols: list of strings with symbols to filter for.
+        :return: list of ``PotcarFamilySummary`` (group id, label, description, number of potentials,
+            set of elements and set of symbols), ordered by group id.
+        """
+        if isinstance(filter_elements, str):
+            filter_elements = [filter_elements]
+        if isinstance(filter_symbols, str):
+            filter_symbols = [filter_symbols]
+
+        query = QueryBuilder()
+        query.append(Group,
+                     tag='family',
+                     filters={'type_string': {
+                         '==': cls.potcar_family_type_string
+                     }},
+                     project=['id', 'label', 'description'])
+        query.append(cls,
+                     tag='potcar',
+                     with_group='family',
+                     outerjoin=True,
+                     project=['id', 'attributes.element', 'attributes.symbol'])
+
+        families = {}
+        for group_id, label, description, potcar_id, element, symbol in query.iterall():
+            family = families.setdefault(group_id, {
+                'label': label,
+                'description': description,
+                'potcars': set(),
+                'elements': set(),
+                'symbols': set()
+            })
+            if potcar_id is None:
+                continue
+            family['potcars'].add(potcar_id)
+            family['elements'].add(element)
+            family['symbols'].add(symbol)
+
+        summaries = []
+        for group_id in sorted(families):
+            family = families[group_id]
+            if filter_elements and not family['elements'].issuperset(filter_elements):
+                continue
+            if filter_symbols and not family['symbols'].issuperset(filter_symbols):
+                continue
+            summaries.append(
+                PotcarFamilySummary(group_id, family['label'], family['description'], len(family['potcars']), frozenset(family['elements']),
+                                    frozenset(family['symbols'])))
+        return summaries
+
     @classmethod
     def get_potcar_groups(cls, filter_elements=None, filter_symbols=None):
         """
@@ -622,44 +958,14 @@ class PotcarData(Data, PotcarMetadataMixin, VersioningMixin):
                all families are returned. A single element can be passed as a string.
         :param filter_symbols: list of strings with symbols to filter for.
         """
+        summaries = cls.get_potcar_family_summaries(filter_elements=filter_elements, filter_symbols=filter_symbols)
+        group_ids = [summary.id for summary in summaries]
+        if not group_ids:
+            return []
         group_query = QueryBuilder()
-        group_query.append(Group,
-                           with_node='potcar_data',
-                           tag='potcar_data',
-                           filters={'type_string': {
-                               '==': cls.potcar_family_type_string
-                           }},
-                           project='*')
-
-        groups = [group_list[0] for group_list in group_query.all()]
-
-        if filter_elements:
-            for element in filter_elements:
-                idx_has_element = []
-                for i, group in enumerate(groups):
-                    group_filters = {'label': {'==': group.label}, 'type_string': {'==': cls.potcar_family_type_string}}
-                    element_filters = {'attributes.element': {'==': element}}
-                    elem_query = QueryBuilder()
-                    elem_query.append(Group, tag='family', filters=group_filters)
-                    elem_query.append(cls, tag='potcar', with_group='family', filters=element_filters)
-                    if elem_query.count() > 0:
-                        idx_has_element.append(i)
-                groups = [groups[i] for i in range(len(groups)) if i in idx_has_element]
-
-        if filter_symbols:
-            for symbol in filter_symbols:
-                idx_has_symbol = []
-                for i, group in enumerate(groups):
-                    group_filters = {'label': {'==': group.label}, 'type_string': {'==': cls.potcar_family_type_string}}
-                    symbol_filters = {'attributes.symbol': {'==': symbol}}
-                    symbol_query = QueryBuilder()
-                    symbol_query.append(Group, tag='family', filters=group_filters)
-                    symbol_query.append(cls, tag='potcar', with_group='family', filters=symbol_filters)
-                    if symbol_query.count() > 0:
-                        idx_has_symbol.append(i)
-                groups = [groups[i] for i in range(len(groups)) if i in idx_has_symbol]
-
-        return groups
+        group_query.append(Group, filters={'id': {'in': group_ids}})
+        groups = {group.id: group for group, in group_query.all()}
+        return [groups[group_id] for group_id in group_ids]
 
     @classmethod
     def get_potcars_dict(cls, elements, family_name, mapping=None):
@@ -677,31 +983,82 @@ class PotcarData(Data, PotcarMetadataMixin, VersioningMixin):
 
         If there are multiple POTCAR with the same ``full_name``, the first one
         returned by ``PotcarData.find()`` will be used.
+
+        All potentials are resolved with a single query, which is skipped entirely if they
+        have been resolved before in this process (see ``invalidate_lookup_cache``).
         """
         if not mapping:
             mapping = {element: element for element in elements}
-        group_filters = {'label': {'==': family_name}, 'type_string': {'==': cls.potcar_family_type_string}}
-        element_filters = {'attributes.full_name': {'in': [mapping[element] for element in elements]}}
-        query = QueryBuilder()
-        query.append(Group, tag='family', filters=group_filters)
-        query.append(cls, tag='potcar', with_group='family', filters=element_filters)
-
-        result_potcars = {}
         for element in elements:
             if element not in mapping:
                 raise ValueError('Potcar mapping must contain an item for each element in the structure, '
                                  'with the full name of the POTCAR file (i.e. "In_d", "As_h").')
+
+        potcars_by_full_name = cls._find_by_full_names(family_name, {mapping[element] for element in elements})
+
+        result_potcars = {}
+        for element in elements:
             full_name = mapping[element]
-            potcars_of_kind = [potcar[0] for potcar in query.all() if potcar[0].full_name == full_name]
-            if not potcars_of_kind:
+            if full_name not in potcars_by_full_name:
                 raise NotExistent('No POTCAR found for full name {} in family {}'.format(full_name, family_name))
-            if len(potcars_of_kind) > 1:
-                result_potcars[element] = cls.find(family=family_name, full_name=full_name)[0]
-            else:
-                result_potcars[element] = potcars_of_kind[0]
+            result_potcars[element] = potcars_by_full_name[full_name]
 
         return result_potcars
 
+    @classmethod
+    def _find_by_full_names(cls, family_name, full_names):
+        """
+        Resolve full names to the PotcarData nodes of a family, using at most one query.
+
+        :return: dict {full_name: PotcarData}, full names not found in the family are left out.
+        """
+        found = {}
+        missing = []
+        for full_name in full_names:
+            potcar = cls._load_cached(family_name, full_name)
+            if potcar is None:
+                missing.append(full_name)
+            else:
+                found[full_name] = potcar
+
+        if missing:
+            group_filters = {'label': {'==': family_name}, 'type_string': {'==': cls.potcar_family_type_string}}
+            query = QueryBuilder()
+            query.append(Group, tag='family', filters=group_filters)
+            query.append(cls, tag='potcar', with_group='family', filters={'attributes.full_name': {'in': missing}})
+
+            candidates = {}
+            for potcar, in query.all():
+                candidates.setdefault(potcar.full_name, []).append(potcar)
+            for full_name, potcars in candidates.items():
+                # Same order as PotcarData.find() for multiple POTCARs with the same full name.
+                potcars.sort(key=cmp_to_key(by_older))
+                found[full_name] = potcars[0]
+                POTCAR_LOOKUP_CACHE.put((family_name, full_name), potcars[0].uuid)
+
+        return found
+
+    @staticmethod
+    def _load_cached(family_name, full_name):
+        """Load the cached PotcarData node of a full name in a family, None if it is not cached or no longer exists."""
+        key = (family_name, full_name)
+        uuid = POTCAR_LOOKUP_CACHE.get(key)
+        if uuid is None:
+            return None
+        try:
+            return load_node(uuid=uuid)
+        except NotExistent:
+            POTCAR_LOOKUP_CACHE.invalidate(key)
+            return None
+
+    @classmethod
+    def invalidate_lookup_cache(cls, family_name=None):
+        """Forget the potentials resolved by ``get_potcars_dict`` for a family, or for all families if none is given."""
+        if family_name is None:
+            POTCAR_LOOKUP_CACHE.invalidate()
+        else:
+            POTCAR_LOOKUP_CACHE.invalidate_where(lambda key: key[0] == family_name)
+
     @classmethod
     def query_by_attrs(cls, query=None, **kwargs):
         family_name = kwargs.pop('family_name', None)
@@ -799,7 +1156,7 @@ class PotcarData(Data, PotcarMetadataMixin, VersioningMixin):
         return group
 
     @classmethod
-    def upload_potcar_family(cls, source, group_name, group_description=None, stop_if_existing=True, dry_run=False):
+    def upload_potcar_family(cls, source, group_name, group_description=None, stop_if_existing=True, dry_run=False, processes=None):
         """
         Upload a set of POTCAR potentials as a family.
 
@@ -812,6 +1169,8 @@ class PotcarData(Data, PotcarMetadataMixin, VersioningMixin):
             if the file already exists in the DB, raises a MultipleObjectsError.
             If False, simply adds the existing UPFData node to the group.
         :param dry_run: If True, do not change the database.
+        :param processes: the number of processes used to hash and parse the POTCAR files,
+            defaults to the number of CPUs.
         """
         group = cls._prepare_group_for_upload(group_name, group_description, dry_run=dry_run)
 
@@ -819,7 +1178,11 @@ class PotcarData(Data, PotcarMetadataMixin, VersioningMixin):
         potcar_finder.walk()
         num_files = len(potcar_finder.potcars)
         family_nodes_uuid = [node.uuid for node in group.nodes] if not dry_run else []
-        potcars_tried_upload = cls._try_upload_potcars(potcar_finder.potcars, stop_if_existing=stop_if_existing, dry_run=dry_run)
+        potcars_tried_upload = cls._try_upload_potcars(potcar_finder.potcars,
+                                                       stop_if_existing=stop_if_existing,
+                                                       dry_run=dry_run,
+                                                       processes=processes,
+                                                       contents=potcar_finder.archived)
         new_potcars_added = [
             (potcar, created, file_path) for potcar, created, file_path in potcars_tried_upload if potcar.uuid not in family_nodes_uuid
         ]
@@ -833,6 +1196,7 @@ class PotcarData(Data, PotcarMetadataMixin, VersioningMixin):
 
         if not dry_run:
             group.add_nodes([potcar for potcar, created, file_path in new_potcars_added])
+            cls.invalidate_lookup_cache(group_name)
 
         num_added = len(new_potcars_added)
         num_uploaded = len([item for item in new_potcars_added if item[1]])  # item[1] refers to 'created'
@@ -840,60 +1204,144 @@ class PotcarData(Data, PotcarMetadataMixin, VersioningMixin):
         return num_files, num_added, num_uploaded
 
     @classmethod
-    def _try_upload_potcars(cls, file_paths, stop_if_existing=True, dry_run=False):
-        """Given a list of absolute paths to potcar files, try to upload them (or pretend to if dry_run=True)."""
-        list_created = []
-        for file_path_obj in file_paths:
-            file_path = str(file_path_obj)
-            try:
-                if not dry_run:
-                    potcar, created = cls.get_or_create_from_file(file_path)
-                else:
-                    potcar = cls.file_not_uploaded(file_path)
-                    created = bool(potcar.uuid == -1)
-                if stop_if_existing and not created:
-                    raise ValueError(('A POTCAR with identical SHA512 to {} is already in the DB,'
-                                      'therefore it cannot be added with the stop_if_existing kwarg.').format(file_path))
-                list_created.append((potcar, created, file_path))
-            except KeyError as err:
-                print('skipping file {} - uploading raised {}{}'.format(file_path, str(err.__class__), str(err)))
-            except AttributeError as err:
-                print('skipping file {} - uploading raised {}{}'.format(file_path, str(err.__class__), str(err)))
-            except IndexError as err:
+    def _try_upload_potcars(cls, file_paths, stop_if_existing=True, dry_run=False, processes=None, contents=None):
+        """
+        Given a list of absolute paths to potcar files, try to upload them (or pretend to if dry_run=True).
+
+        The files are hashed and parsed in a process pool, the existing nodes are found with one query
+        for all hashes and the new nodes are stored in batched transactions.
+
+        :param contents: dict {file_path: contents} of the files read from archives instead of from disk.
+
+        :return: list of (potcar, created, file_path) tuples, where created is True for the first file of
+            each newly uploaded POTCAR.
+        """
+        contents = contents or {}
+        files_metadata = []
+        file_paths = sorted(str(file_path) for file_path in file_paths)
+        for file_path, metadata, err in read_potcar_files_metadata(file_paths, processes=processes, contents=contents):
+            if err is not None:
                 print('skipping file {} - uploading raised {}{}'.format(file_path, str(err.__class__), str(err)))
+                continue
+            files_metadata.append((file_path, metadata))
+
+        sha512s = {metadata['sha512'] for file_path, metadata in files_metadata}
+        existing_potcars = cls.find_by_sha512s(sha512s)
+        existing_files = PotcarFileData.find_by_sha512s(sha512s.difference(existing_potcars))
+
+        new_files = OrderedDict()
+        for file_path, metadata in files_metadata:
+            sha512 = metadata['sha512']
+            if sha512 not in existing_potcars and sha512 not in new_files:
+                new_files[sha512] = (file_path, metadata)
+            elif stop_if_existing:
+                raise ValueError(('A POTCAR with identical SHA512 to {} is already in the DB,'
+                                  'therefore it cannot be added with the stop_if_existing kwarg.').format(file_path))
+
+        created_potcars = {}
+        if not dry_run:
+            new_items = list(new_files.items())
+            for start in range(0, len(new_items), POTCAR_UPLOAD_BATCH_SIZE):
+                with backend_transaction():
+                    for sha512, (file_path, metadata) in new_items[start:start + POTCAR_UPLOAD_BATCH_SIZE]:
+                        created_potcars[sha512] = cls._create_from_file_metadata(file_path,
+                                                                                 metadata,
+                                                                                 file_node=existing_files.get(sha512),
+                                                                                 contents=contents.get(file_path))
+
+        list_created = []
+        not_uploaded = namedtuple('potcar', ('uuid'))('-1')
+        for file_path, metadata in files_metadata:
+            sha512 = metadata['sha512']
+            if sha512 in existing_potcars:
+                list_created.append((existing_potcars[sha512], False, file_path))
+                continue
+            created = bool(new_files[sha512][0] == file_path)
+            if dry_run:
+                list_created.append((existing_files.get(sha512, not_uploaded), created, file_path))
+            else:
+                list_created.append((created_potcars[sha512], created, file_path))
 
         return list_created
 
     @classmethod
-    def export_family_folder(cls, family_name, path='.', dry_run=False):
+    def _create_from_file_metadata(cls, file_path, metadata, file_node=None, contents=None):
+        """Store a new PotcarData node and, if not given, its PotcarFileData node from a file that was already read."""
+        if file_node is None:
+            file_node = PotcarFileData()
+            if contents is not None:
+                file_node.add_contents(contents, file_path=file_path, metadata=metadata)
+            else:
+                file_node.add_file(file_path, metadata=metadata)
+        potcar = cls(potcar_file_node=file_node)
+        potcar.store()
+        if not file_node.is_stored:
+            file_node.store()
+        return potcar
+
+    @classmethod
+    def get_family_file_nodes(cls, family_name):
+        """
+        Find the PotcarFileData nodes of all potentials in a family, without loading the PotcarData nodes.
+
+        :return: dict {symbol: PotcarFileData}, the oldest potential is used for symbols occurring multiple times.
+        """
+        group_filters = {'label': {'==': family_name}, 'type_string': {'==': cls.potcar_family_type_string}}
+        query = QueryBuilder()
+        query.append(Group, tag='family', filters=group_filters)
+        query.append(cls, tag='potcar', with_group='family', project=['attributes.sha512'])
+        sha512s = {sha512 for sha512, in query.all()}
+
+        file_nodes = PotcarFileData.find_by_sha512s(sha512s)
+        file_nodes.update(PotcarFileData.find_by_sha512s(sha512s.difference(file_nodes), model_version=1))
+
+        by_symbol = {}
+        for file_node in sorted(file_nodes.values(), key=cmp_to_key(by_older)):
+            by_symbol.setdefault(file_node.symbol, file_node)
+        return by_symbol
+
+    @classmethod
+    def _read_file_nodes(cls, file_nodes, threads=None):
+        """Read the contents of many PotcarFileData nodes in a thread pool, yielding (file_node, contents) in order."""
+        # attributes are read up front, the threads only access the file repository
+        model_versions = [file_node.model_version for file_node in file_nodes]
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for file_node, contents in zip(file_nodes, executor.map(PotcarFileData._read_content, file_nodes, model_versions)):
+                yield file_node, contents
+
+    @classmethod
+    def export_family_folder(cls, family_name, path='.', dry_run=False, threads=None):
         """
         Export a family of POTCAR nodes into a file hierarchy similar to the one POTCARs are distributed in.
 
         :param family_name: name of the POTCAR family
         :param path: path to a local directory
         :param dry_run: bool, if True, only collect the names of files that would otherwise be written.
+        :param threads: the number of threads reading and writing files, by default chosen by ``ThreadPoolExecutor``.
 
         If ``path`` already exists, everything will be written into a subdirectory with the name of the family.
         """
         path = py_path.local(path)
         if path.exists():
             path = path.join(family_name)
-        group = cls.get_potcar_group(family_name)
-        all_file_nodes = [potcar.find_file_node() for potcar in group.nodes]
-        files_written = []
+        file_nodes = cls.get_family_file_nodes(family_name)
+        files_written = [path.join(symbol, 'POTCAR') for symbol in sorted(file_nodes)]
 
-        with temp_dir() as staging_dir:
-            for file_node in all_file_nodes:
-                new_file = file_node.export_file(staging_dir, dry_run=dry_run)
-                files_written.append(path.join(new_file.relto(staging_dir)))
-            if not dry_run:
-                staging_dir.copy(path, stat=True)
+        if not dry_run:
+            for file_node, contents in cls._read_file_nodes([file_nodes[symbol] for symbol in sorted(file_nodes)], threads=threads):
+                with path.join(file_node.symbol, 'POTCAR').open(mode='wb', ensure=True) as dest_fo:
+                    dest_fo.write(contents)
 
         return files_written
 
     @classmethod
-    def export_family_archive(cls, family_name, path='.', dry_run=False):
-        """Export a family of POTCAR nodes into a compressed archive."""
+    def export_family_archive(cls, family_name, path='.', dry_run=False, threads=None):
+        """
+        Export a family of POTCAR nodes into a compressed archive.
+
+        The archive is compressed with zstd if ``path`` ends with ``.zst`` (requires the zstandard package),
+        otherwise with gzip. A ``.tar.gz`` extension is added to paths without one.
+        """
         path = py_path.local(path)
 
         if path.isdir():
@@ -902,15 +1350,15 @@ class PotcarData(Data, PotcarMetadataMixin, VersioningMixin):
         if not path.ext:
             path = path.dirpath().join(path.basename + '.tar.gz')
 
-        archive = tarfile.open(str(path), 'w:gz') if not dry_run else None
-        group = cls.get_potcar_group(family_name)
-        all_file_nodes = [potcar.find_file_node() for potcar in group.nodes]
-        files_added = []
+        file_nodes = cls.get_family_file_nodes(family_name)
+        if dry_run:
+            return path, ['{}/POTCAR'.format(symbol) for symbol in sorted(file_nodes)]
+        file_nodes = [file_nodes[symbol] for symbol in sorted(file_nodes)]
 
-        for file_node in all_file_nodes:
-            files_added.append(file_node.export_archive(archive, dry_run=dry_run))
-        if not dry_run:
-            archive.close()
+        files_added = []
+        with open_export_archive(path) as archive:
+            for file_node, contents in cls._read_file_nodes(file_nodes, threads=threads):
+                files_added.append(file_node.export_archive(archive, contents=contents))
         return path, files_added
 
     def get_content(self):
@@ -941,6 +1389,5 @@ class PotcarData(Data, PotcarMetadataMixin, VersioningMixin):
         if not query.count():
             raise NotExistent()
         results = [result[0] for result in query.all()]
-        from functools import cmp_to_key
         results.sort(key=cmp_to_key(by_older))
         return results
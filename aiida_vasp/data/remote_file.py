@@ -0,0 +1,200 @@
+"""
+Remote references for large files.
+
+----------------------------------
+Mixin for SinglefileData based nodes, which allows them to reference a file that stays in
+a remote folder on the cluster instead of storing it in the repository.
+"""
+# pylint: disable=abstract-method
+# explanation: pylint wrongly complains about (aiida) Node not implementing query
+import base64
+import os
+
+from aiida.common.escaping import escape_for_bash
+from aiida.common.exceptions import ValidationError
+from aiida.orm import Data
+
+from aiida_vasp.utils.aiida_utils import cmp_get_transport
+
+# Suffix of the file with the size, modification time and header of a file left in the remote folder
+REMOTE_INFO_SUFFIX = '.aiida_remote'
+
+
+class RemoteFileMixin(object):  # pylint: disable=useless-object-inheritance
+    """
+    Allow a SinglefileData node to reference a file in a remote folder.
+
+    A remote reference records the computer, the 'remote_path', the 'size', the modification time 'mtime'
+    and, for nodes reading file headers, the 'header' of the file, but does not store the file in the repository.
+    A VaspCalculation running on the same computer stages it with a remote copy or symlink.
+
+    The VaspParser creates remote references without connecting to the computer: the job script runs
+    ``remote_info_command`` after VASP has finished, writing the size, modification time and header of the
+    file to the info file ``remote_info_file``, which is retrieved as a temporary file and read with
+    ``from_remote_info``. ``from_remote``, ``compute_checksum``, ``is_modified`` and ``getfile`` open a
+    transport themselves and are meant for interactive use, not for the parser or workchain steps.
+
+    Usage::
+
+        chgcar = ChargedensityData.from_remote(calc.outputs.remote_folder)
+        chgcar.is_remote  # True
+        chgcar.remote_path  # '/scratch/.../CHGCAR'
+        chgcar.is_modified()  # False, unless the size or modification time of the file changed
+        chgcar.compute_checksum()  # reads the whole file on the computer
+    """
+
+    _DEFAULT_FILENAME = None
+
+    @classmethod
+    def remote_info_file(cls, filename=None):
+        """Return the name of the info file written by ``remote_info_command``."""
+        return (filename or cls._DEFAULT_FILENAME) + REMOTE_INFO_SUFFIX
+
+    @classmethod
+    def remote_info_command(cls, filename=None):
+        """
+        Return a shell command printing the size, modification time and header of a file in the working directory.
+
+        The first line contains the size and the modification time, each further line the offset and the
+        base64 encoded bytes of a chunk of the header. Nothing is printed if the file does not exist.
+        """
+        path = escape_for_bash(filename or cls._DEFAULT_FILENAME)
+        lines = ['if [ -f {} ]; then'.format(path), "  stat -c '%s %Y' {}".format(path)]
+        lines += ['  ' + line for line in cls._remote_header_commands(path)]
+        lines.append('fi')
+        return '\n'.join(lines)
+
+    @classmethod
+    def _remote_header_commands(cls, path):  # pylint: disable=unused-argument
+        """Return the shell commands printing the chunks of the header of the file, see ``remote_chunk_command``."""
+        return []
+
+    @classmethod
+    def from_remote_info(cls, computer, remote_workdir, info, filename=None):
+        """
+        Create a node referencing a file in a remote folder from the output of ``remote_info_command``.
+
+        :param computer: the computer of the remote folder.
+        :param remote_workdir: the path of the remote folder.
+        :param info: the output of ``remote_info_command``.
+        :param filename: the name of the file, defaults to the file this node type represents, e.g. CHGCAR.
+        :return: the unstored node, or None if the file does not exist.
+        """
+        if isinstance(info, bytes):
+            info = info.decode('utf-8')
+        lines = info.splitlines()
+        if not lines or not lines[0].strip():
+            return None
+        size, mtime = lines[0].split()
+        chunks = []
+        for line in lines[1:]:
+            offset, _, data = line.partition(' ')
+            chunks.append((int(offset), base64.b64decode(data)))
+
+        filename = filename or cls._DEFAULT_FILENAME
+        node = cls(file=None)
+        node.computer = computer
+        node.set_attribute('filename', filename)
+        node.set_attribute('remote_path', os.path.join(remote_workdir, filename))
+        node.set_attribute('size', int(size))
+        node.set_attribute('mtime', int(mtime))
+        if hasattr(node, 'set_header'):
+            node.set_header(lambda offset, num_bytes: _read_chunks(chunks, offset, num_bytes))
+        return node
+
+    @classmethod
+    def from_remote(cls, remote_folder, filename=None):
+        """
+        Create a node referencing a file in a remote folder, connecting to its computer.
+
+        :param remote_folder: the RemoteData folder containing the file.
+        :param filename: the name of the file, defaults to the file this node type represents, e.g. CHGCAR.
+        :return: the unstored node, or None if the file does not exist.
+        """
+        with cmp_get_transport(remote_folder.computer) as transport:
+            transport.chdir(remote_folder.get_remote_path())
+            _, stdout, _ = transport.exec_command_wait(cls.remote_info_command(filename))
+        return cls.from_remote_info(remote_folder.computer, remote_folder.get_remote_path(), stdout, filename)
+
+    @property
+    def is_remote(self):
+        return self.get_attribute('remote_path', None) is not None
+
+    @property
+    def remote_path(self):
+        return self.get_attribute('remote_path', None)
+
+    @property
+    def size(self):
+        return self.get_attribute('size', None)
+
+    @property
+    def mtime(self):
+        return self.get_attribute('mtime', None)
+
+    @property
+    def checksum(self):
+        """The sha256 checksum of the remote file, if it has been computed with ``compute_checksum``."""
+        checksum = self.get_attribute('checksum', None)
+        if checksum is None and self.is_stored:
+            checksum = self.get_extra('checksum', None)
+        return checksum
+
+    def compute_checksum(self):
+        """
+        Compute the sha256 checksum of the remote file on the computer, which reads the whole file.
+
+        The checksum is kept in the attributes of an unstored and in the extras of a stored node.
+
+        :return: the checksum, or None if it could not be computed on the computer.
+        """
+        with cmp_get_transport(self.computer) as transport:
+            retval, stdout, _ = transport.exec_command_wait('sha256sum {}'.format(escape_for_bash(self.remote_path)))
+        checksum = stdout.split()[0] if retval == 0 and stdout.strip() else None
+        if checksum is not None:
+            if self.is_stored:
+                self.set_extra('checksum', checksum)
+            else:
+                self.set_attribute('checksum', checksum)
+        return checksum
+
+    def is_modified(self):
+        """Check, by its size and modification time, whether the remote file changed since it was referenced."""
+        with cmp_get_transport(self.computer) as transport:
+            if not transport.isfile(self.remote_path):
+                return True
+            attributes = transport.get_attribute(self.remote_path)
+        return attributes.st_size != self.size or int(attributes.st_mtime) != self.mtime
+
+    def getfile(self, dst):
+        """Download the referenced remote file to the local path dst."""
+        with cmp_get_transport(self.computer) as transport:
+            transport.getfile(self.remote_path, dst)
+
+    def _validate(self):
+        """Remote references have no file in the repository, which SinglefileData would require."""
+        if not self.is_remote:
+            return super(RemoteFileMixin, self)._validate()
+        if self.computer is None:
+            raise ValidationError('a remote reference must have a computer')
+        if self.list_object_names():
+            raise ValidationError('a remote reference must not store files in the repository')
+        return Data._validate(self)  # pylint: disable=protected-access
+
+
+def remote_chunk_command(path, offset, num_bytes):
+    """
+    Return a shell command printing the offset and the base64 encoded num_bytes of a file starting at offset.
+
+    :param offset: the offset, an integer or a shell expression, e.g. '$record_length'.
+    """
+    return "printf '%s ' {offset}; tail -c +$(({offset} + 1)) {path} | head -c {num_bytes} | base64 | tr -d '\\n'; echo".format(
+        offset=offset, path=path, num_bytes=num_bytes)
+
+
+def _read_chunks(chunks, offset, num_bytes):
+    """Read num_bytes starting at offset from the chunk of the header containing the offset."""
+    for start, data in chunks:
+        if start <= offset < start + len(data):
+            return data[offset - start:offset - start + num_bytes]
+    return b''
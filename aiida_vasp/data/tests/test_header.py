@@ -0,0 +1,109 @@
+"""Test reading the header metadata of ChargedensityData and WavefunData."""
+# pylint: disable=unused-import,unused-argument,redefined-outer-name,unused-wildcard-import,wildcard-import
+import struct
+
+from aiida_vasp.utils.fixtures import *
+from aiida_vasp.utils.aiida_utils import get_data_class, get_data_node
+
+CHGCAR_HEADER = """unknown system
+   1.00000000000000
+     5.000000    0.000000    0.000000
+     0.000000    5.000000    0.000000
+     0.000000    0.000000    5.000000
+   Si
+     2
+Direct
+  0.000000  0.000000  0.000000
+  0.250000  0.250000  0.250000
+
+   24   24   32
+"""
+
+
+def write_wavecar(path, encut):
+    """Write the header records of a single precision WAVECAR with a record length of 128 bytes."""
+    record_length = 128
+    first = struct.pack('<3d', record_length, 1, 45200)
+    second = struct.pack('<12d', 4, 8, encut, 5., 0., 0., 0., 5., 0., 0., 0., 5.)
+    with open(path, 'wb') as wavecar_fo:
+        wavecar_fo.write(first.ljust(record_length, b'\0'))
+        wavecar_fo.write(second.ljust(record_length, b'\0'))
+
+
+def silicon(lattice_constant):
+    """Return a structure with the two silicon atoms of the CHGCAR header, the first lattice vector has the given length."""
+    structure = get_data_node('structure', cell=[[lattice_constant, 0., 0.], [0., 5., 0.], [0., 0., 5.]])
+    structure.append_atom(position=(0., 0., 0.), symbols='Si')
+    structure.append_atom(position=(1.25, 1.25, 1.25), symbols='Si')
+    return structure
+
+
+def test_chgcar_header(fresh_aiida_env, tmpdir):
+    """Read the structure and grid from the CHGCAR header and check the number of atoms."""
+    chgcar_path = tmpdir.join('CHGCAR')
+    chgcar_path.write(CHGCAR_HEADER + ' 0.1 0.2 0.3 0.4 0.5\n' * 10)
+    chgcar = get_data_class('vasp.chargedensity')(file=chgcar_path.strpath)
+    assert chgcar.header['species'] == ['Si']
+    assert chgcar.header['counts'] == [2]
+    assert chgcar.header['grid'] == [24, 24, 32]
+    assert chgcar.header['lattice'][2] == [0., 0., 5.]
+    structure = get_data_node('structure', cell=chgcar.header['lattice'])
+    structure.append_atom(position=(0., 0., 0.), symbols='Si')
+    assert chgcar.check_compatibility({}, structure) == ['the CHGCAR is for the atoms 2 Si, the structure has 1 Si']
+    structure.append_atom(position=(1.25, 1.25, 1.25), symbols='Si')
+    assert not chgcar.check_compatibility({}, structure)
+    # The same number of atoms of other species
+    other = get_data_node('structure', cell=chgcar.header['lattice'])
+    other.append_atom(position=(0., 0., 0.), symbols='Si')
+    other.append_atom(position=(1.25, 1.25, 1.25), symbols='Ge')
+    assert chgcar.check_compatibility({}, other) == ['the CHGCAR is for the atoms 2 Si, the structure has 1 Ge, 1 Si']
+    # The grid is only compared if it is set
+    assert not chgcar.check_compatibility({'ngxf': 24, 'ngyf': 24, 'ngzf': 32}, structure)
+    assert len(chgcar.check_compatibility({'ngzf': 24}, structure)) == 1
+
+
+def test_lattice_compatibility(fresh_aiida_env, tmpdir):
+    """Files written for a different cell are only read by calculations that relax the cell."""
+    chgcar_path = tmpdir.join('CHGCAR')
+    chgcar_path.write(CHGCAR_HEADER + ' 0.1 0.2 0.3 0.4 0.5\n' * 10)
+    write_wavecar(tmpdir.join('WAVECAR').strpath, encut=400.)
+    structure, slightly_strained = [silicon(lattice_constant) for lattice_constant in [5.5, 5.01]]
+    chgcar = get_data_class('vasp.chargedensity')(file=chgcar_path.strpath)
+    wavecar = get_data_class('vasp.wavefun')(file=tmpdir.join('WAVECAR').strpath)
+    for node in [chgcar, wavecar]:
+        problems = node.check_compatibility({}, structure)
+        assert len(problems) == 1 and 'lattice' in problems[0]
+        assert not node.check_compatibility({'nsw': 10, 'isif': 3}, structure)
+        assert not node.check_compatibility({}, slightly_strained)
+
+
+def test_wavecar_header(fresh_aiida_env, tmpdir):
+    """Read the dimensions and cutoff from the WAVECAR header and check the cutoff."""
+    wavecar_path = tmpdir.join('WAVECAR')
+    write_wavecar(wavecar_path.strpath, encut=400.)
+    wavecar = get_data_class('vasp.wavefun')(file=wavecar_path.strpath)
+    assert wavecar.header['nspin'] == 1
+    assert wavecar.header['nkpts'] == 4
+    assert wavecar.header['nbands'] == 8
+    assert wavecar.header['encut'] == 400.
+    assert wavecar.header['precision'] == 'single'
+    assert not wavecar.check_compatibility({'encut': 400})
+    assert wavecar.check_compatibility({'encut': 500})
+    assert not wavecar.check_compatibility({})
+    assert not wavecar.check_compatibility({'ispin': 1, 'nbands': 8})
+    assert wavecar.check_compatibility({'ispin': 2}) == ['ISPIN = 2 differs from the 1 the WAVECAR was written with']
+    assert wavecar.check_compatibility({'nbands': 16}) == ['NBANDS = 16 differs from the 8 the WAVECAR was written with']
+    # The number of k-points is only known for an explicit list
+    kpoints = get_data_node('array.kpoints')
+    kpoints.set_kpoints_mesh([4, 4, 4])
+    assert not wavecar.check_compatibility({}, kpoints=kpoints)
+    kpoints = get_data_node('array.kpoints')
+    kpoints.set_kpoints([[0., 0., 0.], [0.5, 0., 0.]])
+    assert wavecar.check_compatibility({}, kpoints=kpoints) == ['the WAVECAR is for 4 k-points, the calculation has 2']
+
+
+def test_unreadable_header(vasp_chgcar, vasp_wavecar):
+    """Files that are not in the expected format get an empty header and pass the checks."""
+    for node, _ in [vasp_chgcar, vasp_wavecar]:
+        assert node.header == {}
+        assert not node.check_compatibility({'encut': 500})
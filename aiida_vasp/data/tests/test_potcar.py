@@ -270,3 +270,89 @@ def test_get_poctcars_dict(potcar_family):
     potcar_dict = potcar_cls.get_potcars_dict(elements=elements, family_name=potcar_family, mapping=mapping)
     assert set(potcar_dict.keys()) == set(elements)
     assert [potcar_dict[element].full_name for element in elements] == [mapping[element] for element in elements]
+
+
+def test_get_potcars_dict_cached(potcar_family):
+    """Test that a repeated lookup is served from the in-process cache and dropped on invalidation."""
+    from aiida_vasp.data.potcar import POTCAR_LOOKUP_CACHE
+    potcar_cls = get_data_class('vasp.potcar')
+    elements = list(POTCAR_MAP.keys())
+    potcar_cls.invalidate_lookup_cache()
+    first = potcar_cls.get_potcars_dict(elements=elements, family_name=potcar_family, mapping=POTCAR_MAP)
+    assert len(POTCAR_LOOKUP_CACHE) == len(set(POTCAR_MAP.values()))
+    POTCAR_LOOKUP_CACHE.reset_stats()
+    second = potcar_cls.get_potcars_dict(elements=elements, family_name=potcar_family, mapping=POTCAR_MAP)
+    assert POTCAR_LOOKUP_CACHE.info().misses == 0
+    assert {element: potcar.uuid for element, potcar in first.items()} == {element: potcar.uuid for element, potcar in second.items()}
+    potcar_cls.invalidate_lookup_cache(family_name=potcar_family)
+    assert not POTCAR_LOOKUP_CACHE
+
+
+def test_get_potcars_dict_cached_stale(potcar_family):
+    """Test that a cached potential that no longer exists, e.g. deleted by another process, is looked up again."""
+    from uuid import uuid4
+    from aiida_vasp.data.potcar import POTCAR_LOOKUP_CACHE
+    potcar_cls = get_data_class('vasp.potcar')
+    potcar_cls.invalidate_lookup_cache()
+    POTCAR_LOOKUP_CACHE.put((potcar_family, 'In_d'), str(uuid4()))
+    potcars = potcar_cls.get_potcars_dict(elements=['In'], family_name=potcar_family, mapping={'In': 'In_d'})
+    assert potcars['In'].full_name == 'In_d'
+    assert POTCAR_LOOKUP_CACHE.get((potcar_family, 'In_d')) == potcars['In'].uuid
+
+
+def test_get_potcar_family_summaries(potcar_family):
+    """Test the aggregated family summary and its filtering."""
+    potcar_cls = get_data_class('vasp.potcar')
+    summaries = potcar_cls.get_potcar_family_summaries()
+    assert [summary.label for summary in summaries] == [potcar_family]
+    family = summaries[0]
+    assert family.num_potentials == len(potcar_cls.get_potcar_group(potcar_family).nodes)
+    assert {'In', 'As', 'Ga'}.issubset(family.elements)
+    assert 'In_d' in family.symbols
+    assert potcar_cls.get_potcar_family_summaries(filter_elements=['In', 'As'], filter_symbols='In_d')
+    assert not potcar_cls.get_potcar_family_summaries(filter_elements=['In', 'U235'])
+
+
+def test_read_potcar_files_metadata(fresh_aiida_env, monkeypatch):
+    """Ensure the metadata read in a process pool matches the attributes of a PotcarFileData node."""
+    from aiida_vasp.data import potcar as potcar_module
+    monkeypatch.setattr(potcar_module, 'POTCAR_POOL_MIN_FILES', 0)
+    file_paths = [data_path('potcar', 'As', 'POTCAR'), data_path('potcar', 'In_d', 'POTCAR')]
+    results = potcar_module.read_potcar_files_metadata(file_paths, processes=2)
+    assert [file_path for file_path, _, _ in results] == file_paths
+    for file_path, metadata, err in results:
+        assert err is None
+        file_node = get_data_node('vasp.potcar_file', file=file_path)
+        assert metadata == {key: value for key, value in file_node.attributes.items() if key != '_MODEL_VERSION'}
+
+
+def test_file_node_from_contents(fresh_aiida_env):
+    """Create a PotcarFileData node from bytes, without a file on disk."""
+    potcar_file_cls = get_data_class('vasp.potcar_file')
+    contents = read_file('potcar', 'As', 'POTCAR', mode='rb')
+    file_node = potcar_file_cls(contents=contents)
+    assert file_node.sha512 == potcar_file_cls.get_file_sha512(data_path('potcar', 'As', 'POTCAR'))
+    assert file_node.full_name == file_node.symbol
+    file_node.store()
+    assert file_node.get_content() == contents
+
+
+def test_header_attributes(fresh_aiida_env, potcar_node_pair):
+    """Values from the POTCAR header are stored as attributes of both nodes."""
+    file_node = potcar_node_pair['file']
+    pymatgen_potcar = file_node.get_pymatgen()
+    assert file_node.enmax == pymatgen_potcar.enmax
+    assert file_node.zval == pymatgen_potcar.keywords['ZVAL']
+    assert potcar_node_pair['potcar'].enmax == file_node.enmax
+    assert file_node.model_version == 2
+
+
+def test_export_family_archive_zstd(fresh_aiida_env, potcar_family, tmpdir):
+    """Test exporting to a zstd compressed archive."""
+    zstandard = pytest.importorskip('zstandard')
+    potcar_cls = get_data_class('vasp.potcar')
+    ar_path, files = potcar_cls.export_family_archive(potcar_family, path=tmpdir.join('family.tar.zst'))
+    with ar_path.open('rb') as ar_fo:
+        with zstandard.ZstdDecompressor().stream_reader(ar_fo) as tar_fo:
+            archive = tarfile.open(fileobj=tar_fo, mode='r|')
+            assert sorted(member.name for member in archive) == sorted(files)
@@ -2,8 +2,8 @@
 Unit tests for data.potcar.PotcarWalker.
 
 PotcarWalker recursively walks a directory and it's subdirectories,
-searching for POTCAR files, when it encounters a tar archive, it should be extracted to
-a folder on the same level as the archive and the extracted folder added to the search.
+searching for POTCAR files, when it encounters a tar archive, its members should be searched
+in place, as if the archive was extracted to a folder on the same level as the archive.
 """
 # pylint: disable=unused-import,unused-argument,redefined-outer-name
 import pytest
@@ -34,3 +34,5 @@ def test_find_potcars(potcar_walker_cls, temp_data_folder):
     walker.walk()
     assert len(walker.potcars) == 7
     assert not potcar_archive.exists()
+    assert not temp_data_folder.dirpath().join('pot_archive').exists()
+    assert sorted(walker.archived) == sorted(str(potcar) for potcar in walker.potcars)
@@ -0,0 +1,63 @@
+"""Test the remote references of ChargedensityData and WavefunData."""
+# pylint: disable=unused-import,unused-argument,redefined-outer-name,unused-wildcard-import,wildcard-import
+import hashlib
+
+from aiida_vasp.utils.fixtures import *
+from aiida_vasp.utils.aiida_utils import get_data_node, get_data_class, create_authinfo
+
+
+def test_from_remote(fresh_aiida_env, localhost, localhost_dir, tmpdir):
+    """Reference a CHGCAR in a remote folder, store the node and download the file again."""
+    create_authinfo(localhost, store=True)
+    remote_dir = localhost_dir.mkdir('remote')
+    contents = b'charge density'
+    remote_dir.join('CHGCAR').write_binary(contents)
+    remote_folder = get_data_node('remote', computer=localhost, remote_path=remote_dir.strpath)
+
+    chgcar = get_data_class('vasp.chargedensity').from_remote(remote_folder)
+    assert chgcar.is_remote
+    assert chgcar.remote_path == remote_dir.join('CHGCAR').strpath
+    assert chgcar.size == len(contents)
+    assert chgcar.mtime == int(remote_dir.join('CHGCAR').mtime())
+    # The checksum is only computed on request
+    assert chgcar.checksum is None
+    chgcar.store()
+    assert not chgcar.list_object_names()
+    assert chgcar.checksum is None
+    assert chgcar.compute_checksum() == hashlib.sha256(contents).hexdigest()
+    assert chgcar.get_extra('checksum') == chgcar.checksum
+    assert not chgcar.is_modified()
+
+    downloaded = tmpdir.join('CHGCAR')
+    chgcar.getfile(downloaded.strpath)
+    assert downloaded.read_binary() == contents
+
+    assert get_data_class('vasp.wavefun').from_remote(remote_folder) is None
+
+    remote_dir.join('CHGCAR').write_binary(b'another charge density')
+    assert chgcar.is_modified()
+
+
+def test_from_remote_info(fresh_aiida_env, localhost, tmpdir):
+    """Reference a WAVECAR from the info file written by the job script, without connecting to the computer."""
+    import struct
+    import subprocess
+    record_length = 1000
+    wavecar = struct.pack('<3d', record_length, 1, 45200) + b'\0' * (record_length - 24)
+    wavecar += struct.pack('<12d', 10, 20, 400., 5., 0., 0., 0., 5., 0., 0., 0., 5.) + b'\0' * 4000
+    tmpdir.join('WAVECAR').write_binary(wavecar)
+
+    wavefun_class = get_data_class('vasp.wavefun')
+    assert wavefun_class.remote_info_file() == 'WAVECAR.aiida_remote'
+    info = subprocess.check_output(['sh', '-c', wavefun_class.remote_info_command()], cwd=tmpdir.strpath)
+    wavefun = wavefun_class.from_remote_info(localhost, '/scratch/calc', info)
+    assert wavefun.remote_path == '/scratch/calc/WAVECAR'
+    assert wavefun.size == len(wavecar)
+    assert wavefun.header['nkpts'] == 10
+    assert wavefun.header['nbands'] == 20
+    assert wavefun.header['encut'] == 400.
+    wavefun.store()
+
+    # A missing file prints nothing
+    info = subprocess.check_output(['sh', '-c', wavefun_class.remote_info_command('WAVEDER')], cwd=tmpdir.strpath)
+    assert wavefun_class.from_remote_info(localhost, '/scratch/calc', info, 'WAVEDER') is None
@@ -2,12 +2,109 @@
 Representation of WAVECAR and WAVEDER files.
 
 --------------------------------------------
-Wave function data node (stores WAVECAR and WAVEDER files in the repository).
+Wave function data node (stores WAVECAR and WAVEDER files in the repository or references them in a remote folder).
 """
 # pylint: disable=abstract-method
 # explanation: pylint wrongly complains about (aiida) Node not implementing query
+import struct
+
 from aiida.orm import SinglefileData
 
+from aiida_vasp.data.header import FileHeaderMixin, lattice_problem
+from aiida_vasp.data.remote_file import RemoteFileMixin, remote_chunk_command
+
+# The record tag in the first record of a WAVECAR identifies the precision of the plane wave coefficients.
+WAVECAR_PRECISIONS = {45200: 'single', 45210: 'double', 53300: 'single', 53310: 'double'}
+
+
+class WavefunData(RemoteFileMixin, FileHeaderMixin, SinglefileData):
+    """
+    WAVECAR or WAVEDER file.
+
+    For WAVECAR files, the header attribute contains the number of spin components ('nspin'), k-points
+    ('nkpts') and bands ('nbands'), the plane wave cutoff ('encut'), the 'lattice' and the 'precision'.
+    """
+
+    _DEFAULT_FILENAME = 'WAVECAR'
+
+    @staticmethod
+    def read_header(read_bytes):
+        return read_wavecar_header(read_bytes)
+
+    @classmethod
+    def _remote_header_commands(cls, path):
+        if 'WAVEDER' in path.upper():
+            return []
+        # The first record holds the record length, the second record starts after one record length
+        return [
+            remote_chunk_command(path, 0, 24),
+            "record_length=$(od -A n -t f8 -N 8 {} | awk '{{printf \"%d\", $1}}')".format(path),
+            remote_chunk_command(path, '$record_length', 96)
+        ]
+
+    def set_header(self, read_bytes):
+        if 'WAVEDER' in (self.get_attribute('filename', None) or '').upper():
+            # WAVEDER files do not have a WAVECAR header
+            self.set_attribute('header', {})
+            return
+        super(WavefunData, self).set_header(read_bytes)
+
+    def check_compatibility(self, parameters, structure=None, kpoints=None):
+        """
+        Check the WAVECAR against the plane wave cutoff, the dimensions of the calculation and the structure.
+
+        ISPIN and NBANDS are compared if they are given, the number of k-points only for an explicit list of k-points,
+        as VASP reduces a mesh by symmetry.
+        """
+        problems = []
+        header = self.header
+        wavecar_encut = header.get('encut')
+        encut = parameters.get('encut')
+        if wavecar_encut is not None and encut is not None and abs(float(encut) - wavecar_encut) > 1e-3:
+            problems.append('ENCUT = {} differs from the {} the WAVECAR was written with'.format(encut, wavecar_encut))
+        for key, header_key in [('ispin', 'nspin'), ('nbands', 'nbands')]:
+            value = parameters.get(key)
+            if header.get(header_key) is not None and value is not None and int(value) != header[header_key]:
+                problems.append('{} = {} differs from the {} the WAVECAR was written with'.format(key.upper(), value, header[header_key]))
+        num_kpoints = _explicit_kpoints_count(kpoints)
+        if header.get('nkpts') is not None and num_kpoints is not None and num_kpoints != header['nkpts']:
+            problems.append('the WAVECAR is for {} k-points, the calculation has {}'.format(header['nkpts'], num_kpoints))
+        problem = lattice_problem('WAVECAR', header.get('lattice'), parameters, structure)
+        if problem:
+            problems.append(problem)
+        return problems
+
+
+def _explicit_kpoints_count(kpoints):
+    """Return the number of explicitly listed k-points, None for a mesh or no k-points."""
+    if kpoints is None:
+        return None
+    try:
+        return len(kpoints.get_kpoints())
+    except AttributeError:
+        return None
+
+
+def read_wavecar_header(read_bytes):
+    """
+    Read the header records of a (binary) WAVECAR file.
+
+    :param read_bytes: callable, ``read_bytes(offset, size)`` returns at most size bytes of the file starting at offset.
 
-class WavefunData(SinglefileData):
-    pass
+    The first record contains the record length, the number of spin components and the precision tag,
+    the second record (starting after one record length) the number of k-points and bands, the cutoff and the lattice.
+    """
+    record_length, nspin, tag = struct.unpack('<3d', read_bytes(0, 24))
+    if record_length <= 0 or record_length != int(record_length) or nspin not in [1, 2] or tag not in WAVECAR_PRECISIONS:
+        raise ValueError('not a WAVECAR file')
+    values = struct.unpack('<12d', read_bytes(int(record_length), 96))
+    nkpts, nbands, encut = values[:3]
+    lattice = [list(values[3:6]), list(values[6:9]), list(values[9:12])]
+    return {
+        'nspin': int(nspin),
+        'nkpts': int(nkpts),
+        'nbands': int(nbands),
+        'encut': encut,
+        'lattice': lattice,
+        'precision': WAVECAR_PRECISIONS[int(tag)]
+    }
@@ -16,6 +16,7 @@ class BaseParser(Parser):
         super(BaseParser, self).__init__(node)
         self.retrieved_content = None
         self.retrieved_temporary = None
+        self._file_handlers = []
 
     def parse(self, **kwargs):
         """Check the folders and set the retrieved_content for use in extending parsers."""
@@ -72,6 +73,9 @@ class BaseParser(Parser):
         """
         Convenient access to retrieved and retrieved_temporary files.
 
+        Prefer ``get_file_handler``, depending on the repository backend, resolving the path of a
+        permanently retrieved file might require a temporary copy of it.
+
         :param fname: name of the file
         :return: absolute path to the retrieved file
         """
@@ -97,3 +101,38 @@ class BaseParser(Parser):
                     return None
         except KeyError:
             return None
+
+    def get_file_handler(self, fname, mode='r'):
+        """
+        Open a retrieved or retrieved_temporary file for reading.
+
+        Permanently retrieved files are opened directly from the repository, retrieved_temporary files
+        from the folder on disk, so the content is never copied before parsing. The handlers stay open
+        until ``close_file_handlers`` is called.
+
+        :param fname: name of the file
+        :param mode: the mode to open the file with, e.g. 'r' or 'rb'
+        :return: an open, seekable file object or None if the file was not retrieved
+        """
+
+        try:
+            status = self.retrieved_content[fname]['status']
+        except KeyError:
+            return None
+
+        try:
+            if status == 'permanent':
+                handler = self.retrieved.open(fname, mode=mode)
+            else:
+                handler = open(os.path.join(self.retrieved_content[fname]['path'], fname), mode)
+        except OSError:
+            self.logger.warning(fname + ' not found in retrieved' + ('' if status == 'permanent' else '_temporary'))
+            return None
+
+        self._file_handlers.append(handler)
+        return handler
+
+    def close_file_handlers(self):
+        """Close all file handlers opened with ``get_file_handler``."""
+        while self._file_handlers:
+            self._file_handlers.pop().close()
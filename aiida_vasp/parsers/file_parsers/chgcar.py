@@ -20,6 +20,8 @@ class ChgcarParser(BaseFileParser):
         },
     }
 
+    OPEN_MODE = 'rb'
+
     def __init__(self, *args, **kwargs):
         super(ChgcarParser, self).__init__(*args, **kwargs)
         self._chgcar = None
@@ -30,7 +32,11 @@ class ChgcarParser(BaseFileParser):
         result = inputs
         result = {}
 
+        # Either the path or the open file object, the node will copy directly from it.
         chgcar = self._data_obj.path
+        if chgcar is None and self._data_obj.handler is not None:
+            chgcar = self._data_obj.handler
+            chgcar.seek(0)
         if chgcar is None:
             return {'chgcar': None}
 
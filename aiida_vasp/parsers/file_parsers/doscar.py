@@ -67,7 +67,7 @@ class DosParser(BaseFileParser):
     def _read_doscar(self):
         """Read a VASP DOSCAR file and extract metadata and a density of states data array."""
 
-        with open(self._data_obj.path) as dos:
+        with self._data_obj.open() as dos:
             num_ions, num_atoms, p00, p01 = self.line(dos, int)
             line_0 = self.line(dos, float)
             line_1 = self.line(dos, float)
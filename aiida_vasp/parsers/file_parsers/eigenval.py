@@ -53,7 +53,7 @@ class EigParser(BaseFileParser):
     def _read_eigenval(self):
         """Parse a VASP EIGENVAL file and extract metadata and a band structure data array."""
 
-        with open(self._data_obj.path) as eig:
+        with self._data_obj.open() as eig:
             line_0 = self.line(eig, int)  # read header
             line_1 = self.line(eig, float)  # "
             line_2 = self.line(eig, float)  # "
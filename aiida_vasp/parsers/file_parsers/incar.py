@@ -69,7 +69,8 @@ class IncarParser(BaseFileParser):
             return {'incar': self._data_obj}
 
         try:
-            incar = Incar(file_path=self._data_obj.path, logger=self._logger)
+            with self._data_obj.open() as handler:
+                incar = Incar(file_handler=handler, logger=self._logger)
         except SystemExit:
             self._logger.warning('Parsevasp exitited abnormally. Returning None.')
             return {'incar': None}
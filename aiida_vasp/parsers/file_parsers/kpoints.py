@@ -95,7 +95,8 @@ class KpointsParser(BaseFileParser):
             return {'kpoints-kpoints': self._data_obj}
 
         try:
-            parsed_kpoints = Kpoints(file_path=self._data_obj.path, logger=self._logger)
+            with self._data_obj.open() as handler:
+                parsed_kpoints = Kpoints(file_handler=handler, logger=self._logger)
         except SystemExit:
             self._logger.warning('Parsevasp exitited abnormally. Returning None.')
             return {'kpoints-kpoints': None}
@@ -52,23 +52,31 @@ class OutcarParser(BaseFileParser):
 
     def _init_with_file_path(self, path):
         """Init with a filepath."""
+        self._init_with_single_file(SingleFile(path=path))
+
+    def _init_with_file_handler(self, handler):
+        """Init with an open file object."""
+        self._init_with_single_file(SingleFile(handler=handler))
+
+    def _init_with_data(self, data):
+        """Init with SingleFileData."""
+        self._init_with_single_file(SingleFile(data=data))
+
+    def _init_with_single_file(self, single_file):
+        """Init with a SingleFile and parse it."""
         self._parsed_data = {}
         self.parsable_items = self.__class__.PARSABLE_ITEMS
-        self._data_obj = SingleFile(path=path)
+        self._data_obj = single_file
 
         # Since OUTCAR can be fairly large, we will parse it only
         # once and store the parsevasp Outcar object.
         try:
-            self._outcar = Outcar(file_path=path, logger=self._logger)
+            with self._data_obj.open() as handler:
+                self._outcar = Outcar(file_handler=handler, logger=self._logger)
         except SystemExit:
             self._logger.warning('Parsevasp exited abruptly. Returning None.')
             self._outcar = None
 
-    def _init_with_data(self, data):
-        """Init with SingleFileData."""
-        self.parsable_items = self.__class__.PARSABLE_ITEMS
-        self._init_with_file_path(data.get_file_abs_path())
-
     def _parse_file(self, inputs):
 
         # Since all quantities will be returned by properties, we can't pass
@@ -192,7 +200,7 @@ class LegacyOutcarParser(BaseFileParser):
         energy_free = []
         energy_zero = []
         symmetries = {}
-        with open(self._data_obj.path, 'r') as outcar_file_object:
+        with self._data_obj.open() as outcar_file_object:
             for line in outcar_file_object:
                 # volume
                 if line.rfind('volume of cell :') > -1:
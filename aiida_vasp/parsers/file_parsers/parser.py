@@ -5,6 +5,8 @@ Base classes for the VASP file parsers.
 Contains the base classes for the VASP file parsers.
 """
 import re
+from contextlib import contextmanager
+
 from aiida.common import AIIDA_LOGGER as aiidalogger
 from aiida_vasp.utils.delegates import delegate_method_kwargs
 
@@ -59,6 +61,9 @@ class BaseFileParser(BaseParser):
         :param calc_parser_cls: Python class, optional, class of the calling CalculationParser instance
 
         :keyword file_path: Initialise with a path to a file. The file will be parsed by the FileParser
+        :keyword file_handler: Initialise with an open, seekable file object (e.g. an object opened directly from
+                               the repository of the retrieved folder). The file will be parsed from the handler
+                               without writing it to disk first.
         :keyword data: Initialise with an aiida data object. This may be SingleFileData, KpointsData or StructureData.
 
     Additional keyword arguments might be defined by the inheriting classes.
@@ -70,6 +75,8 @@ class BaseFileParser(BaseParser):
     """
 
     PARSABLE_ITEMS = {}
+    # The mode the VaspParser should use when opening the file for this FileParser.
+    OPEN_MODE = 'r'
 
     def __init__(self, calc_parser_cls=None, **kwargs):  # pylint: disable=unused-argument
         super(BaseFileParser, self).__init__()
@@ -95,6 +102,12 @@ class BaseFileParser(BaseParser):
         self.parsable_items = self.__class__.PARSABLE_ITEMS
         self._parsed_data = {}
 
+    def _init_with_file_handler(self, handler):
+        """Init with an open file object."""
+        self._data_obj = SingleFile(handler=handler)
+        self.parsable_items = self.__class__.PARSABLE_ITEMS
+        self._parsed_data = {}
+
     def _init_with_data(self, data):
         """
         Init with aiida-data.
@@ -178,12 +191,17 @@ class SingleFile(object):  # pylint: disable=useless-object-inheritance
     """
     Datastructure for a singleFile file providing a write method.
 
+    The file can be given as a path, as an open file object or as SingleFileData. Regardless
+    of how it was given, ``open`` provides a file object to read from, so that file parsers
+    do not have to materialise the content on disk.
+
     This should get replaced, as soon as parsevasp has a dedicated class.
     """
 
     def __init__(self, **kwargs):
         super(SingleFile, self).__init__()
         self._path = None
+        self._handler = None
         self._data = None
         self.init_with_kwargs(**kwargs)
 
@@ -194,6 +212,9 @@ class SingleFile(object):  # pylint: disable=useless-object-inheritance
     def _init_with_path(self, path):
         self._path = path
 
+    def _init_with_handler(self, handler):
+        self._handler = handler
+
     def _init_with_data(self, data):
         """Initialise with SingleFileData."""
         self._data = data
@@ -202,17 +223,45 @@ class SingleFile(object):  # pylint: disable=useless-object-inheritance
     def path(self):
         return self._path
 
+    @property
+    def handler(self):
+        return self._handler
+
+    @contextmanager
+    def open(self, mode='r'):
+        """
+        Open the file for reading.
+
+        If initialised with a file object, it is rewound and yielded as is and will not be closed
+        on exit, its owner is responsible for that. Otherwise the path or the SingleFileData is opened
+        with the given mode.
+        """
+        if self._handler is not None:
+            self._handler.seek(0)
+            yield self._handler
+        elif self._path is not None:
+            with open(self._path, mode) as handler:
+                yield handler
+        elif self._data is not None:
+            with self._data.open(mode=mode) as handler:
+                yield handler
+        else:
+            yield None
+
     def write(self, dst):
         """Copy file to destination."""
+        import shutil
+
         if self._path is not None:
-            import shutil
             shutil.copyfile(self._path, dst)
             return
 
-        if self._data is not None:
-            with self._data.open() as input_obj, open(dst) as output_obj:
-                lines = input_obj.readlines()
-                output_obj.writelines(lines)
+        if self._handler is not None or self._data is not None:
+            with self.open(mode='rb') as input_obj:
+                # A handler might have been opened in text mode by its owner
+                dst_mode = 'wb' if 'b' in getattr(input_obj, 'mode', 'b') else 'w'
+                with open(dst, dst_mode) as output_obj:
+                    shutil.copyfileobj(input_obj, output_obj)
 
 
 class KeyValueParser(BaseParser):
@@ -5,6 +5,8 @@ POSCAR parser.
 The file parser that handles the parsing of POSCAR and CONTCAR files.
 """
 # pylint: disable=no-self-use
+from itertools import groupby
+
 import numpy as np
 
 from parsevasp.poscar import Poscar, Site
@@ -87,9 +89,19 @@ class PoscarParser(BaseFileParser):
         if isinstance(self._data_obj, get_data_class('structure')):
             return {'poscar-structure': self._data_obj}
 
-        # pass file path to parsevasp and try to load file
+        # read the arrays directly if possible, this covers any POSCAR / CONTCAR written by VASP 5 and later
+        try:
+            with self._data_obj.open() as handler:
+                result = read_poscar(handler)
+        except (ValueError, IndexError):
+            result = None
+        if result is not None:
+            return {'poscar-structure': result}
+
+        # otherwise pass the file handler to parsevasp and try to load file
         try:
-            poscar = Poscar(file_path=self._data_obj.path, prec=self.precision, conserve_order=True, logger=self._logger)
+            with self._data_obj.open() as handler:
+                poscar = Poscar(file_handler=handler, prec=self.precision, conserve_order=True, logger=self._logger)
         except SystemExit:
             self._logger.warning('Parsevasp exited abnormally. ' 'Returning None.')
             return {'poscar-structure': None}
@@ -98,6 +110,19 @@ class PoscarParser(BaseFileParser):
 
         return result
 
+    def write(self, file_path):
+        """
+        Write the POSCAR.
+
+        If initialised with StructureData, the file is rendered directly from its arrays by
+        ``structure_to_poscar``, otherwise the file is written by parsevasp.
+        """
+        if isinstance(self._data_obj, get_data_class('structure')):
+            with open(file_path, 'w') as handler:
+                handler.write(structure_to_poscar(self._data_obj, self.precision))
+            return
+        super(PoscarParser, self).write(file_path)
+
     @property
     def structure(self):
         if self._structure is None:
@@ -121,6 +146,104 @@ class PoscarParser(BaseFileParser):
         return dictionary
 
 
+def structure_to_poscar(structure, precision=12):
+    """
+    Render an Aiida StructureData as the text of a POSCAR file in direct coordinates.
+
+    The output is identical to the one of parsevasp's Poscar (with conserve_order=True), but all
+    positions are converted and formatted in bulk instead of going through a Site object per atom.
+    Consecutive sites of the same kind are grouped, like in ``MultiPotcarIo.count_kinds``.
+    """
+    width = precision + 4
+    cell = np.asarray(structure.cell)
+    kind_names = [site.kind_name.lower() for site in structure.sites]
+    positions = np.array([site.position for site in structure.sites], dtype=float).reshape(-1, 3)
+    direct = np.dot(positions, np.linalg.inv(cell))
+
+    species = []
+    num_species = []
+    for kind_name, group in groupby(kind_names):
+        species.append(kind_name.capitalize())
+        num_species.append(sum(1 for _ in group))
+
+    compound = 'Compound: ' + ''.join(specie + (str(num) if num != 1 else '') for specie, num in zip(species, num_species)) + '.'
+    comment = structure.label or structure.get_formula()
+    if compound not in comment:
+        comment = compound + ' Old comment: ' + comment
+
+    float_format = '%{}.{}f'.format(width, precision)
+    vector_format = ' '.join([float_format] * 3) + '\n'
+    lines = ['# ' + comment + '\n', float_format % 1.0 + '\n']
+    lines.append((vector_format * 3) % tuple(cell.ravel().tolist()))
+    lines.append(' '.join('{:5s}'.format(specie) for specie in species).rstrip() + '\n')
+    lines.append(' '.join('{:5d}'.format(num) for num in num_species).rstrip() + '\n')
+    lines.append('Direct\n')
+    lines.append((vector_format * len(direct)) % tuple(direct.ravel().tolist()))
+    return ''.join(lines)
+
+
+def read_poscar(handler):
+    """
+    Read the structure from a POSCAR / CONTCAR file into arrays in one pass.
+
+    :param handler: an open file object.
+    :return: a dict with the 'comment', the 'unitcell', the cartesian 'positions' and the 'symbols' and
+        'kind_names' of all sites, as expected by ``NodeComposer``, or None for files without a species line
+        (VASP 4 format) or with a negative scaling factor, which are left to parsevasp.
+
+    Kind names and symbols follow ``parsevasp_to_aiida``, but are determined once per species.
+    """
+    lines = handler.read()
+    if isinstance(lines, bytes):
+        lines = lines.decode()
+    lines = lines.splitlines()
+
+    scaling = float(lines[1].split()[0])
+    species = lines[5].split()
+    if scaling < 0.0 or not species or any(_is_number(specie) for specie in species):
+        return None
+    unitcell = scaling * np.array([line.split()[:3] for line in lines[2:5]], dtype=float)
+    counts = [int(count) for count in lines[6].split()]
+
+    coordinates_start = 8
+    if lines[7].strip()[:1].lower() == 's':
+        # selective dynamics
+        coordinates_start = 9
+    cartesian = lines[coordinates_start - 1].strip()[:1].lower() in ['c', 'k']
+    num_sites = sum(counts)
+    coordinates = np.array([line.split()[:3] for line in lines[coordinates_start:coordinates_start + num_sites]], dtype=float)
+    if coordinates.shape != (num_sites, 3):
+        raise ValueError('The POSCAR contains less positions than the {} given by the species counts.'.format(num_sites))
+    positions = scaling * coordinates if cartesian else np.dot(coordinates, unitcell)
+
+    symbols = fetch_symbols_from_elements(elements)
+    site_symbols = []
+    site_kind_names = []
+    for specie, count in zip(species, counts):
+        kind_name = specie.capitalize()
+        symbol = kind_name.split('_')[0].capitalize()
+        if symbol not in symbols:
+            symbol = 'X'
+        site_symbols.extend([symbol] * count)
+        site_kind_names.extend([kind_name] * count)
+
+    return {
+        'comment': lines[0].replace('#', '').strip(),
+        'unitcell': unitcell,
+        'positions': positions,
+        'symbols': site_symbols,
+        'kind_names': site_kind_names
+    }
+
+
+def _is_number(string):
+    try:
+        float(string)
+    except ValueError:
+        return False
+    return True
+
+
 def parsevasp_to_aiida(poscar):
     """
     Parsevasp to Aiida conversion.
@@ -137,6 +260,7 @@ def parsevasp_to_aiida(poscar):
     # generate Aiida StructureData and add results from the loaded file
     result = {}
 
+    symbols = fetch_symbols_from_elements(elements)
     for site in poscar_dict['sites']:
         specie = site['specie']
         # user can specify whatever they want for the elements, but
@@ -146,9 +270,7 @@ def parsevasp_to_aiida(poscar):
         # strip trailing _ in case user specifies potential
         symbol = specie.split('_')[0].capitalize()
         # check if leading entry is part of
-        # aiida.common.constants.elements{}, otherwise set to X, but first
-        # invert
-        symbols = fetch_symbols_from_elements(elements)
+        # aiida.common.constants.elements{}, otherwise set to X
         try:
             symbols[symbol]
         except KeyError:
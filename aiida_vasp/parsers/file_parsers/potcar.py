@@ -9,9 +9,34 @@ from itertools import groupby
 import re
 
 from py import path as py_path  # pylint: disable=no-name-in-module,no-member
+from pymatgen.io.vasp import PotcarSingle
 
 from aiida_vasp.utils.aiida_utils import get_data_class
 from aiida_vasp.utils.delegates import delegate_method_kwargs
+from aiida_vasp.utils.lru_cache import LRUCache
+
+# Contents of POTCAR files, keyed by the sha512 of a single POTCAR or by the ordered
+# tuple of sha512s for concatenated POTCARs. The contents belonging to a sha512 never
+# change, so entries only have to be invalidated to free memory or after migrating nodes.
+POTCAR_CONTENT_CACHE = LRUCache(maxsize=256)
+
+
+def potcar_cache_info():
+    """Return the hits, misses, maxsize and current size of the POTCAR content cache."""
+    return POTCAR_CONTENT_CACHE.info()
+
+
+def invalidate_potcar_cache(sha512=None):
+    """
+    Invalidate cached POTCAR contents.
+
+    :param sha512: only drop the entries containing the POTCAR with this sha512,
+        if not given, clear the whole cache.
+    """
+    if sha512 is None:
+        POTCAR_CONTENT_CACHE.invalidate()
+        return
+    POTCAR_CONTENT_CACHE.invalidate_where(lambda key: key == sha512 or (isinstance(key, tuple) and sha512 in key))
 
 
 class PotcarIo(object):  # pylint: disable=useless-object-inheritance
@@ -31,6 +56,7 @@ class PotcarIo(object):  # pylint: disable=useless-object-inheritance
         """Init from Potcar object or delegate to kwargs initializers."""
         self.potcar_obj = None
         self.sha512 = None
+        self._node = None
         self.init_with_kwargs(**kwargs)
 
     @delegate_method_kwargs(prefix='_init_with_')
@@ -48,7 +74,9 @@ class PotcarIo(object):  # pylint: disable=useless-object-inheritance
 
     def _init_with_potcar_node(self, node):
         """Initialize with an existing potential node."""
-        self._init_with_potcar_file_node(node.find_file_node())
+        # The PotcarData node carries the sha512 of its file node, no need to query for it.
+        self.sha512 = node.sha512
+        self._node = node
 
     def _init_with_contents(self, contents):
         """Initialize with a string."""
@@ -62,20 +90,35 @@ class PotcarIo(object):  # pylint: disable=useless-object-inheritance
     @property
     def pymatgen(self):
         if not self.potcar_obj:
-            self.potcar_obj = self.file_node.get_pymatgen()
+            self.potcar_obj = PotcarSingle(self.content)
         return self.potcar_obj
 
     @property
     def file_node(self):
-        return get_data_class('vasp.potcar').find_one(sha512=self.sha512).find_file_node()
+        return self.node.find_file_node()
 
     @property
     def node(self):
-        return get_data_class('vasp.potcar').find_one(sha512=self.sha512)
+        if self._node is None:
+            self._node = get_data_class('vasp.potcar').find_one(sha512=self.sha512)
+        return self._node
+
+    @property
+    def enmax(self):
+        """ENMAX of the potential, from the node attributes if it was recorded at upload, otherwise parsed from the file."""
+        enmax = self.node.enmax
+        if enmax is None:
+            enmax = self.pymatgen.enmax
+        return enmax
 
     @property
     def content(self):
-        return self.file_node.get_content()
+        """The contents of the POTCAR file, served from ``POTCAR_CONTENT_CACHE`` if possible."""
+        content = POTCAR_CONTENT_CACHE.get(self.sha512)
+        if content is None:
+            content = self.file_node.get_content()
+            POTCAR_CONTENT_CACHE.put(self.sha512, content)
+        return content
 
     @classmethod
     def from_(cls, potcar):
@@ -114,8 +157,13 @@ class MultiPotcarIo(object):  # pylint: disable=useless-object-inheritance
     def write(self, path):
         path = py_path.local(path)
         with path.open('wb') as dest_fo:
-            for potcar in self._potcars:
-                dest_fo.write(potcar.content)
+            dest_fo.write(self.content)
+
+    @property
+    def content(self):
+        """The concatenated contents of all POTCAR files, served from ``POTCAR_CONTENT_CACHE`` if possible."""
+        key = tuple(potcar.sha512 for potcar in self._potcars)
+        return POTCAR_CONTENT_CACHE.get_or_compute(key, lambda: b''.join(potcar.content for potcar in self._potcars))
 
     @classmethod
     def read(cls, path):
@@ -176,4 +224,4 @@ class MultiPotcarIo(object):  # pylint: disable=useless-object-inheritance
 
     @property
     def max_enmax(self):
-        return max([potcario.pymatgen.enmax for potcario in self.potcars])
+        return max([potcario.enmax for potcario in self.potcars])
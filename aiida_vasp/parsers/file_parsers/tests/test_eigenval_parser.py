@@ -19,3 +19,12 @@ def test_parse_eigenval():
 
     result = parser.get_quantity('eigenval-eigenvalues', inputs)
     assert result['eigenval-eigenvalues'].all() == bands.all()
+
+
+def test_parse_eigenval_handler():
+    """Parse a reference EIGENVAL file from an open file object."""
+    path = data_path('eigenval', 'EIGENVAL')
+    with open(path) as handler:
+        parser = EigParser(file_handler=handler)
+        result = parser.get_quantity('eigenval-eigenvalues', {})
+    assert result['eigenval-eigenvalues'].shape == (1, 1, 10)
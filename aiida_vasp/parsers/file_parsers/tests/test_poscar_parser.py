@@ -154,6 +154,51 @@ def test_parse_poscar_undercase(fresh_aiida_env, vasp_structure, tmpdir):
     assert symbols == set(['As', 'In'])
 
 
+def test_read_poscar_arrays(fresh_aiida_env):
+    """Read a POSCAR into arrays, the result is the same as the one obtained through parsevasp."""
+    import numpy as np
+    from parsevasp.poscar import Poscar
+    from aiida_vasp.parsers.file_parsers.poscar import read_poscar, parsevasp_to_aiida
+
+    path = data_path('poscar', 'POSCARSILLY')
+    with open(path) as handler:
+        result = read_poscar(handler)
+    reference = parsevasp_to_aiida(Poscar(file_path=path, prec=12, conserve_order=True))['poscar-structure']
+
+    assert np.all(result['unitcell'] == reference['unitcell'])
+    assert np.all(result['positions'] == np.array([site['position'] for site in reference['sites']]))
+    assert result['kind_names'] == [site['kind_name'] for site in reference['sites']]
+    assert result['symbols'] == [site['symbol'] for site in reference['sites']]
+
+
+def test_read_poscar_cartesian_selective(fresh_aiida_env):
+    """Read a scaled POSCAR with selective dynamics and cartesian positions."""
+    from io import StringIO
+    from aiida_vasp.parsers.file_parsers.poscar import read_poscar
+
+    poscar = StringIO(u'comment\n2.0\n2.0 0.0 0.0\n0.0 2.0 0.0\n0.0 0.0 2.0\nIn_d As\n1 1\n'
+                      u'Selective dynamics\nCartesian\n0.0 0.0 0.0 T T F\n1.0 1.0 1.0 F F F\n')
+    result = read_poscar(poscar)
+    assert result['unitcell'].tolist() == [[4.0, 0.0, 0.0], [0.0, 4.0, 0.0], [0.0, 0.0, 4.0]]
+    assert result['positions'].tolist() == [[0.0, 0.0, 0.0], [2.0, 2.0, 2.0]]
+    assert result['kind_names'] == ['In_d', 'As']
+    assert result['symbols'] == ['In', 'As']
+
+
+@pytest.mark.parametrize(['vasp_structure'], [('str',), ('str-InAs',)], indirect=True)
+def test_write_identical_to_parsevasp(fresh_aiida_env, vasp_structure, tmpdir):
+    """The POSCAR rendered directly from the StructureData is identical to the one written by parsevasp."""
+    parser = PoscarParser(data=vasp_structure, precision=10)
+
+    temp_file = str(tmpdir.join('POSCAR'))
+    parser.write(temp_file)
+    reference_file = str(tmpdir.join('POSCAR.parsevasp'))
+    parser._parsed_object.write(reference_file)  # pylint: disable=protected-access
+
+    with open(temp_file) as poscar, open(reference_file) as reference:
+        assert poscar.read() == reference.read()
+
+
 @pytest.mark.parametrize(['vasp_structure'], [('str-Al',)], indirect=True)
 def test_consistency_with_parsevasp(fresh_aiida_env, vasp_structure):
     """
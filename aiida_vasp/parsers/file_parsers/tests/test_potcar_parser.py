@@ -79,3 +79,18 @@ def test_multi_from_structure(potcar_family, vasp_structure_poscar):
     potcar_dict = potcar_cls.get_potcars_dict(elements=['As', 'In', 'In_d'], family_name=potcar_family, mapping=POTCAR_MAP)
     multi = MultiPotcarIo.from_structure(structure=vasp_structure_poscar.data_obj, potentials_dict=potcar_dict)
     assert [potcar.node.full_name for potcar in multi.potcars] == ['In_sv', 'As', 'In_d', 'As']
+
+
+def test_content_cache(potcar_family):
+    """Writing the same potentials twice is served from the POTCAR content cache."""
+    from aiida_vasp.parsers.file_parsers.potcar import potcar_cache_info, invalidate_potcar_cache
+    invalidate_potcar_cache()
+    potcar_cls = get_data_class('vasp.potcar')
+    potcars = potcar_cls.get_potcars_dict(elements=POTCAR_MAP.keys(), family_name=potcar_family, mapping=POTCAR_MAP).values()
+    first = MultiPotcarIo(potcars).content
+    hits = potcar_cache_info().hits
+    second = MultiPotcarIo(potcars).content
+    assert first == second
+    assert potcar_cache_info().hits == hits + 1
+    invalidate_potcar_cache(MultiPotcarIo(potcars).potcars[0].sha512)
+    assert potcar_cache_info().currsize == len(potcars) - 1
@@ -587,3 +587,31 @@ def test_dynmat_result(fresh_aiida_env, vasprun_parser):
     ]))
     assert dyneig[0] == -1.36621537e+00
     assert dyneig[4] == -8.48939361e-01
+
+
+def test_band_properties():
+    """Find the band gap and band edges from eigenvalues and occupancies with dimensions (spin, k-point, band)."""
+    from aiida_vasp.parsers.file_parsers.vasprun import _band_properties
+    occupancies = [[[1., 1., 0., 0.], [1., 1., 0., 0.]]]
+    # indirect gap, the VBM is at the first and the CBM at the second k-point
+    eigenvalues = [[[-2., 1., 3., 4.], [-3., 0.5, 2., 5.]]]
+    properties = _band_properties(eigenvalues, occupancies, 1.2)
+    assert properties == {'band_gap': 1.0, 'vbm': 1.0, 'cbm': 2.0, 'is_direct_gap': False, 'fermi_level': 1.2}
+    # direct gap at the first k-point
+    eigenvalues = [[[-2., 1., 1.5, 4.], [-3., 0.5, 2., 5.]]]
+    properties = _band_properties(eigenvalues, occupancies, 1.2)
+    assert properties['band_gap'] == 0.5
+    assert properties['is_direct_gap']
+    # overlapping bands
+    eigenvalues = [[[-2., 1., 3., 4.], [-3., 3.5, 0.5, 5.]]]
+    properties = _band_properties(eigenvalues, occupancies, 1.2)
+    assert properties['band_gap'] == 0.0
+    assert not properties['is_direct_gap']
+    # metal, the second band crosses the Fermi level
+    eigenvalues = [[[-2., -0.1, 3., 4.], [-3., 0.2, 2., 5.]]]
+    properties = _band_properties(eigenvalues, [[[1., 1., 0., 0.], [1., 0., 0., 0.]]], 0.0)
+    assert properties['band_gap'] == 0.0
+    assert not properties['is_direct_gap']
+    # all bands occupied
+    properties = _band_properties(eigenvalues, np.ones((1, 2, 4)), 1.2)
+    assert properties['band_gap'] is None
@@ -15,7 +15,8 @@ from aiida_vasp.parsers.file_parsers.parser import BaseFileParser, SingleFile
 DEFAULT_OPTIONS = {
     'quantities_to_parse': [
         'structure', 'eigenvalues', 'dos', 'bands', 'kpoints', 'occupancies', 'trajectory', 'energies', 'projectors', 'dielectrics',
-        'born_charges', 'hessian', 'dynmat', 'forces', 'stress', 'total_energies', 'maximum_force', 'maximum_stress'
+        'born_charges', 'hessian', 'dynmat', 'forces', 'stress', 'total_energies', 'maximum_force', 'maximum_stress',
+        'band_properties'
     ],
     'energy_type': ['energy_no_entropy']
 }
@@ -119,8 +120,15 @@ class VasprunParser(BaseFileParser):
             'name': 'maximum_stress',
             'prerequisites': []
         },
+        'band_properties': {
+            'inputs': [],
+            'name': 'band_properties',
+            'prerequisites': []
+        },
     }
 
+    OPEN_MODE = 'rb'
+
     def __init__(self, *args, **kwargs):
         super(VasprunParser, self).__init__(*args, **kwargs)
         self._xml = None
@@ -128,23 +136,31 @@ class VasprunParser(BaseFileParser):
 
     def _init_with_file_path(self, path):
         """Init with a filepath."""
+        self._init_with_single_file(SingleFile(path=path))
+
+    def _init_with_file_handler(self, handler):
+        """Init with an open file object."""
+        self._init_with_single_file(SingleFile(handler=handler))
+
+    def _init_with_data(self, data):
+        """Init with SingleFileData."""
+        self._init_with_single_file(SingleFile(data=data))
+
+    def _init_with_single_file(self, single_file):
+        """Init with a SingleFile and parse it."""
         self._parsed_data = {}
         self.parsable_items = self.__class__.PARSABLE_ITEMS
-        self._data_obj = SingleFile(path=path)
+        self._data_obj = single_file
 
         # Since vasprun.xml can be fairly large, we will parse it only
         # once and store the parsevasp Xml object.
         try:
-            self._xml = Xml(file_path=path, k_before_band=True, logger=self._logger)
+            with self._data_obj.open(mode=self.OPEN_MODE) as handler:
+                self._xml = Xml(file_handler=handler, k_before_band=True, logger=self._logger)
         except SystemExit:
             self._logger.warning('Parsevasp exited abruptly. Returning None.')
             self._xml = None
 
-    def _init_with_data(self, data):
-        """Init with SingleFileData."""
-        self.parsable_items = self.__class__.PARSABLE_ITEMS
-        self._init_with_file_path(data.get_file_abs_path())
-
     def _parse_file(self, inputs):
 
         # Since all quantities will be returned by properties, we can't pass
@@ -614,24 +630,71 @@ class VasprunParser(BaseFileParser):
 
         return self._xml.get_fermi_level()
 
+    @property
+    def band_properties(self):
+        """Fetch the band gap, the band edges and the Fermi level, without storing the bands."""
+
+        eigenvalues = self._xml.get_eigenvalues()
+        occupancies = self._xml.get_occupancies()
+        if eigenvalues is None or occupancies is None:
+            return None
+        spins = ['total'] if eigenvalues.get('total') is not None else ['up', 'down']
+        if any(eigenvalues.get(spin) is None or occupancies.get(spin) is None for spin in spins):
+            return None
+
+        return _band_properties([eigenvalues[spin] for spin in spins], [occupancies[spin] for spin in spins], self.fermi_level)
+
 
 def _build_structure(lattice):
     """Builds a structure according to AiiDA spec."""
     structure_dict = {}
     structure_dict['unitcell'] = lattice['unitcell']
-    structure_dict['sites'] = []
+    structure_dict['positions'] = np.dot(lattice['positions'], lattice['unitcell'])
 
     # AiiDA wants the species as symbols, so invert
     elements = _invert_dict(parsevaspct.elements)
-    for pos, specie in zip(lattice['positions'], lattice['species']):
-        site = {}
-        site['position'] = np.dot(pos, lattice['unitcell'])
-        site['symbol'] = elements[specie].title()
-        site['kind_name'] = elements[specie].title()
-        structure_dict['sites'].append(site)
+    structure_dict['symbols'] = [elements[specie].title() for specie in lattice['species']]
+    structure_dict['kind_names'] = list(structure_dict['symbols'])
 
     return structure_dict
 
 
+def _band_properties(eigenvalues, occupancies, fermi_level, occupation_threshold=0.5):
+    """
+    Find the band gap and the band edges.
+
+    :param eigenvalues: the eigenvalues with dimensions (spin, k-point, band).
+    :param occupancies: the occupancies with the same dimensions.
+    :param fermi_level: the Fermi level, stored alongside.
+    :param occupation_threshold: bands with a larger occupancy are considered occupied.
+
+    :return: dict with the 'band_gap', the valence band maximum 'vbm', the conduction band minimum 'cbm',
+        whether the gap is direct ('is_direct_gap') and the 'fermi_level'. The gap is zero for metals and
+        the band edges are None if all bands are occupied or empty.
+    """
+    eigenvalues = np.asarray(eigenvalues, dtype=float)
+    occupied = np.asarray(occupancies, dtype=float) > occupation_threshold
+    properties = {'band_gap': None, 'vbm': None, 'cbm': None, 'is_direct_gap': None, 'fermi_level': fermi_level}
+    if occupied.all() or not occupied.any():
+        return properties
+
+    # Band edges at each k-point, over both spin channels
+    vbm_k = np.where(occupied, eigenvalues, -np.inf).max(axis=(0, 2))
+    cbm_k = np.where(occupied, np.inf, eigenvalues).min(axis=(0, 2))
+    vbm = vbm_k.max()
+    cbm = cbm_k.min()
+    band_gap = max(cbm - vbm, 0.0)
+    # A band that is occupied at some k-points and empty at others crosses the Fermi level
+    if (occupied.any(axis=1) & ~occupied.all(axis=1)).any():
+        band_gap = 0.0
+    properties.update({
+        'band_gap': float(band_gap),
+        'vbm': float(vbm),
+        'cbm': float(cbm),
+        'is_direct_gap': bool(band_gap > 0 and np.min(cbm_k - vbm_k) - band_gap < 1e-6)
+    })
+    return properties
+
+
 def _invert_dict(dct):
     return dct.__class__(map(reversed, dct.items()))
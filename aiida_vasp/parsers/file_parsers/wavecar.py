@@ -19,6 +19,8 @@ class WavecarParser(BaseFileParser):
         },
     }
 
+    OPEN_MODE = 'rb'
+
     def __init__(self, *args, **kwargs):
         super(WavecarParser, self).__init__(*args, **kwargs)
         self._wavecar = None
@@ -28,7 +30,11 @@ class WavecarParser(BaseFileParser):
         """Create a DB Node for the WAVECAR file."""
         result = inputs
         result = {}
+        # Either the path or the open file object, the node will copy directly from it.
         wfn = self._data_obj.path
+        if wfn is None and self._data_obj.handler is not None:
+            wfn = self._data_obj.handler
+            wfn.seek(0)
 
         if wfn is None:
             return {'wavecar': None}
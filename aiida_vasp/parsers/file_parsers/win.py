@@ -9,11 +9,14 @@ class WinParser(KeyValueParser):
     block = re.compile(r'begin (?P<name>\w*)\s*\n\s*(?P<content>[\w\W]*)\s*\n\s*end \1')
     comment = re.compile(r'(!.*)\n?')
 
-    def __init__(self, file_path):
+    def __init__(self, file_path=None, file_handler=None):
         super(WinParser, self).__init__()
         self.result = {}
-        with open(file_path) as winf:
-            self.keywords, self.blocks, self.comments = WinParser.parse_win(winf)
+        if file_handler is not None:
+            self.keywords, self.blocks, self.comments = WinParser.parse_win(file_handler)
+        else:
+            with open(file_path) as winf:
+                self.keywords, self.blocks, self.comments = WinParser.parse_win(winf)
         self.result.update(self.keywords)
         self.result.update(self.blocks)
 
@@ -99,5 +99,7 @@ class ParserManager(object):  # pylint: disable=useless-object-inheritance
                 # This parser has already been checked, i.e. take the first
                 # available in the list that can be parsed (i.e. file exists)
                 continue
-            file_to_parse = self._vasp_parser.get_file(file_name)
-            self._parsers[file_name].parser = self._parsers[file_name]['parser_class'](self._vasp_parser, file_path=file_to_parse)
+            parser_class = self._parsers[file_name]['parser_class']
+            # Hand the file over as an open handler, this avoids materialising repository objects on disk.
+            file_to_parse = self._vasp_parser.get_file_handler(file_name, mode=parser_class.OPEN_MODE)
+            self._parsers[file_name].parser = parser_class(self._vasp_parser, file_handler=file_to_parse)
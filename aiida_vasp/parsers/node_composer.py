@@ -7,13 +7,17 @@ A composer that composes different quantities onto AiiDA data nodes.
 # pylint: disable=no-member, useless-object-inheritance
 # Reason: pylint erroneously complains about non existing member 'get_quantity', which will be set in __init__.
 
+from collections import OrderedDict
+
+import numpy as np
+
 from aiida_vasp.utils.aiida_utils import get_data_class
 from aiida_vasp.utils.delegates import delegate_method_kwargs, Delegate
 from aiida_vasp.parsers.quantity import ParsableQuantities
 """NODE_TYPES"""  # pylint: disable=pointless-string-statement
 
 NODES_TYPES = {
-    'dict': ['total_energies', 'maximum_force', 'maximum_stress', 'symmetries'],
+    'dict': ['total_energies', 'maximum_force', 'maximum_stress', 'symmetries', 'band_properties'],
     'array.kpoints': ['kpoints'],
     'structure': ['structure'],
     'array.trajectory': ['trajectory'],
@@ -92,12 +96,20 @@ class NodeComposer(object):
 
     @staticmethod
     def _compose_structure(node_type, inputs):
-        """Compose a structure node."""
+        """
+        Compose a structure node.
+
+        The sites are either given as a list of 'sites' dicts, or in bulk by the arrays 'positions',
+        'symbols' and 'kind_names', in which case the kinds are created once and the sites are set at once.
+        """
         node = get_data_class(node_type)()
         for key in inputs:
             node.set_cell(inputs[key]['unitcell'])
-            for site in inputs[key]['sites']:
-                node.append_atom(position=site['position'], symbols=site['symbol'], name=site['kind_name'])
+            if 'sites' in inputs[key]:
+                for site in inputs[key]['sites']:
+                    node.append_atom(position=site['position'], symbols=site['symbol'], name=site['kind_name'])
+            else:
+                _set_sites(node, inputs[key]['positions'], inputs[key]['symbols'], inputs[key]['kind_names'])
         return node
 
     @staticmethod
@@ -193,3 +205,19 @@ class NodeComposer(object):
                 else:
                     node.set_array(key, value)
         return node
+
+
+def _set_sites(structure, positions, symbols, kind_names):
+    """Set all the sites of an unstored structure at once, creating one kind per kind name."""
+    from aiida.orm.nodes.data.structure import Kind
+
+    kinds = OrderedDict()
+    for kind_name, symbol in zip(kind_names, symbols):
+        if kinds.setdefault(kind_name, symbol) != symbol:
+            raise ValueError('The kind {} is used for different symbols: {} and {}'.format(kind_name, kinds[kind_name], symbol))
+    for kind_name, symbol in kinds.items():
+        structure.append_kind(Kind(symbols=symbol, name=kind_name))
+    structure.set_attribute('sites', [{
+        'kind_name': kind_name,
+        'position': position
+    } for kind_name, position in zip(kind_names, np.asarray(positions, dtype=float).tolist())])
@@ -66,7 +66,7 @@ NODES = {
     'misc': {
         'link_name': 'misc',
         'type': 'dict',
-        'quantities': ['total_energies', 'maximum_stress', 'maximum_force', 'symmetries'],
+        'quantities': ['total_energies', 'maximum_stress', 'maximum_force', 'symmetries', 'band_properties'],
     },
     'kpoints': {
         'link_name': 'kpoints',
@@ -201,6 +201,11 @@ class ParserSettings(object):  # pylint: disable=useless-object-inheritance
          -  dict: a custom node will be add. The dict must provide 'type' and 'quantities'. 'link_name' is optional
 
                 'add_custom_node': {'type': 'parameter', 'quantities': ['efermi', 'forces'], 'link_name': 'my_custom_node'}
+
+            For nodes in NODES, the dict updates the default node. In particular, 'chgcar' and 'wavecar' can be
+            added as references to the files in the remote folder, which are then neither retrieved nor stored:
+
+                'add_chgcar': {'remote': True}
         """
         from copy import deepcopy
 
@@ -264,11 +269,50 @@ class ParserSettings(object):  # pylint: disable=useless-object-inheritance
 
     @property
     def quantities_to_parse(self):
-        """Return the combined list of all the quantities, required for the current nodes."""
+        """
+        Return the combined list of all the quantities, required for the current nodes.
+
+        Nodes referencing a file in the remote folder ('remote': True) do not require parsing.
+        """
         quantities = []
         for value in self.nodes.values():
+            if value.get('remote'):
+                continue
             for quantity in value['quantities']:
                 if quantity in quantities:
                     continue
                 quantities.append(quantity)
         return quantities
+
+    @property
+    def required_files(self):
+        """
+        Return the sorted list of files needed to parse the quantities required for the current nodes.
+
+        For each quantity, this is the file of the FileParser defining it (not the files of its alternatives),
+        together with the files required for its prerequisites. Quantities that are only known by their 'name'
+        (e.g. 'kpoints') are taken from the first file that defines a quantity with that name.
+        """
+        definitions = {}
+        by_name = {}
+        for file_name in sorted(self.parser_definitions):
+            for quantity, quantity_dict in self.parser_definitions[file_name]['parser_class'].PARSABLE_ITEMS.items():
+                definitions[quantity] = (file_name, quantity_dict.get('prerequisites', []))
+                by_name.setdefault(quantity_dict.get('name', quantity), quantity)
+
+        required = set()
+        resolved = set()
+        to_resolve = list(self.quantities_to_parse)
+        while to_resolve:
+            quantity = to_resolve.pop()
+            if quantity in resolved:
+                continue
+            resolved.add(quantity)
+            quantity = quantity if quantity in definitions else by_name.get(quantity)
+            if quantity is None:
+                # Not parsable with this set of FileParsers, the parser will issue a warning.
+                continue
+            file_name, prerequisites = definitions[quantity]
+            required.add(file_name)
+            to_resolve.extend(prerequisites)
+        return sorted(required)
@@ -25,3 +25,13 @@ def test_get_file(base_parser):
     # This should now not eject an OSError as this is handled by the logger
     # and None is returned.
     assert base_parser.get_file('NonExistent') is None
+
+
+def test_get_file_handler(base_parser):
+    """Test opening a retrieved output file without resolving its path."""
+    base_parser.check_folders()
+    handler = base_parser.get_file_handler('OUTCAR')
+    assert handler.readline()
+    base_parser.close_file_handlers()
+    assert handler.closed
+    assert base_parser.get_file_handler('NonExistent') is None
@@ -15,3 +15,15 @@ def test_settings_utils():
     assert len(settings.nodes) == 1 and 'wavecar' in settings.nodes
     settings = ParserSettings(SETTINGS, DEFAULT_OPTIONS)
     assert 'wavecar' in settings.nodes
+
+
+def test_required_files():
+    """Only the files defining the requested quantities (and their prerequisites) are required."""
+    settings = ParserSettings({}, DEFAULT_OPTIONS)
+    assert settings.required_files == ['OUTCAR', 'vasprun.xml']
+    settings = ParserSettings({'add_misc': False, 'add_energies': True}, DEFAULT_OPTIONS)
+    assert settings.required_files == ['vasprun.xml']
+    settings = ParserSettings({'add_misc': False, 'add_bands': True, 'add_chgcar': True}, DEFAULT_OPTIONS)
+    assert settings.required_files == ['CHGCAR', 'vasprun.xml']
+    settings = ParserSettings({'add_misc': ['fermi_level', 'symmetries'], 'add_kpoints': ['eigenval-kpoints']}, DEFAULT_OPTIONS)
+    assert settings.required_files == ['EIGENVAL', 'OUTCAR', 'vasprun.xml']
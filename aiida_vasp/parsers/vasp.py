@@ -18,6 +18,7 @@ from aiida_vasp.parsers.quantity import ParsableQuantities
 from aiida_vasp.parsers.manager import ParserManager
 from aiida_vasp.parsers.settings import ParserSettings
 from aiida_vasp.parsers.node_composer import NodeComposer
+from aiida_vasp.utils.aiida_utils import get_data_class
 from aiida_vasp.utils.delegates import Delegate
 
 # defaults
@@ -74,6 +75,9 @@ class VaspParser(BaseParser):
         'wavecar':    FileData node containing the WAVECAR file.
         'chgcar':     FileData node containing the CHGCAR file.
 
+      With `'add_wavecar': {'remote': True}` (or `add_chgcar`) the file is not retrieved, the node
+      only references it in the remote folder (see aiida_vasp.data.remote_file).
+
     * `output_params`: A list of quantities, that should be added to the 'misc' node.
 
     * `file_parser_set`: String (DEFAULT = 'default').
@@ -132,6 +136,14 @@ class VaspParser(BaseParser):
 
     def parse(self, **kwargs):
         """The function that triggers the parsing of a calculation."""
+        try:
+            return self._parse(**kwargs)
+        finally:
+            # The file parsers read from handlers opened on the retrieved files, release them.
+            self.close_file_handlers()
+
+    def _parse(self, **kwargs):
+        """Parse the retrieved files and add the output nodes."""
 
         def missing_critical_file():
             for file_name, value_dict in self.settings.parser_definitions.items():
@@ -164,7 +176,10 @@ class VaspParser(BaseParser):
 
         # Assemble the nodes associated with the quantities
         for node_name, node_dict in self.settings.nodes.items():
-            node = node_assembler.compose(node_dict.type, node_dict.quantities)
+            if node_dict.get('remote'):
+                node = self._compose_remote_node(node_dict)
+            else:
+                node = node_assembler.compose(node_dict.type, node_dict.quantities)
             success = self._set_node(node_name, node)
             if not success:
                 return self.exit_codes.ERROR_PARSING_FILE_FAILED
@@ -211,6 +226,21 @@ class VaspParser(BaseParser):
 
         return {quantity: self._output_nodes.get(quantity)}
 
+    def _compose_remote_node(self, node_dict):
+        """
+        Compose a node referencing a file left in the remote folder, e.g. a CHGCAR or WAVECAR.
+
+        The size, modification time and header of the file are read from the info file written by the job
+        script and retrieved with the other files, so that no connection to the computer is needed.
+        """
+        data_class = get_data_class(node_dict.type)
+        filename = node_dict.get('filename')
+        remote_workdir = self.node.get_remote_workdir()
+        handler = self.get_file_handler(data_class.remote_info_file(filename), mode='rb')
+        if remote_workdir is None or handler is None:
+            return None
+        return data_class.from_remote_info(self.node.computer, remote_workdir, handler.read(), filename)
+
     def _set_node(self, node_name, node):
         """Wrapper for self.add_node, checking whether the Node is None and using the correct linkname."""
 
@@ -29,10 +29,10 @@ class Vasp2w90Parser(VaspParser):
 
     def parse_win(self):
         """Create the wannier90 .win file and kpoints output nodes."""
-        win = self.get_file('wannier90.win')
+        win = self.get_file_handler('wannier90.win')
         if not win:
             return False, None, None, None
-        win_result = WinParser(win).result
+        win_result = WinParser(file_handler=win).result
 
         # remove kpoints block from parameters
         kpoints = win_result.pop('kpoints', None)
@@ -67,5 +67,5 @@ class Vasp2w90Parser(VaspParser):
             self.add_node(name, node)  # pylint: disable=no-member
 
     def has_full_dat(self):
-        success = all(self.get_file('wannier90.' + ext) for ext in ['mmn', 'amn', 'eig'])
+        success = all('wannier90.' + ext in self.retrieved_content for ext in ['mmn', 'amn', 'eig'])
         return success
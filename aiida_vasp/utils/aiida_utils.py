@@ -6,6 +6,8 @@ Utilities for making working against AiiDA a bit easier. Mostly here due to
 historical reasons when AiiDA was rapidly developed. In the future most routines
 that have now standardized in AiiDA will be removed.
 """
+from contextlib import contextmanager
+
 import numpy as np
 from packaging import version
 
@@ -108,6 +110,14 @@ def cmp_version(string):
     return version.parse(string)
 
 
+@contextmanager
+def backend_transaction():
+    """Group the database operations in the context into one transaction, which is rolled back on exceptions."""
+    from aiida.manage.manager import get_manager
+    with get_manager().get_backend().transaction():
+        yield
+
+
 def cmp_load_verdi_data():
     """Load the verdi data click command group for any version since 0.11."""
     verdi_data = None
@@ -20,3 +20,10 @@ def fresh_aiida_env(aiida_profile):
     print('The root directory of the fixture manager is: {}'.format(aiida_profile._manager.root_dir))  # pylint: disable=protected-access
     yield aiida_profile
     aiida_profile.reset_db()
+    # In-process caches may hold nodes and contents of the database that was just reset
+    from aiida_vasp.calcs.vasp import invalidate_input_file_cache
+    from aiida_vasp.data.potcar import POTCAR_LOOKUP_CACHE
+    from aiida_vasp.parsers.file_parsers.potcar import invalidate_potcar_cache
+    POTCAR_LOOKUP_CACHE.invalidate()
+    invalidate_potcar_cache()
+    invalidate_input_file_cache()
@@ -89,3 +89,92 @@ def mock_factory(base_class, run_method):
             spec.outline(cls.run)
 
     return MockCalcJob
+
+
+def workflow_node(outputs=None, exit_status=0, terminated=True):
+    """
+    Return a stored WorkflowNode, as left behind by a child workchain.
+
+    :param outputs: dict of the returned output nodes by link label, nested namespaces are joined by '__'.
+    :param exit_status: the exit status of a terminated workchain.
+    :param terminated: if False, the workchain is still running, use ``terminate_workflow_node`` to finish it.
+    """
+    from aiida.common.links import LinkType
+    from aiida.orm import WorkflowNode
+    from plumpy import ProcessState
+    node = WorkflowNode()
+    node.set_process_state(ProcessState.RUNNING)
+    node.store()
+    for link_label, output in (outputs or {}).items():
+        output.store()
+        output.add_incoming(node, link_type=LinkType.RETURN, link_label=link_label)
+    if terminated:
+        terminate_workflow_node(node, exit_status)
+    return node
+
+
+def terminate_workflow_node(node, exit_status=0):
+    """Mark a WorkflowNode from ``workflow_node`` as finished with the given exit status."""
+    from plumpy import ProcessState
+    node.set_process_state(ProcessState.FINISHED)
+    node.set_exit_status(exit_status)
+
+
+def workchain_steps(workchain_class, inputs, exposed_inputs=None):
+    """
+    Return an instance of the workchain class whose outline steps can be called one by one, without the engine.
+
+    The instance records the inputs of the submitted children in ``submitted`` and returns the nodes queued
+    in ``children``, e.g. from ``workflow_node``, in their place. Awaited children are put in the context
+    right away, the reports and the outputs are collected in ``reports`` and ``outputs``.
+
+    :param inputs: the inputs of the workchain, as an AttributeDict with nested AttributeDicts for namespaces.
+    :param exposed_inputs: the inputs returned by ``exposed_inputs``.
+    """
+    from aiida.common.extendeddicts import AttributeDict
+    from aiida.engine.processes.workchains.awaitable import AwaitableAction, construct_awaitable
+    from aiida.orm import load_node
+
+    class WorkChainSteps(workchain_class):
+        """The workchain without the engine."""
+
+        ctx = None
+        inputs = None
+        outputs = None
+
+        def __init__(self):  # pylint: disable=super-init-not-called
+            self.ctx = AttributeDict()
+            self.inputs = inputs
+            self.submitted = []
+            self.children = []
+            self.reports = []
+            self.outputs = {}
+
+        def exposed_inputs(self, process_class, namespace=None, agglomerate=True):  # pylint: disable=unused-argument
+            return AttributeDict(exposed_inputs or {})
+
+        def exposed_outputs(self, node, process_class, namespace=None, agglomerate=True):  # pylint: disable=unused-argument
+            return {namespace: node}
+
+        def submit(self, process_class, **kwargs):  # pylint: disable=arguments-differ
+            self.submitted.append(AttributeDict(kwargs))
+            return self.children.pop(0)
+
+        def to_context(self, **kwargs):
+            for key, value in kwargs.items():
+                awaitable = construct_awaitable(value)
+                if awaitable.action == AwaitableAction.APPEND:
+                    self.ctx.setdefault(key, []).append(load_node(awaitable.pk))
+                else:
+                    self.ctx[key] = load_node(awaitable.pk)
+
+        def report(self, msg, *args, **kwargs):  # pylint: disable=unused-argument
+            self.reports.append(msg)
+
+        def out(self, output_port, value=None):
+            self.outputs[output_port] = value
+
+        def out_many(self, out_dict):
+            self.outputs.update(out_dict)
+
+    return WorkChainSteps()
@@ -0,0 +1,104 @@
+"""
+LRU cache.
+
+----------
+A bounded, in-process least recently used cache with statistics. Used to avoid
+repeating expensive database queries or decompression in long running processes,
+such as the daemon, where the same content is requested over and over again.
+"""
+from collections import OrderedDict, namedtuple
+from threading import RLock
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class LRUCache(object):  # pylint: disable=useless-object-inheritance
+    """
+    A least recently used cache of bounded size.
+
+    :param maxsize: the maximum number of entries. When it is exceeded, the least recently
+        used entry is evicted. A maxsize of 0 disables the cache.
+
+    Usage::
+
+        cache = LRUCache(maxsize=128)
+        content = cache.get_or_compute(key, lambda: expensive(key))
+        cache.info()  # CacheInfo(hits=..., misses=..., maxsize=128, currsize=...)
+        cache.invalidate(key)  # or cache.invalidate() to clear
+    """
+
+    def __init__(self, maxsize=128):
+        self._maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = RLock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for key and mark it as recently used, or default if it is not cached."""
+        with self._lock:
+            try:
+                value = self._entries.pop(key)
+            except KeyError:
+                self._misses += 1
+                return default
+            self._entries[key] = value
+            self._hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entries if the cache is full."""
+        if self._maxsize <= 0:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, compute and store it by calling ``compute()`` if it is not cached."""
+        with self._lock:
+            if key in self._entries:
+                return self.get(key)
+            self._misses += 1
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def invalidate(self, key=None):
+        """Remove the entry for key, or all entries if no key is given."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def invalidate_where(self, condition):
+        """Remove all entries for which ``condition(key)`` is True."""
+        with self._lock:
+            for key in [key for key in self._entries if condition(key)]:
+                del self._entries[key]
+
+    def resize(self, maxsize):
+        """Change the maximum number of entries, evicting the least recently used ones if necessary."""
+        with self._lock:
+            self._maxsize = maxsize
+            while len(self._entries) > max(maxsize, 0):
+                self._entries.popitem(last=False)
+
+    def reset_stats(self):
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
+
+    def info(self):
+        """Return the cache statistics as a ``CacheInfo`` namedtuple."""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._maxsize, len(self._entries))
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
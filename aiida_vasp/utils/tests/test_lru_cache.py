@@ -0,0 +1,52 @@
+"""Test the LRU cache."""
+from aiida_vasp.utils.lru_cache import LRUCache
+
+
+def test_lru_eviction():
+    """The least recently used entry is evicted when the cache is full."""
+    cache = LRUCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert 'b' not in cache
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+
+
+def test_lru_stats_and_compute():
+    """Hits and misses are counted, values are only computed on a miss."""
+    cache = LRUCache(maxsize=4)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return 'value'
+
+    assert cache.get_or_compute(('x', 'y'), compute) == 'value'
+    assert cache.get_or_compute(('x', 'y'), compute) == 'value'
+    assert len(calls) == 1
+    info = cache.info()
+    assert (info.hits, info.misses, info.maxsize, info.currsize) == (1, 1, 4, 1)
+
+
+def test_lru_invalidate():
+    """Entries can be invalidated by key, by condition or all at once."""
+    cache = LRUCache(maxsize=4)
+    cache.put('a', 1)
+    cache.put(('a', 'b'), 2)
+    cache.put('c', 3)
+    cache.invalidate('c')
+    assert 'c' not in cache
+    cache.invalidate_where(lambda key: isinstance(key, tuple) and 'a' in key)
+    assert ('a', 'b') not in cache
+    assert 'a' in cache
+    cache.invalidate()
+    assert not cache
+
+
+def test_lru_disabled():
+    cache = LRUCache(maxsize=0)
+    cache.put('a', 1)
+    assert cache.get('a') is None
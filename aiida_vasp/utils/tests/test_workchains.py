@@ -0,0 +1,59 @@
+"""Test the workchain utils."""
+# pylint: disable=unused-import,redefined-outer-name,unused-argument,unused-wildcard-import,wildcard-import,no-member
+import numpy as np
+
+from aiida_vasp.utils.aiida_utils import get_data_node
+from aiida_vasp.utils.fixtures.environment import fresh_aiida_env
+from aiida_vasp.utils.workchains import irreducible_kpoints_count, distinct_k_samplings, compare_structures, compare_cells_and_positions
+
+
+def simple_cubic():
+    """Simple cubic cell with one atom."""
+    structure = get_data_node('structure', cell=np.eye(3) * 3.0)
+    structure.append_atom(position=(0., 0., 0.), symbols='Si')
+    return structure
+
+
+def test_irreducible_kpoints_count(fresh_aiida_env):
+    """Count the symmetry-reduced k-points of Gamma centered grids in a simple cubic cell."""
+    structure = simple_cubic()
+    assert irreducible_kpoints_count(structure, [2, 2, 2]) == 4
+    assert irreducible_kpoints_count(structure, [3, 3, 3]) == 4
+    assert irreducible_kpoints_count(structure, [4, 4, 4]) == 10
+    assert irreducible_kpoints_count(structure, [5, 5, 5]) == 10
+
+
+def test_distinct_k_samplings(fresh_aiida_env):
+    """Only the spacings whose grids add irreducible k-points are kept."""
+    structure = simple_cubic()
+    rec_cell = 2 * np.pi * np.linalg.inv(np.array(structure.cell)).T
+    # the spacings give 3x3x3, 3x3x3, 4x4x4, 5x5x5 and 6x6x6 grids
+    assert distinct_k_samplings(structure, rec_cell, [1.0, 0.9, 0.6, 0.5, 0.35]) == [1.0, 0.6, 0.35]
+
+
+def test_compare_structures_minimum_image(fresh_aiida_env):
+    """A site crossing the cell boundary and a site at the origin give small, finite deltas."""
+    structure_a = simple_cubic()
+    structure_a.append_atom(position=(2.95, 1.5, 1.5), symbols='Si')
+    structure_b = simple_cubic()
+    structure_b.reset_sites_positions([(0.05, 0., 0.), (0.05, 1.5, 1.5)])
+    delta = compare_structures(structure_a, structure_b)
+    np.testing.assert_allclose(delta.absolute.pos, [[-0.05, 0., 0.], [-0.1, 0., 0.]], atol=1e-12)
+    np.testing.assert_allclose(delta.absolute.pos_lengths, [0.05, 0.1])
+    np.testing.assert_allclose(delta.relative.pos_lengths, [0.05 / 3.0, 0.1 / 3.0])
+    assert delta.absolute.volume == 0.0
+    np.testing.assert_allclose(delta.absolute.cell_angles, [0., 0., 0.], atol=1e-12)
+
+
+def test_compare_cells_and_positions_batch():
+    """A batch of structures is compared at once, also for skewed cells."""
+    skewed = np.array([[3.0, 0., 0.], [2.7, 0.9, 0.], [0., 0., 3.0]])
+    cells_a = np.stack([np.eye(3) * 3.0, skewed])
+    cells_b = np.stack([np.eye(3) * 3.3, skewed])
+    positions_a = np.zeros((2, 1, 3))
+    positions_b = np.stack([np.zeros((1, 3)), np.dot([[0.45, -0.45, 0.]], skewed)])
+    delta = compare_cells_and_positions(cells_a, positions_a, cells_b, positions_b)
+    np.testing.assert_allclose(delta.relative.volume, [1.1**3 - 1, 0.])
+    np.testing.assert_allclose(delta.relative.cell_lengths, [[0.1, 0.1, 0.1], [0., 0., 0.]])
+    # The shortest image of the displacement in the skewed cell is 0.45 * (a - b)
+    np.testing.assert_allclose(delta.absolute.pos_lengths, [[0.], [np.linalg.norm(0.45 * (skewed[0] - skewed[1]))]])
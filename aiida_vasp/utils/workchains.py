@@ -7,11 +7,101 @@ to make code more compact in the workchains.
 """
 
 import numpy as np
+import spglib
+from aiida.common.exceptions import AiidaException
 from aiida.common.extendeddicts import AttributeDict
-from aiida.orm import Dict
+from aiida.orm import Dict, load_node
 from aiida.engine.processes.exit_code import ExitCode
 
 
+class ThrottledSubmitMixin(object):  # pylint: disable=useless-object-inheritance
+    """
+    Submit a child workchain for each of a list of structures, with a limit on the number running at the same time.
+
+    For workchains with the outline ``while_(cls.has_pending_or_running)(cls.run_next_workchains, cls.collect_finished)``.
+    The workchain calls ``_init_throttle`` when it is initialized, implements ``_max_concurrent`` and
+    ``_child_inputs`` and calls ``_finish_terminated`` in its ``collect_finished`` step.
+
+    A workchain step can only wait for all of its awaitables, so ``run_next_workchains`` waits for the
+    oldest running child. Children that finish before it keep their slots until it has finished, then all
+    finished children are collected and their slots are refilled at once.
+    """
+
+    def _init_throttle(self, pending):
+        """
+        Initialize the bookkeeping.
+
+        :param pending: list of [key, structure pk] to submit children for, in order.
+        """
+        self.ctx.pending = pending
+        # Lists of [key, structure pk, workchain pk] of the running and the finished children
+        self.ctx.running = []
+        self.ctx.finished = []
+
+    def _max_concurrent(self):
+        """Return the maximum number of children running at the same time, 0 means no limit."""
+        raise NotImplementedError
+
+    def _child_inputs(self, structure):
+        """Return the inputs of the child for the given structure."""
+        raise NotImplementedError
+
+    def has_pending_or_running(self):
+        """Determine if there are children left to submit or still running."""
+        return bool(self.ctx.pending or self.ctx.running)
+
+    def run_next_workchains(self):
+        """Submit children until the maximum number of concurrent ones is reached and wait for the oldest running one."""
+        max_concurrent = self._max_concurrent()
+        while self.ctx.pending and (not max_concurrent or len(self.ctx.running) < max_concurrent):
+            key, structure_pk = self.ctx.pending.pop(0)
+            running = self.submit(self._next_workchain, **self._child_inputs(load_node(structure_pk)))
+            self.report('launching {}<{}> for {}'.format(self._next_workchain.__name__, running.pk, key))
+            self.ctx.running.append([key, structure_pk, running.pk])
+        return self.to_context(oldest_workchain=load_node(self.ctx.running[0][2]))
+
+    def _finish_terminated(self):
+        """
+        Move the terminated children to the finished list, which frees their slots.
+
+        :return: list of [key, structure pk, workchain] of the children that terminated since the last call.
+        """
+        running = []
+        terminated = []
+        for key, structure_pk, workchain_pk in self.ctx.running:
+            workchain = load_node(workchain_pk)
+            if not workchain.is_terminated:
+                running.append([key, structure_pk, workchain_pk])
+                continue
+            if not workchain.is_finished_ok:
+                self.report('The called {}<{}> for {} returned a non-zero exit status {}'.format(
+                    workchain.__class__.__name__, workchain_pk, key, workchain.exit_status))
+            self.ctx.finished.append([key, structure_pk, workchain_pk])
+            terminated.append([key, structure_pk, workchain])
+        self.ctx.running = running
+        return terminated
+
+
+def clean_remote_folders(process, remote_folders):
+    """
+    Clean the given remote folders, reporting the ones that could not be cleaned.
+
+    :param process: the process that reports.
+    :param remote_folders: list of RemoteData nodes.
+    :return: list of the pks of the cleaned remote folders.
+    """
+    cleaned = []
+    for remote_folder in remote_folders:
+        try:
+            remote_folder._clean()  # pylint: disable=protected-access
+        except (OSError, IOError, AiidaException) as exception:
+            process.report('could not clean the remote folder {}<{}>: {}'.format(remote_folder.__class__.__name__, remote_folder.pk,
+                                                                                   exception))
+            continue
+        cleaned.append(remote_folder.pk)
+    return cleaned
+
+
 def prepare_process_inputs(inputs, namespaces=None):
     """
     Prepare the inputs dictionary for a calculation.
@@ -42,36 +132,85 @@ def prepare_process_inputs(inputs, namespaces=None):
 
 
 def compare_structures(structure_a, structure_b):
-    """Compare two StructreData objects A, B and return a delta (A - B) of the relevant properties."""
+    """
+    Compare two StructureData objects A, B and return a delta (A - B) of the relevant properties.
+
+    The position deltas are minimum image displacements, see ``compare_cells_and_positions``.
+    """
+    cell_a, positions_a = _cell_and_positions(structure_a)
+    cell_b, positions_b = _cell_and_positions(structure_b)
+    return compare_cells_and_positions(cell_a, positions_a, cell_b, positions_b)
+
+
+def _cell_and_positions(structure):
+    return np.array(structure.cell), np.array([site.position for site in structure.sites]).reshape(-1, 3)
+
+
+# The fractional offsets of a cell and its neighbours, used to find the minimum image
+_IMAGE_OFFSETS = np.array([[i, j, k] for i in (-1, 0, 1) for j in (-1, 0, 1) for k in (-1, 0, 1)])
+
+
+def compare_cells_and_positions(cell_a, positions_a, cell_b, positions_b):
+    """
+    Compare cells and positions A, B, also for batches of structures, and return a delta (A - B) of the relevant properties.
+
+    :param cell_a: The cells, as an array of shape (..., 3, 3) with the lattice vectors as rows.
+    :param positions_a: The Cartesian positions of the sites, as an array of shape (..., number of sites, 3).
+    :param cell_b: The cells to compare to, with the same shape as cell_a.
+    :param positions_b: The positions to compare to, with the same shape as positions_a.
+
+    :return: AttributeDict with 'absolute' and 'relative' AttributeDicts of the volume, the cell_lengths, the
+        cell_angles and the pos_lengths (the lengths of the position deltas, in the cell of A), with the leading
+        batch dimensions of the inputs. The absolute one also contains the position deltas in pos.
+
+    The position deltas are the shortest displacements between the periodic images of each site, so that
+    a site moving across a cell boundary does not show up as a large displacement. The relative
+    position deltas are relative to the length scale of the cell of A, the cube root of its volume,
+    instead of to the site positions, which vanish for sites at the origin.
+    """
+    cell_a, cell_b = np.asarray(cell_a, dtype=float), np.asarray(cell_b, dtype=float)
+    positions_a, positions_b = np.asarray(positions_a, dtype=float), np.asarray(positions_b, dtype=float)
 
     delta = AttributeDict()
     delta.absolute = AttributeDict()
     delta.relative = AttributeDict()
-    volume_a = structure_a.get_cell_volume()
-    volume_b = structure_b.get_cell_volume()
-    delta.absolute.volume = np.absolute(volume_a - volume_b)
-    delta.relative.volume = np.absolute(volume_a - volume_b) / volume_a
 
-    pos_a = np.array([site.position for site in structure_a.sites])
-    pos_b = np.array([site.position for site in structure_b.sites])
-    delta.absolute.pos = pos_a - pos_b
+    volume_a = np.absolute(np.linalg.det(cell_a))
+    delta.absolute.volume = np.absolute(volume_a - np.absolute(np.linalg.det(cell_b)))
+    delta.relative.volume = delta.absolute.volume / volume_a
 
-    site_vectors = [delta.absolute.pos[i, :] for i in range(delta.absolute.pos.shape[0])]
-    a_lengths = np.linalg.norm(pos_a, axis=1)
-    delta.absolute.pos_lengths = np.array([np.linalg.norm(vector) for vector in site_vectors])
-    delta.relative.pos_lengths = np.array([np.linalg.norm(vector) for vector in site_vectors]) / a_lengths
+    # Wrap the fractional displacements into [-0.5, 0.5] and take the shortest of the neighbouring images,
+    # which is the minimum image also for skewed cells
+    frac_delta = np.matmul(positions_a, np.linalg.inv(cell_a)) - np.matmul(positions_b, np.linalg.inv(cell_b))
+    frac_delta -= np.round(frac_delta)
+    images = np.matmul(frac_delta[..., np.newaxis, :] + _IMAGE_OFFSETS, cell_a[..., np.newaxis, :, :])
+    image_lengths = np.linalg.norm(images, axis=-1)
+    shortest = np.argmin(image_lengths, axis=-1)
+    delta.absolute.pos = np.take_along_axis(images, shortest[..., np.newaxis, np.newaxis], axis=-2)[..., 0, :]
+    delta.absolute.pos_lengths = np.take_along_axis(image_lengths, shortest[..., np.newaxis], axis=-1)[..., 0]
+    delta.relative.pos_lengths = delta.absolute.pos_lengths / np.cbrt(volume_a)[..., np.newaxis]
 
-    cell_lengths_a = np.array(structure_a.cell_lengths)
-    delta.absolute.cell_lengths = np.absolute(cell_lengths_a - np.array(structure_b.cell_lengths))
-    delta.relative.cell_lengths = np.absolute(cell_lengths_a - np.array(structure_b.cell_lengths)) / cell_lengths_a
+    cell_lengths_a = np.linalg.norm(cell_a, axis=-1)
+    delta.absolute.cell_lengths = np.absolute(cell_lengths_a - np.linalg.norm(cell_b, axis=-1))
+    delta.relative.cell_lengths = delta.absolute.cell_lengths / cell_lengths_a
 
-    cell_angles_a = np.array(structure_a.cell_angles)
-    delta.absolute.cell_angles = np.absolute(cell_angles_a - np.array(structure_b.cell_angles))
-    delta.relative.cell_angles = np.absolute(cell_angles_a - np.array(structure_b.cell_angles)) / cell_angles_a
+    cell_angles_a = _cell_angles(cell_a)
+    delta.absolute.cell_angles = np.absolute(cell_angles_a - _cell_angles(cell_b))
+    delta.relative.cell_angles = delta.absolute.cell_angles / cell_angles_a
 
     return delta
 
 
+def _cell_angles(cell):
+    """The angles alpha, beta, gamma in degrees of cells with the lattice vectors as rows, shape (..., 3, 3)."""
+    unit = cell / np.linalg.norm(cell, axis=-1)[..., np.newaxis]
+    # alpha is between b and c, beta between a and c, gamma between a and b
+    cosines = np.stack([np.sum(unit[..., 1, :] * unit[..., 2, :], axis=-1),
+                        np.sum(unit[..., 0, :] * unit[..., 2, :], axis=-1),
+                        np.sum(unit[..., 0, :] * unit[..., 1, :], axis=-1)], axis=-1)
+    return np.degrees(np.arccos(np.clip(cosines, -1.0, 1.0)))
+
+
 def fetch_k_grid(rec_cell, k_spacing):
     """
     Suggest a sensible k-point sampling based on a supplied spacing.
@@ -91,6 +230,48 @@ def fetch_k_grid(rec_cell, k_spacing):
     return kgrid.astype('int').tolist()
 
 
+def irreducible_kpoints_count(structure, kgrid, symprec=1e-5):
+    """
+    Count the symmetry-reduced k-points of a Gamma centered grid.
+
+    :param structure: The StructureData (or CifData) to take the symmetry from. Sites of the same element
+        but different kinds are considered different.
+    :param kgrid: The k-point grid as a list of three integers.
+    :param symprec: The symmetry tolerance in AA passed to spglib.
+
+    :return: The number of irreducible k-points.
+    """
+    atoms = structure.get_ase()
+    numbers = atoms.get_atomic_numbers() * 1000 + atoms.get_tags()
+    mapping, _ = spglib.get_ir_reciprocal_mesh(kgrid, (atoms.get_cell(), atoms.get_scaled_positions(), numbers),
+                                               is_shift=[0, 0, 0],
+                                               symprec=symprec)
+    return len(np.unique(mapping))
+
+
+def distinct_k_samplings(structure, rec_cell, k_samplings):
+    """
+    Drop the k-point spacings whose grids do not add irreducible k-points.
+
+    :param structure: The StructureData (or CifData) to take the symmetry from.
+    :param rec_cell: A two dimensional ndarray of floats defining the reciprocal lattice with each vector as row elements.
+    :param k_samplings: The k-point spacings, from the coarsest to the densest.
+
+    :return: The k-point spacings whose grids have more irreducible k-points than the previous kept one.
+
+    Grids that are equivalent, or reduce to no more k-points than a coarser one, give (nearly) the same
+    result for the price of another calculation.
+    """
+    distinct = []
+    num_kpoints = 0
+    for k_spacing in k_samplings:
+        count = irreducible_kpoints_count(structure, fetch_k_grid(rec_cell, k_spacing))
+        if count > num_kpoints:
+            distinct.append(k_spacing)
+            num_kpoints = count
+    return distinct
+
+
 def compose_exit_code(status, message):
     """Compose an ExitCode instance based on a status and message."""
     exit_code = ExitCode(status=status, message=message)
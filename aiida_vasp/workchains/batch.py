@@ -0,0 +1,148 @@
+"""
+Batch workchain.
+
+----------------
+Runs the same workchain, with shared inputs, for many structures. The structures are given
+either explicitly or as a group. Only a limited number of the child workchains is running
+at any time. New ones are submitted when the oldest running child has finished, in the
+slots of all children that have finished by then.
+"""
+# pylint: disable=attribute-defined-outside-init
+from aiida.common.extendeddicts import AttributeDict
+from aiida.common.links import LinkType
+from aiida.engine import WorkChain, while_
+from aiida.orm import load_node, load_group
+from aiida.plugins import WorkflowFactory
+
+from aiida_vasp.utils.aiida_utils import get_data_class, get_data_node
+from aiida_vasp.utils.workchains import prepare_process_inputs, ThrottledSubmitMixin
+
+
+class BatchWorkChain(ThrottledSubmitMixin, WorkChain):
+    """Run a workchain for each of a set of structures, with a limited number of them running at the same time."""
+
+    _verbose = False
+    _next_workchain_string = 'vasp.vasp'
+    _next_workchain = WorkflowFactory(_next_workchain_string)
+    # The outputs of the children that are collected, output namespace: (link label, type)
+    _collected_outputs = {'misc': ('misc', 'dict'), 'structure': ('structure', 'structure')}
+
+    @classmethod
+    def define(cls, spec):
+        super(BatchWorkChain, cls).define(spec)
+        spec.expose_inputs(cls._next_workchain, exclude=['structure'])
+        spec.input_namespace('structures',
+                             valid_type=get_data_class('structure'),
+                             dynamic=True,
+                             required=False,
+                             help="""
+                             The structures to run, the keys are used to label the collected outputs.
+                             """)
+        spec.input('group',
+                   valid_type=get_data_class('str'),
+                   required=False,
+                   help="""
+                   The label of a group of structures to run, in addition to the structures given explicitly.
+                   Their outputs are labelled structure_<pk>.
+                   """)
+        spec.input('max_concurrent',
+                   valid_type=get_data_class('int'),
+                   required=False,
+                   default=get_data_node('int', 10),
+                   help="""
+                   The maximum number of child workchains running at the same time, 0 means no limit.
+                   """)
+        spec.outline(
+            cls.initialize,
+            while_(cls.has_pending_or_running)(
+                cls.run_next_workchains,
+                cls.collect_finished
+            ),
+            cls.finalize
+        )  # yapf: disable
+        for namespace, (_, data_type) in cls._collected_outputs.items():
+            spec.output_namespace(namespace, valid_type=get_data_class(data_type), dynamic=True, required=False)
+        spec.exit_code(0, 'NO_ERROR', message='the sun is shining')
+        spec.exit_code(410, 'ERROR_CHILDREN_FAILED', message='one or more of the child workchains failed')
+        spec.exit_code(421, 'ERROR_NO_STRUCTURES', message='no structures were supplied')
+        spec.exit_code(500, 'ERROR_UNKNOWN', message='unknown error detected in the batch workchain')
+
+    def initialize(self):
+        """Initialize."""
+        self._init_context()
+        self._init_inputs()
+        self._init_structures()
+        if not self.ctx.pending:
+            return self.exit_codes.ERROR_NO_STRUCTURES  # pylint: disable=no-member
+        return None
+
+    def _init_context(self):
+        """Initialize context variables that are used during the logical flow."""
+        self.ctx.exit_code = self.exit_codes.ERROR_UNKNOWN  # pylint: disable=no-member
+
+    def _init_inputs(self):
+        """Initialize the inputs shared by all children."""
+        try:
+            self._verbose = self.inputs.verbose.value
+        except AttributeError:
+            pass
+
+    def _init_structures(self):
+        """Collect the structures to run from the inputs and the group."""
+        structures = dict(self.inputs.get('structures', {}))
+        if 'group' in self.inputs:
+            for node in load_group(label=self.inputs.group.value).nodes:
+                if isinstance(node, get_data_class('structure')):
+                    structures.setdefault('structure_{}'.format(node.pk), node)
+        self._init_throttle([[key, structures[key].pk] for key in sorted(structures)])
+
+    def _max_concurrent(self):
+        return self.inputs.max_concurrent.value
+
+    def _child_inputs(self, structure):
+        inputs = AttributeDict(self.exposed_inputs(self._next_workchain))
+        inputs.structure = structure
+        return prepare_process_inputs(inputs, namespaces=['relax', 'converge', 'verify', 'dos'])
+
+    def collect_finished(self):
+        """Collect the terminated children, which frees their slots."""
+        self._finish_terminated()
+        if self._verbose:
+            self.report('{} finished, {} running and {} pending children'.format(len(self.ctx.finished), len(self.ctx.running),
+                                                                                len(self.ctx.pending)))
+
+    def finalize(self):
+        """Attach the collected outputs of the children, labelled by the key of their structure."""
+        failed = []
+        for key, _, pk in self.ctx.finished:
+            workchain = load_node(pk)
+            if not workchain.is_finished_ok:
+                failed.append(key)
+                continue
+            outputs = {link.link_label: link.node for link in workchain.get_outgoing(link_type=LinkType.RETURN).all()}
+            for namespace, (link_label, _) in self._collected_outputs.items():
+                if link_label in outputs:
+                    self.out('{}.{}'.format(namespace, key), outputs[link_label])
+
+        if failed:
+            self.report('The children for {} failed'.format(', '.join(failed)))
+            self.ctx.exit_code = self.exit_codes.ERROR_CHILDREN_FAILED  # pylint: disable=no-member
+        else:
+            self.ctx.exit_code = self.exit_codes.NO_ERROR  # pylint: disable=no-member
+        return self.ctx.exit_code
+
+
+class RelaxBatchWorkChain(BatchWorkChain):
+    """Relax each of a set of structures, with a limited number of relaxations running at the same time."""
+
+    _next_workchain_string = 'vasp.relax'
+    _next_workchain = WorkflowFactory(_next_workchain_string)
+    _collected_outputs = {'misc': ('misc', 'dict'), 'structure': ('relax__structure', 'structure')}
+
+
+class MasterBatchWorkChain(BatchWorkChain):
+    """Run the master workchain for each of a set of structures, with a limited number of them running at the same time."""
+
+    _next_workchain_string = 'vasp.master'
+    _next_workchain = WorkflowFactory(_next_workchain_string)
+    _collected_outputs = {'bands': ('bands__bands', 'array.bands'), 'dos': ('dos__dos', 'array')}
@@ -10,11 +10,11 @@ import numpy as np
 
 from aiida.engine import WorkChain, append_, while_, if_, calcfunction
 from aiida.common.extendeddicts import AttributeDict
+from aiida.orm import load_node
 from aiida.plugins import WorkflowFactory
-from aiida.orm.nodes.data.array.bands import find_bandgap
 
 from aiida_vasp.utils.aiida_utils import (get_data_class, get_data_node, displaced_structure, compressed_structure)
-from aiida_vasp.utils.workchains import fetch_k_grid, prepare_process_inputs, compose_exit_code
+from aiida_vasp.utils.workchains import fetch_k_grid, distinct_k_samplings, prepare_process_inputs, compose_exit_code, clean_remote_folders
 
 
 class ConvergeWorkChain(WorkChain):
@@ -96,6 +96,15 @@ class ConvergeWorkChain(WorkChain):
                    help="""
                    The number of k-point samples.
                    """)
+        spec.input('converge.k_distinct',
+                   valid_type=get_data_class('bool'),
+                   required=False,
+                   default=get_data_node('bool', False),
+                   help="""
+                   If True, the k-point samples are planned up front and only grids that have
+                   more symmetry-reduced k-points than the previous grid are tested. Grids that
+                   are equivalent to a coarser one are skipped.
+                   """)
         spec.input('converge.cutoff_type',
                    valid_type=get_data_class('str'),
                    required=False,
@@ -105,7 +114,7 @@ class ConvergeWorkChain(WorkChain):
                    options are accepted:
                    * energy
                    * gap
-                   * vbm (not yet currently supported)
+                   * vbm
                    * forces
                    """)
         spec.input('converge.cutoff_value',
@@ -203,54 +212,91 @@ class ConvergeWorkChain(WorkChain):
                    help="""
                    If True, we assume testing to be performed (e.g. dummy calculations).
                    """)
+        spec.input('converge.parallel',
+                   valid_type=get_data_class('bool'),
+                   required=False,
+                   default=get_data_node('bool', False),
+                   help="""
+                   If True, all plane-wave cutoff tests, and then all k-point grid tests, are
+                   submitted at once instead of one after the other. The tests are
+                   independent, so the results are the same as for the sequential tests.
+                   """)
+        spec.input('converge.max_concurrent',
+                   valid_type=get_data_class('int'),
+                   required=False,
+                   default=get_data_node('int', 0),
+                   help="""
+                   The maximum number of convergence tests running at the same time when
+                   ``parallel`` is True. The tests are then submitted in batches of this size.
+                   Zero means no limit.
+                   """)
+        spec.input('converge.consecutive',
+                   valid_type=get_data_class('int'),
+                   required=False,
+                   default=get_data_node('int', 1),
+                   help="""
+                   The number of consecutive differences of ``cutoff_type`` that have to be
+                   within the cutoff value before a plane-wave cutoff or k-point grid is
+                   considered converged.
+                   """)
+        spec.input('converge.early_stop',
+                   valid_type=get_data_class('bool'),
+                   required=False,
+                   default=get_data_node('bool', False),
+                   help="""
+                   If True, the convergence criterion is evaluated after each test (or batch of
+                   tests when ``parallel`` is set) and the remaining, more expensive, plane-wave
+                   cutoffs and k-point grids are skipped once it is met. The displacement and
+                   compression tests then only sample the cutoffs and grids of the regular tests.
+                   """)
+        spec.input('converge.warm_start',
+                   valid_type=get_data_class('bool'),
+                   required=False,
+                   default=get_data_node('bool', False),
+                   help="""
+                   If True, each convergence test restarts from the CHGCAR of the previous test of the
+                   same series (ICHARG = 1), which, unlike the WAVECAR, can be read with a different
+                   plane-wave cutoff or k-point grid. When ``parallel`` is set, the first, cheapest,
+                   test of each series is run alone and seeds all the others. The tests that seed others
+                   keep their remote folders, which are cleaned once they are no longer restarted from,
+                   if ``clean_workdir`` is set. The other tests clean their own remote folders.
+                   """)
 
         spec.outline(
             cls.initialize,
             if_(cls.run_conv_calcs)(
                 while_(cls.run_pw_conv_calcs)(
-                    cls.init_pw_conv_calc,
-                    cls.init_next_workchain,
-                    cls.run_next_workchain,
-                    cls.results_pw_conv_calc
+                    cls.run_pw_conv_batch,
+                    cls.results_pw_conv_batch
                 ),
                 cls.analyze_pw_conv,
                 while_(cls.run_kpoints_conv_calcs)(
-                    cls.init_kpoints_conv_calc,
-                    cls.init_next_workchain,
-                    cls.run_next_workchain,
-                    cls.results_kpoints_conv_calc
+                    cls.run_kpoints_conv_batch,
+                    cls.results_kpoints_conv_batch
                 ),
                 cls.init_disp_conv,
                 while_(cls.run_pw_conv_disp_calcs)(
-                    cls.init_pw_conv_calc,
-                    cls.init_next_workchain,
-                    cls.run_next_workchain,
-                    cls.results_pw_conv_calc
+                    cls.run_pw_conv_batch,
+                    cls.results_pw_conv_batch
                 ),
                 if_(cls.analyze_pw_after_disp)(
                     cls.analyze_pw_conv,
                 ),
                 while_(cls.run_kpoints_conv_disp_calcs)(
-                    cls.init_kpoints_conv_calc,
-                    cls.init_next_workchain,
-                    cls.run_next_workchain,
-                    cls.results_kpoints_conv_calc
+                    cls.run_kpoints_conv_batch,
+                    cls.results_kpoints_conv_batch
                 ),
                 cls.init_comp_conv,
                 while_(cls.run_pw_conv_comp_calcs)(
-                    cls.init_pw_conv_calc,
-                    cls.init_next_workchain,
-                    cls.run_next_workchain,
-                    cls.results_pw_conv_calc
+                    cls.run_pw_conv_batch,
+                    cls.results_pw_conv_batch
                 ),
                 if_(cls.analyze_pw_after_comp)(
                     cls.analyze_pw_conv,
                 ),
                 while_(cls.run_kpoints_conv_comp_calcs)(
-                    cls.init_kpoints_conv_calc,
-                    cls.init_next_workchain,
-                    cls.run_next_workchain,
-                    cls.results_kpoints_conv_calc
+                    cls.run_kpoints_conv_batch,
+                    cls.results_kpoints_conv_batch
                 ),
                 cls.analyze_conv,
                 cls.store_conv,
@@ -286,6 +332,8 @@ class ConvergeWorkChain(WorkChain):
 
         self.ctx.exit_code = self.exit_codes.ERROR_UNKNOWN  # pylint: disable=no-member
         self.ctx.workchains = []
+        # The convergence tests submitted in the current batch, as [pk, encut, kgrid] entries
+        self.ctx.conv_batch = []
         self.ctx.inputs = AttributeDict()
         self.ctx.set_input_nodes = True
 
@@ -293,6 +341,10 @@ class ConvergeWorkChain(WorkChain):
         """Initialize the converge part of the context."""
         self.ctx.converge = AttributeDict()
         self.ctx.converge.settings = AttributeDict()
+        # The remote folder the next convergence test is warm started from
+        self.ctx.converge.restart_folder = None
+        # The pks of the remote folders of the warm started tests, which are not cleaned by the tests
+        self.ctx.converge.warm_start_folders = []
         self._init_pw_context()
         self._init_kpoints_context()
 
@@ -306,10 +358,10 @@ class ConvergeWorkChain(WorkChain):
 
     def _init_settings(self):
         """Initialize the settings."""
-        # Make sure the parser settings at least contains 'add_bands' and the correct
-        # output_params settings.
+        # Make sure the parser settings contain the correct output_params settings. The band gap and
+        # edges are taken from the 'band_properties' in misc, so the bands do not need to be stored.
         if self.run_conv_calcs():
-            dict_entry = {'add_bands': True, 'output_params': ['total_energies', 'maximum_force']}
+            dict_entry = {'output_params': ['total_energies', 'maximum_force']}
             compress = False
             displace = False
             try:
@@ -330,6 +382,9 @@ class ConvergeWorkChain(WorkChain):
                     settings.parser_settings = dict_entry
             else:
                 settings = AttributeDict({'parser_settings': dict_entry})
+            misc_quantities = settings.parser_settings.get('add_misc')
+            if isinstance(misc_quantities, list) and 'band_properties' not in misc_quantities:
+                settings.parser_settings['add_misc'] = misc_quantities + ['band_properties']
             self.ctx.inputs.settings = settings
         else:
             if 'settings' in self.inputs:
@@ -435,8 +490,9 @@ class ConvergeWorkChain(WorkChain):
             if converge.run_kpoints_conv_calcs_org:
                 converge.run_kpoints_conv_calcs = True
             self.init_rel_conv()
-            # Set the new displaced structure
+            # Set the new displaced structure, the previous tests can not seed it
             converge.structure = self._displace_structure()
+            converge.restart_folder = None
             # Set extra information on verbose info
             converge.settings.inform_details = ', using a displaced structure'
         # Also, make sure the data arrays from previous convergence tests are saved
@@ -444,6 +500,12 @@ class ConvergeWorkChain(WorkChain):
         # criterias later.
         converge.pw_data_org = copy.deepcopy(converge.pw_data)
         converge.k_data_org = copy.deepcopy(converge.k_data)
+        # If the regular tests stopped early, only sample the same points in the relative tests
+        if self.inputs.converge.early_stop.value:
+            if converge.encut_sampling is not None:
+                converge.encut_sampling = converge.encut_sampling[:len(converge.pw_data_org)]
+            if converge.k_sampling is not None:
+                converge.k_sampling = converge.k_sampling[:len(converge.k_data_org)]
         # Emtpy arrays
         converge.pw_data = []
         converge.k_data = []
@@ -464,8 +526,9 @@ class ConvergeWorkChain(WorkChain):
             if converge.run_kpoints_conv_calcs_org:
                 converge.run_kpoints_conv_calcs = True
             self.init_rel_conv()
-            # Set the new compressed structure
+            # Set the new compressed structure, the previous tests can not seed it
             converge.structure = self._compress_structure()
+            converge.restart_folder = None
             # Set extra information on verbose info
             converge.settings.inform_details = ', using a compressed structure'
         # Also, make sure the data arrays from previous convergence tests are saved
@@ -535,6 +598,10 @@ class ConvergeWorkChain(WorkChain):
             converge.k_sampling = [
                 self.inputs.converge.k_course.value - x * stepping for x in range(self.inputs.converge.k_samples.value + 1)
             ]
+            if self.inputs.converge.k_distinct.value:
+                # The displaced and compressed structures are tested for the same spacings, so that
+                # they can be compared point by point
+                converge.k_sampling = distinct_k_samplings(converge.structure, converge.kpoints.reciprocal_cell, converge.k_sampling)
 
     def _set_default_kgrid(self):
         """Sets the default k-point grid for plane wave convergence tests."""
@@ -551,6 +618,7 @@ class ConvergeWorkChain(WorkChain):
 
     def init_converged(self):
         """Prepare to run the final calculation."""
+        self._reset_warm_start()
         # Make sure previous inputs are cleared
         self.ctx.inputs = AttributeDict()
         # Structure should be the same as the initial.
@@ -635,6 +703,62 @@ class ConvergeWorkChain(WorkChain):
         else:
             self.ctx.inputs.kpoints = self.inputs.kpoints
 
+    def _set_warm_start(self):
+        """Restart the next convergence test from the previous one, if requested."""
+        self.ctx.inputs.pop('restart_folder', None)
+        if not self.inputs.converge.warm_start.value:
+            return
+        if self._seeds_warm_start():
+            # The remote folder has to be kept to restart from it
+            self.ctx.inputs.clean_workdir = get_data_node('bool', False)
+        restart_folder = self.ctx.converge.restart_folder
+        if restart_folder is None:
+            return
+        self.ctx.inputs.restart_folder = restart_folder
+        parameters_dict = self.ctx.inputs.parameters.get_dict()
+        # The wave functions can not be read with a different plane wave cutoff or k-point grid,
+        # the charge density can be read for both
+        parameters_dict.update({'istart': 0, 'icharg': 1})
+        # Make sure the next test can be restarted from as well
+        parameters_dict.update({'lcharg': True})
+        self.ctx.inputs.parameters = get_data_node('dict', dict=parameters_dict)
+
+    def _update_warm_start(self, batch):
+        """Warm start the next tests from the last successful test, or, in parallel mode, only from the first."""
+        converge = self.ctx.converge
+        if not self.inputs.converge.warm_start.value or not self._seeds_warm_start():
+            # The tests that do not seed others have cleaned their own remote folders
+            return
+        converge.warm_start_folders += [
+            workchain.outputs.remote_folder.pk for workchain, _, _ in batch if 'remote_folder' in workchain.outputs
+        ]
+        for workchain, _, _ in reversed(batch):
+            if not workchain.exit_status:
+                converge.restart_folder = workchain.outputs.remote_folder
+                break
+        self._clean_warm_start_folders()
+
+    def _seeds_warm_start(self):
+        """Determine if the next tests can seed others, sequential tests all do, parallel ones only the first of a series."""
+        return not self.inputs.converge.parallel.value or self.ctx.converge.restart_folder is None
+
+    def _reset_warm_start(self):
+        """Start a new series of convergence tests from scratch, it has its own seed."""
+        self.ctx.converge.restart_folder = None
+        self._clean_warm_start_folders()
+
+    def _clean_warm_start_folders(self):
+        """Clean the remote folders of the seeds that are no longer restarted from, if clean_workdir is set."""
+        converge = self.ctx.converge
+        keep = None if converge.restart_folder is None else converge.restart_folder.pk
+        superseded = [pk for pk in converge.warm_start_folders if pk != keep]
+        converge.warm_start_folders = [] if keep is None else [keep]
+        if not superseded or not self.inputs.clean_workdir.value:
+            return
+        cleaned = clean_remote_folders(self, [load_node(pk) for pk in superseded])
+        if cleaned and self._verbose:
+            self.report('cleaned the remote folders {} of the convergence tests'.format(' '.join(map(str, cleaned))))
+
     def init_next_workchain(self):
         """Initialize the next workchain calculation."""
 
@@ -676,6 +800,9 @@ class ConvergeWorkChain(WorkChain):
         if self.ctx.set_input_nodes:
             self._set_input_nodes()
 
+        if self.ctx.running_pw or self.ctx.running_kpoints:
+            self._set_warm_start()
+
         # Make sure we do not have any floating dict (convert to Dict) in the input
         self.ctx.inputs = prepare_process_inputs(self.ctx.inputs, namespaces=['relax', 'verify'])
 
@@ -685,6 +812,10 @@ class ConvergeWorkChain(WorkChain):
         running = self.submit(self._next_workchain, **inputs)
         self.report('launching {}<{}> '.format(self._next_workchain.__name__, running.pk))
 
+        if self.ctx.running_pw or self.ctx.running_kpoints:
+            kgrid = self.ctx.converge.settings.kgrid
+            self.ctx.conv_batch.append([running.pk, self.ctx.converge.settings.encut, None if kgrid is None else list(kgrid)])
+
         if self.ctx.running_pw:
             return self.to_context(pw_workchains=append_(running))
         if self.ctx.running_kpoints:
@@ -692,6 +823,98 @@ class ConvergeWorkChain(WorkChain):
 
         return self.to_context(workchains=append_(running))
 
+    def _conv_batch_size(self, num_remaining):
+        """Return how many of the remaining convergence tests to submit at once."""
+        if not self.inputs.converge.parallel.value:
+            return 1
+        if self.inputs.converge.warm_start.value and self.ctx.converge.restart_folder is None:
+            # Run the first test alone, it seeds the others
+            return 1
+        max_concurrent = self.inputs.converge.max_concurrent.value
+        if max_concurrent > 0:
+            return min(max_concurrent, num_remaining)
+        return num_remaining
+
+    def _run_conv_batch(self, init_conv_calc, iteration, num_samples):
+        """Submit the next batch of convergence tests, waiting for all of them in the next step."""
+        self.ctx.conv_batch = []
+        if not self.ctx.converge[iteration]:
+            # A new series of tests, the plane wave cutoff and k-point tests are seeded by their own first test
+            self._reset_warm_start()
+        batch_size = self._conv_batch_size(num_samples - self.ctx.converge[iteration])
+        for _ in range(batch_size):
+            init_conv_calc()
+            self.init_next_workchain()
+            self.run_next_workchain()
+            self.ctx.converge[iteration] += 1
+
+    def _conv_batch_workchains(self, workchains):
+        """
+        Return the workchains of the current batch together with their plane wave cutoff and k-point grid.
+
+        The workchains are appended to the context in the order they finish, so they are matched to the
+        submitted tests by their pk. Returns None if one of them can not be found.
+        """
+        workchains = {workchain.pk: workchain for workchain in workchains}
+        batch = []
+        for pk, encut, kgrid in self.ctx.conv_batch:
+            if pk not in workchains:
+                self.report('There is no {} in the called workchain list.'.format(self._next_workchain.__name__))
+                return None
+            batch.append((workchains[pk], encut, kgrid))
+        return batch
+
+    def _stop_early(self):
+        """
+        Return True if the regular convergence tests should stop as soon as the criterion is met.
+
+        The displacement and compression tests are compared point by point to the regular tests, so
+        instead of stopping early, their sampling is truncated to the points of the regular tests.
+        """
+        return self.inputs.converge.early_stop.value and 'pw_data_org' not in self.ctx.converge
+
+    def run_pw_conv_batch(self):
+        """Submit the next plane wave cutoff convergence calculations, one at a time unless ``parallel`` is set."""
+        self._run_conv_batch(self.init_pw_conv_calc, 'pw_iteration', len(self.ctx.converge.encut_sampling))
+
+    def results_pw_conv_batch(self):
+        """Fetch and store the convergence parameters of the plane wave calculations in the current batch."""
+        batch = self._conv_batch_workchains(self.ctx.pw_workchains)
+        if batch is None:
+            return self.exit_codes.ERROR_NO_CALLED_WORKCHAIN  # pylint: disable=no-member
+        for workchain, encut, _ in batch:
+            self.results_pw_conv_calc(workchain, encut)
+        self._update_warm_start(batch)
+        # Check if the sampling has more entries, if not, do not perform further calculations.
+        if self.ctx.converge.pw_iteration >= len(self.ctx.converge.encut_sampling):
+            self.ctx.converge.run_pw_conv_calcs = False
+        elif self._stop_early() and self._check_pw_converged() is not None:
+            if self._verbose:
+                self.report('the plane wave cutoff is converged, skipping the remaining plane wave cutoff tests')
+            self.ctx.converge.run_pw_conv_calcs = False
+        return self.exit_codes.NO_ERROR  # pylint: disable=no-member
+
+    def run_kpoints_conv_batch(self):
+        """Submit the next k-point grid convergence calculations, one at a time unless ``parallel`` is set."""
+        self._run_conv_batch(self.init_kpoints_conv_calc, 'kpoints_iteration', len(self.ctx.converge.k_sampling))
+
+    def results_kpoints_conv_batch(self):
+        """Fetch and store the convergence parameters of the k-point grid calculations in the current batch."""
+        batch = self._conv_batch_workchains(self.ctx.kpoints_workchains)
+        if batch is None:
+            return self.exit_codes.ERROR_NO_CALLED_WORKCHAIN  # pylint: disable=no-member
+        for workchain, encut, kgrid in batch:
+            self.results_kpoints_conv_calc(workchain, encut, kgrid)
+        self._update_warm_start(batch)
+        # Check if the sampling has more entries, if not, do not perform further calculations.
+        if self.ctx.converge.kpoints_iteration >= len(self.ctx.converge.k_sampling):
+            self.ctx.converge.run_kpoints_conv_calcs = False
+        elif self._stop_early() and self._check_kpoints_converged() is not None:
+            if self._verbose:
+                self.report('the k-point grid is converged, skipping the remaining k-point grid tests')
+            self.ctx.converge.run_kpoints_conv_calcs = False
+        return self.exit_codes.NO_ERROR  # pylint: disable=no-member
+
     def run_pw_conv_calcs(self):
         """Should a new plane wave cutoff convergence calculation run?"""
         return self.ctx.converge.run_pw_conv_calcs
@@ -748,19 +971,12 @@ class ConvergeWorkChain(WorkChain):
                                                                                                  kgrid2=self.ctx.converge.settings.kgrid[2],
                                                                                                  encut=encut) + inform_details)
 
-    def results_pw_conv_calc(self):
-        """Fetch and store the relevant convergence parameters for each plane wave calculation."""
-
-        # Check if there is in fact a workchain present
-        try:
-            workchain = self.ctx.pw_workchains[-1]
-        except IndexError:
-            self.report('There is no {} in the called workchain list.'.format(self._next_workchain.__name__))
-            return self.exit_codes.ERROR_NO_CALLED_WORKCHAIN  # pylint: disable=no-member
+    def results_pw_conv_calc(self, workchain, encut):
+        """Fetch and store the relevant convergence parameters for a plane wave calculation."""
 
         # Check if called workchain was successfull
-        next_workchain_exit_status = self.ctx.pw_workchains[-1].exit_status
-        next_workchain_exit_message = self.ctx.pw_workchains[-1].exit_message
+        next_workchain_exit_status = workchain.exit_status
+        next_workchain_exit_message = workchain.exit_message
         if next_workchain_exit_status:
             exit_code = compose_exit_code(next_workchain_exit_status, next_workchain_exit_message)
             self.report('The called {}<{}> returned a non-zero exit status. '
@@ -768,16 +984,6 @@ class ConvergeWorkChain(WorkChain):
                         'convergence calculation has to be considered failed. Continuing '
                         'the convergence tests.'.format(workchain.__class__.__name__, workchain.pk, exit_code))
 
-        # Update plane wave iteration index.
-        self.ctx.converge.pw_iteration += 1
-        # Check if the index has an entry, if not, do not perform further
-        # calculations.
-        try:
-            self.ctx.converge.encut_sampling[self.ctx.converge.pw_iteration]
-        except IndexError:
-            self.ctx.converge.run_pw_conv_calcs = False
-
-        encut = self.ctx.converge.settings.encut
         if not next_workchain_exit_status:
             misc = workchain.outputs.misc.get_dict()
             # fetch total energy
@@ -786,15 +992,8 @@ class ConvergeWorkChain(WorkChain):
             # fetch max force
             max_force = misc['maximum_force']
 
-            # fetch bands and occupations
-            bands = workchain.outputs.bands
-
-            # fetch band
-            _, gap = find_bandgap(bands)
-            if gap is None:
-                gap = 0.0
-            # Aiida cannot do VBM, yet, so set to zero for now
-            max_valence_band = 0.0
+            # fetch the valence band maximum and band gap
+            max_valence_band, gap = band_edges(misc)
 
             # add stuff to the converge context
             self.ctx.converge.pw_data.append([encut, total_energy, max_force, max_valence_band, gap])
@@ -802,8 +1001,6 @@ class ConvergeWorkChain(WorkChain):
             # add None entries for the failed test
             self.ctx.converge.pw_data.append([encut, None, None, None, None])
 
-        return self.exit_codes.NO_ERROR  # pylint: disable=no-member
-
     def init_kpoints_conv_calc(self):
         """Initialize a single k-point grid convergence calculation."""
 
@@ -834,18 +1031,12 @@ class ConvergeWorkChain(WorkChain):
                         'of {}x{}x{} for a plane wave cutoff of {encut} eV'.format(
                             kgrid[0], kgrid[1], kgrid[2], encut=self.ctx.converge.settings.encut) + inform_details)
 
-    def results_kpoints_conv_calc(self):
-        """Fetch and store the relevant convergence parameters for each k-point grid calculation."""
-
-        try:
-            workchain = self.ctx.kpoints_workchains[-1]
-        except IndexError:
-            self.report('There is no {} in the called workchain list.'.format(self._next_workchain.__name__))
-            return self.exit_codes.ERROR_NO_CALLED_WORKCHAIN  # pylint: disable=no-member
+    def results_kpoints_conv_calc(self, workchain, encut, kgrid):
+        """Fetch and store the relevant convergence parameters for a k-point grid calculation."""
 
         # Check if child workchain was successfull
-        next_workchain_exit_status = self.ctx.kpoints_workchains[-1].exit_status
-        next_workchain_exit_message = self.ctx.kpoints_workchains[-1].exit_message
+        next_workchain_exit_status = workchain.exit_status
+        next_workchain_exit_message = workchain.exit_message
         if next_workchain_exit_status:
             exit_code = compose_exit_code(next_workchain_exit_status, next_workchain_exit_message)
             self.report('The called {}<{}> returned a non-zero exit status. '
@@ -853,17 +1044,6 @@ class ConvergeWorkChain(WorkChain):
                         'convergence calculation has to be considered failed. Continuing '
                         'the convergence tests.'.format(workchain.__class__.__name__, workchain.pk, exit_code))
 
-        # Update kpoints iteration index
-        self.ctx.converge.kpoints_iteration += 1
-        # Check if the index has an entry, if not, do not perform further
-        # calculations
-        try:
-            self.ctx.converge.k_sampling[self.ctx.converge.kpoints_iteration]
-        except IndexError:
-            self.ctx.converge.run_kpoints_conv_calcs = False
-
-        kgrid = self.ctx.converge.settings.kgrid
-        encut = self.ctx.converge.settings.encut
         if not next_workchain_exit_status:
             misc = workchain.outputs.misc.get_dict()
             # fetch total energy
@@ -872,14 +1052,8 @@ class ConvergeWorkChain(WorkChain):
             # fetch max force
             max_force = misc['maximum_force']
 
-            # fetch bands and occupations
-            bands = workchain.outputs.bands
-            # fetch band
-            _, gap = find_bandgap(bands)
-            if gap is None:
-                gap = 0.0
-            # Aiida cannot do VBM, yet, so set to zero for now
-            max_valence_band = 0.0
+            # fetch the valence band maximum and band gap
+            max_valence_band, gap = band_edges(misc)
 
             # add stuff to the converge context
             self.ctx.converge.k_data.append([kgrid[0], kgrid[1], kgrid[2], encut, total_energy, max_force, max_valence_band, gap])
@@ -887,8 +1061,6 @@ class ConvergeWorkChain(WorkChain):
             # add None entries for the failed test
             self.ctx.converge.k_data.append([kgrid[0], kgrid[1], kgrid[2], encut, None, None, None, None])
 
-        return self.exit_codes.NO_ERROR  # pylint: disable=no-member
-
     def analyze_pw_after_comp(self):
         """Return True if we are running compressed convergence tests."""
         return self.inputs.converge.compress.value
@@ -1248,18 +1420,11 @@ class ConvergeWorkChain(WorkChain):
         if len(pw_data) < 2:
             return None
         # Analyze which encut to use further (cutoff_type sets which parameter)
-        encut_okey = False
-        index = 0
         criteria = self._ALLOWED_CUTOFF_TYPES[cutoff_type]
-        # Here we only check two consecutive steps, consider to at least check three,
-        # and pick the first if both steps are within the criteria
-        for encut in range(1, len(pw_data)):
-            delta = abs(pw_data[encut][criteria + 1] - pw_data[encut - 1][criteria + 1])
-            if delta < cutoff_value:
-                encut_okey = True
-                index = encut
-                break
-        if not encut_okey:
+        deltas = [abs(pw_data[encut][criteria + 1] - pw_data[encut - 1][criteria + 1]) for encut in range(1, len(pw_data))]
+        # Pick the first cutoff where ``consecutive`` steps are within the criteria
+        index = first_converged(deltas, cutoff_value, self.inputs.converge.consecutive.value)
+        if index is None:
             # if self._verbose:
             #     self.report('Could not obtain convergence for {cutoff_type} with a cutoff '
             #                 'parameter of {cutoff_value}'.format(cutoff_type=cutoff_type, cutoff_value=cutoff_value))
@@ -1289,18 +1454,11 @@ class ConvergeWorkChain(WorkChain):
         if len(k_data) < 2:
             return None
         # now analyze which k-point grid to use
-        k_cut_okey = False
-        index = 0
         criteria = self._ALLOWED_CUTOFF_TYPES[cutoff_type]
-        # Here we only check two consecutive steps, consider to at least check three,
-        # and pick the first if both steps are within the criteria
-        for k in range(1, len(k_data)):
-            delta = abs(k_data[k][criteria + 4] - k_data[k - 1][criteria + 4])
-            if delta < cutoff_value:
-                k_cut_okey = True
-                index = k
-                break
-        if not k_cut_okey:
+        deltas = [abs(k_data[k][criteria + 4] - k_data[k - 1][criteria + 4]) for k in range(1, len(k_data))]
+        # Pick the first grid where ``consecutive`` steps are within the criteria
+        index = first_converged(deltas, cutoff_value, self.inputs.converge.consecutive.value)
+        if index is None:
             # self.report('Could not find a dense enough grid to obtain a {cutoff_type} '
             #             'cutoff of {cutoff_value})'.format(cutoff_type=cutoff_type, cutoff_value=cutoff_value))
             return None
@@ -1371,6 +1529,34 @@ class ConvergeWorkChain(WorkChain):
         return comp_structure
 
 
+def band_edges(misc):
+    """
+    Return the valence band maximum and the band gap from the 'band_properties' in a misc dictionary.
+
+    Either is zero if it is not defined (e.g. all bands are occupied) or the band properties were not parsed.
+    """
+    band_properties = misc.get('band_properties') or {}
+    max_valence_band = band_properties.get('vbm')
+    gap = band_properties.get('band_gap')
+    return max_valence_band or 0.0, gap or 0.0
+
+
+def first_converged(deltas, cutoff_value, consecutive=1):
+    """
+    Find the first converged sample.
+
+    :param deltas: the differences between each sample and the previous one.
+    :param cutoff_value: the differences have to be smaller than this value.
+    :param consecutive: the number of consecutive differences that have to be smaller than ``cutoff_value``.
+    :return: the index of the converged sample, i.e. the one after the first of the ``consecutive`` differences, or None.
+    """
+    consecutive = max(consecutive, 1)
+    for index in range(len(deltas) - consecutive + 1):
+        if all(delta < cutoff_value for delta in deltas[index:index + consecutive]):
+            return index + 1
+    return None
+
+
 def default_array(name, array):
     """Used to set ArrayData for spec.input."""
     array_cls = get_data_node('array')
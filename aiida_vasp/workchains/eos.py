@@ -0,0 +1,271 @@
+"""
+Equation of state workchain.
+
+----------------------------
+Calculates the total energies of a set of structures with different volumes and fits the
+third order Birch-Murnaghan equation of state to them. All volumes are submitted at the same
+time, optionally with a limit on the number of running calculations, and the equation of state
+is refitted as the energies are collected. As soon as the fitted minimum lies outside of the sampled
+volumes and the ones still to be calculated, new volumes are added around the predicted minimum.
+"""
+# pylint: disable=attribute-defined-outside-init
+import numpy as np
+
+from aiida.engine import WorkChain, while_, calcfunction
+from aiida.orm import load_node
+from aiida.plugins import WorkflowFactory
+
+from aiida_vasp.utils.aiida_utils import get_data_class, get_data_node
+from aiida_vasp.utils.workchains import prepare_process_inputs, ThrottledSubmitMixin
+
+
+class EosWorkChain(ThrottledSubmitMixin, WorkChain):
+    """Fit the equation of state to the total energies of a set of structures with different volumes."""
+
+    _verbose = False
+    _next_workchain_string = 'vasp.vasp'
+    _next_workchain = WorkflowFactory(_next_workchain_string)
+
+    @classmethod
+    def define(cls, spec):
+        super(EosWorkChain, cls).define(spec)
+        spec.expose_inputs(cls._next_workchain, exclude=['structure'])
+        spec.input_namespace('structures',
+                             valid_type=get_data_class('structure'),
+                             dynamic=True,
+                             help="""
+                             The structures with different volumes to calculate.
+                             """)
+        spec.input('eos.max_concurrent',
+                   valid_type=get_data_class('int'),
+                   required=False,
+                   default=get_data_node('int', 0),
+                   help="""
+                   The maximum number of calculations running at the same time, 0 means no limit.
+                   """)
+        spec.input('eos.max_refinements',
+                   valid_type=get_data_class('int'),
+                   required=False,
+                   default=get_data_node('int', 3),
+                   help="""
+                   The maximum number of times new volumes are added because the minimum lies outside of the
+                   sampled volumes. 0 disables the refinement.
+                   """)
+        spec.input('eos.refinement_volumes',
+                   valid_type=get_data_class('int'),
+                   required=False,
+                   default=get_data_node('int', 3),
+                   help="""
+                   The number of volumes added in each refinement.
+                   """)
+        spec.outline(
+            cls.initialize,
+            while_(cls.has_pending_or_running)(
+                cls.run_next_workchains,
+                cls.collect_finished
+            ),
+            cls.finalize
+        )  # yapf: disable
+        spec.output('eos', valid_type=get_data_class('array'), help='the cell volumes and total energies, sorted by volume')
+        spec.output('eos_minimum',
+                    valid_type=get_data_class('dict'),
+                    required=False,
+                    help='the volume, energy, bulk modulus and its pressure derivative at the minimum')
+        spec.exit_code(0, 'NO_ERROR', message='the sun is shining')
+        spec.exit_code(420, 'ERROR_NO_CALLED_WORKCHAIN', message='no called workchain detected')
+        spec.exit_code(430, 'ERROR_NO_MINIMUM', message='the equation of state could not be fitted or has no minimum')
+        spec.exit_code(500, 'ERROR_UNKNOWN', message='unknown error detected in the eos workchain')
+
+    def initialize(self):
+        """Initialize."""
+        self._init_context()
+        self._init_inputs()
+
+    def _init_context(self):
+        """Initialize context variables that are used during the logical flow."""
+        self.ctx.exit_code = self.exit_codes.ERROR_UNKNOWN  # pylint: disable=no-member
+        self._init_throttle([[key, structure.pk] for key, structure in sorted(self.inputs.structures.items())])
+        # The [volume, total energy] of the finished calculations and the structure pk for each volume
+        self.ctx.total_energies = []
+        self.ctx.volume_structures = []
+        self.ctx.fit = None
+        self.ctx.refinements = 0
+
+    def _init_inputs(self):
+        """Initialize inputs."""
+        try:
+            self._verbose = self.inputs.verbose.value
+        except AttributeError:
+            pass
+
+    def _max_concurrent(self):
+        return self.inputs.eos.max_concurrent.value
+
+    def _child_inputs(self, structure):
+        inputs = self.exposed_inputs(self._next_workchain)
+        inputs.structure = structure
+        return prepare_process_inputs(inputs)
+
+    def collect_finished(self):
+        """Collect the energies of the finished calculations, refit and add volumes if the minimum is not enclosed."""
+        collected = False
+        for _, structure_pk, workchain in self._finish_terminated():
+            # Failed calculations are reported when they are collected, their volumes are skipped
+            if not workchain.is_finished_ok:
+                continue
+            volume = load_node(structure_pk).get_cell_volume()
+            total_energy = workchain.outputs.misc.get_dict()['total_energies']['energy_no_entropy']
+            self.ctx.total_energies.append([volume, total_energy])
+            self.ctx.volume_structures.append([volume, structure_pk])
+            collected = True
+
+        if collected:
+            volumes, energies = np.array(sorted(self.ctx.total_energies)).T
+            self.ctx.fit = birch_murnaghan_fit(volumes, energies)
+            if self._verbose and self.ctx.fit is not None:
+                self.report('fitted minimum at volume {volume:.4f} with energy {energy:.6f}'.format(**self.ctx.fit))
+
+        # A fit can place the minimum beyond the volumes that are still calculated, without one all volumes are needed
+        if (collected and self.ctx.fit is not None) or not self.has_pending_or_running():
+            self._refine()
+
+    def _planned_volumes(self):
+        """Return the volumes of the structures that are pending or running."""
+        return [load_node(entry[1]).get_cell_volume() for entry in self.ctx.pending + self.ctx.running]
+
+    def _refine(self):
+        """Add volumes around the predicted minimum if it lies outside of the sampled and the planned volumes."""
+        if not self.ctx.total_energies:
+            return
+        volumes, energies = np.array(sorted(self.ctx.total_energies)).T
+        new_volumes = refinement_volumes(volumes, energies, self.ctx.fit, self.inputs.eos.refinement_volumes.value,
+                                         self._planned_volumes())
+        if not new_volumes:
+            return
+        if self.ctx.refinements >= self.inputs.eos.max_refinements.value:
+            if not self.has_pending_or_running():
+                self.report('the minimum is not enclosed by the sampled volumes, but the maximum number of refinements is reached')
+            return
+        self.ctx.refinements += 1
+        self.report('the minimum is not enclosed by the sampled volumes, adding the volumes {}'.format(', '.join(
+            '{:.4f}'.format(volume) for volume in new_volumes)))
+        for index, volume in enumerate(new_volumes):
+            # Scale the calculated structure closest in volume
+            _, structure_pk = min(self.ctx.volume_structures, key=lambda entry, volume=volume: abs(entry[0] - volume))
+            structure = scaled_structure(load_node(structure_pk), get_data_node('float', volume))
+            self.ctx.pending.append(['refinement_{}_{}'.format(self.ctx.refinements, index), structure.pk])
+
+    def finalize(self):
+        """Attach the energies and the fitted minimum."""
+        if not self.ctx.total_energies:
+            self.report('There are no successful {} calculations.'.format(self._next_workchain.__name__))
+            return self.exit_codes.ERROR_NO_CALLED_WORKCHAIN  # pylint: disable=no-member
+
+        # Due to data provenance we cannot return AiiDA data containers that have
+        # not been passed through a calcfunction, workfunction or a workchain. Create this now.
+        total_energies = store_total_energies(get_data_node('list', list=self.ctx.total_energies))
+        self.out('eos', total_energies)
+        if self.ctx.fit is None:
+            return self.exit_codes.ERROR_NO_MINIMUM  # pylint: disable=no-member
+        self.out('eos_minimum', locate_minimum(total_energies))
+        self.ctx.exit_code = self.exit_codes.NO_ERROR  # pylint: disable=no-member
+        return self.ctx.exit_code
+
+
+def birch_murnaghan_fit(volumes, energies):
+    """
+    Fit the third order Birch-Murnaghan equation of state.
+
+    The Birch-Murnaghan energy is a third order polynomial in V^(-2/3), so the fit is a linear least squares fit.
+
+    :return: dict with the volume, energy, bulk_modulus and bulk_modulus_derivative at the minimum, in the units
+        of the inputs, or None if there are less than four volumes or the fit has no minimum.
+    """
+    volumes = np.asarray(volumes, dtype=float)
+    if len(np.unique(volumes)) < 4:
+        return None
+    polynomial = np.poly1d(np.polyfit(volumes**(-2. / 3.), energies, 3))
+    first, second, third = polynomial.deriv(1), polynomial.deriv(2), polynomial.deriv(3)
+    minima = [root.real for root in first.roots if abs(root.imag) < 1e-12 and root.real > 0 and second(root.real) > 0]
+    if not minima:
+        return None
+    # Take the minimum closest to the sampled volumes
+    x_min = min(minima, key=lambda root: abs(root**(-3. / 2.) - np.mean(volumes)))
+    volume = x_min**(-3. / 2.)
+    # The derivatives with respect to the volume at the minimum
+    d2e_dv2 = 4. / 9. * x_min**5 * second(x_min)
+    d3e_dv3 = -20. / 9. * x_min**(13. / 2.) * second(x_min) - 8. / 27. * x_min**(15. / 2.) * third(x_min)
+    return {
+        'volume': float(volume),
+        'energy': float(polynomial(x_min)),
+        'bulk_modulus': float(volume * d2e_dv2),
+        'bulk_modulus_derivative': float(-1. - volume * d3e_dv3 / d2e_dv2)
+    }
+
+
+def refinement_volumes(volumes, energies, fit, num_volumes, planned_volumes=()):
+    """
+    Volumes to add when the minimum is not enclosed by the sampled volumes.
+
+    The volumes are spaced by the typical relative spacing of the sampled volumes and are centered at the
+    fitted minimum, but at most num_volumes spacings beyond the sampled volumes. Without a fit they continue
+    the sampling beyond the volume with the lowest energy if it is the smallest or the largest volume.
+
+    :param volumes: the sampled volumes, sorted.
+    :param energies: the energies of the sampled volumes.
+    :param fit: the result of ``birch_murnaghan_fit`` or None.
+    :param planned_volumes: the volumes that are still calculated, nothing is added without a fit or if they
+        enclose the fitted minimum.
+    :return: list of the volumes to add, empty if the minimum is enclosed.
+    """
+    volumes = np.asarray(volumes, dtype=float)
+    step = np.median(np.diff(volumes) / volumes[:-1]) if len(volumes) > 1 else 0.05
+    lowest = int(np.argmin(energies))
+    if fit is not None:
+        covered = np.sort(np.concatenate([volumes, np.asarray(planned_volumes, dtype=float)]))
+        if covered[0] <= fit['volume'] <= covered[-1]:
+            return []
+        center = np.clip(fit['volume'], covered[0] * (1 - step)**num_volumes, covered[-1] * (1 + step)**num_volumes)
+        offsets = np.arange(num_volumes) - (num_volumes - 1) / 2.
+        new_volumes = center * (1 + step)**offsets
+        volumes = covered
+    elif len(planned_volumes):
+        return []
+    elif lowest == 0:
+        new_volumes = volumes[0] * (1 - step)**np.arange(1, num_volumes + 1)
+    elif lowest == len(volumes) - 1:
+        new_volumes = volumes[-1] * (1 + step)**np.arange(1, num_volumes + 1)
+    elif len(volumes) < 4:
+        # The minimum is enclosed, but there are too few volumes to fit
+        new_volumes = volumes[lowest] * (1 + step / 2.)**np.array([-1, 1])
+    else:
+        return []
+    # Skip volumes that are already sampled
+    return [float(volume) for volume in sorted(new_volumes) if np.min(np.abs(volumes - volume)) > 1e-3 * volume]
+
+
+@calcfunction
+def scaled_structure(structure, volume):
+    """Scale the cell and the positions of a structure isotropically to the given volume."""
+    scale = (volume.value / structure.get_cell_volume())**(1. / 3.)
+    scaled = structure.clone()
+    scaled.reset_cell((np.array(structure.cell) * scale).tolist())
+    scaled.reset_sites_positions([tuple(np.array(site.position) * scale) for site in structure.sites])
+    return scaled
+
+
+@calcfunction
+def store_total_energies(total_energies):
+    """Store the volumes and total energies, sorted by volume, in ArrayData."""
+    total_energies_array = np.array(total_energies.get_list())
+    array_data = get_data_class('array')()
+    array_data.set_array('eos', total_energies_array[total_energies_array[:, 0].argsort()])
+
+    return array_data
+
+
+@calcfunction
+def locate_minimum(total_energies):
+    """Fit the Birch-Murnaghan equation of state and return its minimum."""
+    total_energies_array = total_energies.get_array('eos')
+    return get_data_node('dict', dict=birch_murnaghan_fit(total_energies_array[:, 0], total_energies_array[:, 1]))
@@ -69,17 +69,9 @@ class MasterWorkChain(WorkChain):
             cls.init_workchain,
             cls.run_next_workchain,
             cls.verify_next_workchain,
-            if_(cls.extract_bands)(
-                cls.init_bands,
-                cls.init_workchain,
-                cls.run_next_workchain,
-                cls.verify_next_workchain
-            ),
-            if_(cls.extract_dos)(
-                cls.init_dos,
-                cls.init_workchain,
-                cls.run_next_workchain,
-                cls.verify_next_workchain
+            if_(cls.extract_bands_or_dos)(
+                cls.run_bands_and_dos,
+                cls.verify_bands_and_dos
             ),
             cls.finalize
         )  # yapf: disable
@@ -170,6 +162,10 @@ class MasterWorkChain(WorkChain):
         self._next_workchain = self._dos_workchain
         self._enable_charge_density_restart()
         self._clean_inputs(exclude=['converge', 'relax', 'verify', 'dos'])
+        # Keep the charge density of the previous calculation fixed
+        parameters = self.ctx.inputs.parameters.get_dict()
+        parameters.update({'icharg': 11})
+        self.ctx.inputs.parameters = get_data_node('dict', dict=parameters)
         # Fetch density of states k-points
         self.ctx.inputs.kpoints = self._get_kpoints(self.inputs.dos)
         # Make sure we parse the density of states
@@ -191,6 +187,12 @@ class MasterWorkChain(WorkChain):
         self.ctx.inputs.restart_folder = self.ctx.workchains[-1].outputs.remote_folder
         # Also enable the clean_workdir again
         self.ctx.inputs.clean_workdir = get_data_node('bool', True)
+        # The bands and density of states calculations run at the same time from the same folder. They
+        # only read the charge density and write neither CHGCAR nor WAVECAR, so the CHGCAR is symlinked
+        # into their folders instead of copied and the restart folder is left untouched.
+        parameters = self.ctx.inputs.parameters.get_dict()
+        parameters.update({'istart': 0, 'lcharg': False, 'lwave': False})
+        self.ctx.inputs.parameters = get_data_node('dict', dict=parameters)
 
     def _clean_inputs(self, exclude):
         """Clean the inputs for the next workchain in order not to pass redundant inputs."""
@@ -226,11 +228,41 @@ class MasterWorkChain(WorkChain):
 
         return self.to_context(workchains=append_(running))
 
-    def verify_next_workchain(self):
+    def run_bands_and_dos(self):
+        """Run the band structure and density of states workchains at the same time, both restarting from the last workchain."""
+        inputs = self.ctx.inputs
+        running = {}
+        for name, init in [('bands', self.init_bands), ('dos', self.init_dos)]:
+            if not getattr(self, 'extract_' + name)():
+                continue
+            self.ctx.inputs = AttributeDict(inputs)
+            init()
+            self.init_workchain()
+            running[name] = self.submit(self._next_workchain, **self.ctx.inputs)
+            self.report('launching {}<{}> '.format(self._next_workchain.__name__, running[name].pk))
+        self.ctx.inputs = inputs
+
+        return self.to_context(**{name + '_workchain': workchain for name, workchain in running.items()})
+
+    def verify_bands_and_dos(self):
+        """Inherit the exit status from the band structure or density of states workchain, if one failed."""
+        for name, workchain_class in [('bands', self._bands_workchain), ('dos', self._dos_workchain)]:
+            if not getattr(self, 'extract_' + name)():
+                continue
+            self._next_workchain = workchain_class
+            exit_code = self.verify_next_workchain(self.ctx.get(name + '_workchain'))
+            if exit_code.status:
+                return exit_code
+        return self.ctx.exit_code
+
+    def verify_next_workchain(self, workchain=None):
         """Inherit exit status from child workchains."""
-        try:
-            workchain = self.ctx.workchains[-1]
-        except IndexError:
+        if workchain is None:
+            try:
+                workchain = self.ctx.workchains[-1]
+            except IndexError:
+                workchain = None
+        if workchain is None:
             self.report('There is no {} in the called workchain list.'.format(self._next_workchain.__name__))
             return self.exit_codes.ERROR_NO_CALLED_WORKCHAIN  # pylint: disable=no-member
 
@@ -255,15 +287,14 @@ class MasterWorkChain(WorkChain):
         """Determines if we should extract the density of states."""
         return self.inputs.extract_dos.value
 
-    def loop_structures(self):
-        """Determine if we should continue to calculate structures."""
-        return len(self.ctx.structures.get_list()) > 0
+    def extract_bands_or_dos(self):
+        """Determines if we should extract the band structure or the density of states."""
+        return self.extract_bands() or self.extract_dos()
 
     def finalize(self):
         """Finalize the workchain."""
 
-        workchain = self.ctx.workchains[-1]
         if self.extract_bands():
-            self.out_many(self.exposed_outputs(workchain, self._bands_workchain, namespace='bands'))
+            self.out_many(self.exposed_outputs(self.ctx.bands_workchain, self._bands_workchain, namespace='bands'))
         if self.extract_dos():
-            self.out_many(self.exposed_outputs(workchain, self._dos_workchain, namespace='dos'))
+            self.out_many(self.exposed_outputs(self.ctx.dos_workchain, self._dos_workchain, namespace='dos'))
@@ -15,7 +15,7 @@ from aiida.engine import WorkChain, append_, while_, if_
 from aiida.plugins import WorkflowFactory
 
 from aiida_vasp.utils.aiida_utils import get_data_class, get_data_node
-from aiida_vasp.utils.workchains import compare_structures, prepare_process_inputs, compose_exit_code
+from aiida_vasp.utils.workchains import compare_structures, prepare_process_inputs, compose_exit_code, clean_remote_folders
 
 
 class RelaxWorkChain(WorkChain):
@@ -157,7 +157,8 @@ class RelaxWorkChain(WorkChain):
                    default=get_data_node('float', 0.01),
                    help="""
                    The cutoff value for the convergence check on positions. If ``convergence_absolute``
-                   is True in AA, otherwise in relative difference.
+                   is True in AA, otherwise relative to the cube root of the cell volume. The displacements
+                   are taken between the closest periodic images of each site.
                    """)
         spec.input('relax.convergence_shape_lengths',
                    valid_type=get_data_class('float'),
@@ -176,6 +177,19 @@ class RelaxWorkChain(WorkChain):
                    The cutoff value for the convergence check on the angles of the unit cell.
                    If ``convergence_absolute`` is True in degrees, otherwise in relative difference.
                    """)
+        spec.input('relax.stages',
+                   valid_type=get_data_class('list'),
+                   required=False,
+                   help="""
+                   The cheaper stages that run before the relaxation with the target settings. Each stage
+                   is a dictionary with the optional entries 'parameters' (INCAR tags that replace the
+                   target ones, e.g. ENCUT, PREC or EDIFFG), 'kpoints_scale' (factor applied to each
+                   dimension of the k-point mesh) and 'steps' (the number of ionic steps). Each stage and the
+                   first relaxation with the target settings start from the structure and the wavefunctions
+                   of the previous stage, or its charge density if the k-point mesh, ENCUT or PREC change.
+                   The remote folder of a stage is kept until the next one has finished, then it is cleaned
+                   if ``clean_workdir`` is set.
+                   """)
         spec.exit_code(0, 'NO_ERROR', message='the sun is shining')
         spec.exit_code(300,
                        'ERROR_MISSING_REQUIRED_OUTPUT',
@@ -273,6 +287,7 @@ class RelaxWorkChain(WorkChain):
         self._init_inputs()
         self._init_structure()
         self._init_settings()
+        return self._init_stages()
 
     def _init_context(self):
         """Store exposed inputs in the context."""
@@ -281,6 +296,12 @@ class RelaxWorkChain(WorkChain):
         self.ctx.iteration = 0
         self.ctx.workchains = []
         self.ctx.inputs = AttributeDict()
+        self.ctx.relaxing = self.perform_relaxation()
+        self.ctx.stages = []
+        # The index of the stage that runs, None for the relaxation with the target settings
+        self.ctx.stage = None
+        # The remote folder of the stage the running relaxation restarts from
+        self.ctx.stage_folder = None
 
     def _init_structure(self):
         """Initialize the structure."""
@@ -302,6 +323,24 @@ class RelaxWorkChain(WorkChain):
                 settings.parser_settings = dict_entry
         self.ctx.inputs.settings = settings
 
+    def _init_stages(self):
+        """Initialize the stages of a staged relaxation."""
+        if not self.perform_relaxation() or 'stages' not in self.inputs.relax:
+            return None
+        stages = self.inputs.relax.stages.get_list()
+        for stage in stages:
+            try:
+                unknown = set(stage) - {'parameters', 'kpoints_scale', 'steps'}
+                if unknown:
+                    raise ValueError('unknown entries in the relaxation stage: {}'.format(', '.join(sorted(unknown))))
+                check_parameters_relax_entries(stage.get('parameters', {}))
+            except (ValueError, TypeError) as err:
+                self.report('Invalid relaxation stage {}: {}'.format(stage, err))
+                return compose_exit_code(self.exit_codes.ERROR_OVERRIDE_PARAMETERS.status, str(err))  # pylint: disable=no-member
+        self.ctx.stages = stages
+        self.ctx.target_parameters = AttributeDict({key.lower(): value for key, value in self.ctx.inputs.parameters.items()})
+        return None
+
     def _init_inputs(self):
         """Initialize the inputs."""
         self.ctx.inputs.parameters = self._init_parameters()
@@ -315,11 +354,13 @@ class RelaxWorkChain(WorkChain):
         """Set default settings."""
 
     def run_next_workchains(self):
-        within_max_iterations = bool(self.ctx.iteration < self.inputs.relax.convergence_max_iterations)
+        # The stages come on top of the relaxations with the target settings
+        within_max_iterations = bool(self.ctx.iteration < self.inputs.relax.convergence_max_iterations.value + len(self.ctx.stages))
         return bool(within_max_iterations and not self.ctx.is_converged)
 
     def init_relaxed(self):
         """Initialize a calculation based on a relaxed or assumed relaxed structure."""
+        self.ctx.relaxing = False
         if not self.perform_relaxation():
             if self._verbose:
                 self.report('skipping structure relaxation and forwarding input/output to the next workchain.')
@@ -350,9 +391,46 @@ class RelaxWorkChain(WorkChain):
         # Add exposed inputs
         self.ctx.inputs.update(self.exposed_inputs(self._next_workchain))
 
+        if self.ctx.relaxing and self.ctx.stages:
+            self._init_stage()
+
         # Make sure we do not have any floating dict (convert to Dict)
         self.ctx.inputs = prepare_process_inputs(self.ctx.inputs, namespaces=['verify'])
 
+    def _init_stage(self):
+        """Set the parameters and k-points of the next relaxation stage and warm start it from the previous stage."""
+        previous_stage = self.ctx.stage
+        previous_basis = self.ctx.get('basis')
+        self.ctx.stage = self.ctx.iteration - 1 if self.ctx.iteration <= len(self.ctx.stages) else None
+
+        parameters = AttributeDict(self.ctx.target_parameters)
+        if self.ctx.stage is not None:
+            stage = self.ctx.stages[self.ctx.stage]
+            parameters.update({key.lower(): value for key, value in stage.get('parameters', {}).items()})
+            if 'steps' in stage:
+                parameters.nsw = stage['steps']
+            if 'kpoints_scale' in stage and 'kpoints' in self.ctx.inputs:
+                self.ctx.inputs.kpoints = scaled_kpoints_mesh(self.ctx.inputs.kpoints, stage['kpoints_scale'])
+            # The next stage starts from the files of this one, so they are written and kept
+            parameters.update({'lwave': True, 'lcharg': True})
+            self.ctx.inputs.clean_workdir = get_data_node('bool', False)
+            if self._verbose:
+                self.report('running relaxation stage {} of {}'.format(self.ctx.stage + 1, len(self.ctx.stages)))
+        self.ctx.basis = wavefunction_basis(parameters, self.ctx.inputs.get('kpoints'))
+
+        if previous_stage is not None:
+            # Start from the wavefunctions of the previous stage, which can only be read for the same k-point
+            # mesh, cutoff and precision, else from its charge density
+            self.ctx.inputs.restart_folder = self.ctx.workchains[-1].outputs.remote_folder
+            self.ctx.stage_folder = self.ctx.inputs.restart_folder
+            if previous_basis['kpoints_mesh'] is not None and previous_basis == self.ctx.basis:
+                parameters.update({'istart': 1, 'icharg': 0})
+            else:
+                parameters.update({'istart': 0, 'icharg': 1})
+        elif 'restart_folder' not in self.inputs:
+            self.ctx.inputs.pop('restart_folder', None)
+        self.ctx.inputs.parameters = parameters
+
     def run_next_workchain(self):
         """Run the next workchain."""
         inputs = self.ctx.inputs
@@ -380,6 +458,7 @@ class RelaxWorkChain(WorkChain):
         next_workchain_exit_message = workchain.exit_message
         if not next_workchain_exit_status:
             self.ctx.exit_code = self.exit_codes.NO_ERROR  # pylint: disable=no-member
+            self._clean_stage_folder()
         else:
             self.ctx.exit_code = compose_exit_code(next_workchain_exit_status, next_workchain_exit_message)
             self.report('The called {}<{}> returned a non-zero exit status. '
@@ -387,6 +466,20 @@ class RelaxWorkChain(WorkChain):
 
         return self.ctx.exit_code
 
+    def _clean_stage_folder(self):
+        """
+        Clean the remote folder of the stage the finished relaxation restarted from, if clean_workdir is set.
+
+        The relaxation that read its files has finished and no later relaxation restarts from it.
+        """
+        stage_folder = self.ctx.stage_folder
+        self.ctx.stage_folder = None
+        if stage_folder is None or not self.inputs.clean_workdir.value:
+            return
+        cleaned = clean_remote_folders(self, [stage_folder])
+        if cleaned and self._verbose:
+            self.report('cleaned the remote folder {} of the relaxation stage'.format(cleaned[0]))
+
     def analyze_convergence(self):
         """
         Analyze the convergence of the relaxation.
@@ -405,6 +498,10 @@ class RelaxWorkChain(WorkChain):
         self.ctx.previous_structure = self.ctx.current_structure
         self.ctx.current_structure = workchain.outputs.structure
 
+        if self.ctx.stage is not None:
+            # The stages only bring the structure closer to the minimum, the convergence is checked with the target settings
+            return self.exit_codes.NO_ERROR  # pylint: disable=no-member
+
         converged = True
         if self.inputs.relax.convergence_on.value:
             if self._verbose:
@@ -452,22 +549,10 @@ class RelaxWorkChain(WorkChain):
 
     def check_positions_convergence(self, delta):
         """Check the convergence of the atomic positions, given a cutoff."""
-        try:
-            positions_converged = bool(np.nanmax(delta.pos_lengths) <= self.inputs.relax.convergence_positions.value)
-        except RuntimeWarning:
-            # Here we encountered the case of having one atom centered at the origin, so
-            # we do not know if it is converged, so settings it to False
-            self.report('there is NaN entries in the relative comparison for '
-                        'the positions during relaxation, assuming position is not converged')
-            positions_converged = False
-
+        positions_converged = bool(np.max(delta.pos_lengths) <= self.inputs.relax.convergence_positions.value)
         if not positions_converged:
-            try:
-                self.report('max site position change is {}, tolerance is {}'.format(np.nanmax(delta.pos_lengths),
-                                                                                     self.inputs.relax.convergence_positions.value))
-            except RuntimeWarning:
-                pass
-
+            self.report('max site position change is {}, tolerance is {}'.format(np.max(delta.pos_lengths),
+                                                                                 self.inputs.relax.convergence_positions.value))
         return positions_converged
 
     def store_relaxed(self):
@@ -494,6 +579,32 @@ class RelaxWorkChain(WorkChain):
         return self.inputs.relax.perform.value
 
 
+def kpoints_mesh(kpoints):
+    """Return the k-point mesh as a list, or None if the k-points are given explicitly."""
+    try:
+        mesh, _ = kpoints.get_kpoints_mesh()
+    except AttributeError:
+        return None
+    return list(mesh)
+
+
+def wavefunction_basis(parameters, kpoints):
+    """Return the settings that determine whether the WAVECAR of one calculation can be read by another."""
+    prec = parameters.get('prec')
+    return {'kpoints_mesh': kpoints_mesh(kpoints), 'encut': parameters.get('encut'), 'prec': None if prec is None else str(prec).lower()}
+
+
+def scaled_kpoints_mesh(kpoints, scale):
+    """Return k-points with each dimension of the mesh scaled, rounded up, or the k-points if they are given explicitly."""
+    try:
+        mesh, offset = kpoints.get_kpoints_mesh()
+    except AttributeError:
+        return kpoints
+    scaled = get_data_class('array.kpoints')()
+    scaled.set_kpoints_mesh([max(1, int(np.ceil(dimension * scale - 1e-8))) for dimension in mesh], offset)
+    return scaled
+
+
 def check_parameters_relax_entries(parameters):
     """Check that some relaxation flags are not present in the parameters (no override is allowed)."""
 
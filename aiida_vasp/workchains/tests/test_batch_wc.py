@@ -0,0 +1,144 @@
+"""Test the bookkeeping of the batch workchains, by running their steps without the engine."""
+# pylint: disable=unused-import,wildcard-import,unused-wildcard-import,unused-argument,redefined-outer-name,no-member
+import pytest
+from aiida.common.extendeddicts import AttributeDict
+
+from aiida_vasp.utils.fixtures import *
+from aiida_vasp.utils.aiida_utils import get_data_node
+
+
+def silicon(lattice_constant=5.4):
+    structure = get_data_node('structure', cell=[[lattice_constant, 0., 0.], [0., lattice_constant, 0.], [0., 0., lattice_constant]])
+    structure.append_atom(position=(0., 0., 0.), symbols='Si')
+    return structure.store()
+
+
+def batch_steps(workchain_class, structures, max_concurrent, group=None):
+    """Return the batch workchain, ready to run its steps, for the given structures."""
+    from aiida_vasp.utils.fixtures.workchains import workchain_steps
+    inputs = AttributeDict({'structures': structures, 'max_concurrent': get_data_node('int', max_concurrent)})
+    if group is not None:
+        inputs.group = get_data_node('str', group)
+    return workchain_steps(workchain_class, inputs, exposed_inputs={'parameters': get_data_node('dict', dict={'encut': 300})})
+
+
+def test_batch_max_concurrent(fresh_aiida_env):
+    """Never run more than max_concurrent children and refill the freed slots when the oldest child finishes."""
+    from aiida_vasp.workchains.batch import BatchWorkChain
+    from aiida_vasp.utils.fixtures.workchains import workflow_node, terminate_workflow_node
+
+    structures = {'s{}'.format(i): silicon(5.0 + 0.1 * i) for i in range(5)}
+    workchain = batch_steps(BatchWorkChain, structures, 2)
+    children = [workflow_node({'misc': get_data_node('dict', dict={'index': i})}, terminated=False) for i in range(5)]
+    workchain.children.extend(children)
+
+    assert workchain.initialize() is None
+    assert workchain.has_pending_or_running()
+    workchain.run_next_workchains()
+    assert len(workchain.submitted) == 2
+    assert workchain.ctx.oldest_workchain.pk == children[0].pk
+
+    # The second child finishes first, the engine only continues when the oldest has finished as well
+    # and both slots are refilled at once
+    terminate_workflow_node(children[1])
+    terminate_workflow_node(children[0])
+    workchain.collect_finished()
+    assert not workchain.ctx.running
+    assert [key for key, _, _ in workchain.ctx.finished] == ['s0', 's1']
+    workchain.run_next_workchains()
+    assert [key for key, _, _ in workchain.ctx.running] == ['s2', 's3']
+    assert workchain.ctx.oldest_workchain.pk == children[2].pk
+
+    for child in children[2:4]:
+        terminate_workflow_node(child)
+    workchain.collect_finished()
+    workchain.run_next_workchains()
+    assert [key for key, _, _ in workchain.ctx.running] == ['s4']
+    terminate_workflow_node(children[4])
+    workchain.collect_finished()
+    assert not workchain.has_pending_or_running()
+
+    # Every child got the shared inputs and its own structure
+    assert [submitted.structure.pk for submitted in workchain.submitted] == [structures[key].pk for key in sorted(structures)]
+    assert all(submitted.parameters.get_dict() == {'encut': 300} for submitted in workchain.submitted)
+
+    assert workchain.finalize().status == 0
+    assert sorted(workchain.outputs) == ['misc.s{}'.format(i) for i in range(5)]
+    assert workchain.outputs['misc.s3'].get_dict() == {'index': 3}
+
+
+def test_batch_group(fresh_aiida_env):
+    """The structures of the group are run in addition to the explicit ones, labelled by their pk."""
+    from aiida.orm import Group
+    from aiida_vasp.workchains.batch import BatchWorkChain
+    from aiida_vasp.utils.fixtures.workchains import workflow_node
+
+    explicit = silicon()
+    grouped = [silicon(5.5), silicon(5.6)]
+    group = Group(label='batch_structures').store()
+    group.add_nodes(grouped + [get_data_node('int', 1).store()])
+    workchain = batch_steps(BatchWorkChain, {'explicit': explicit}, 0, group='batch_structures')
+    workchain.children.extend([workflow_node() for _ in range(3)])
+
+    workchain.initialize()
+    keys = ['explicit'] + ['structure_{}'.format(structure.pk) for structure in grouped]
+    assert sorted(key for key, _ in workchain.ctx.pending) == sorted(keys)
+
+    # Without a limit all children are submitted at once
+    workchain.run_next_workchains()
+    assert len(workchain.submitted) == 3
+    assert sorted(submitted.structure.pk for submitted in workchain.submitted) == sorted([explicit.pk] + [s.pk for s in grouped])
+
+
+def test_batch_no_structures(fresh_aiida_env):
+    """Without any structures the batch workchain stops right away."""
+    from aiida_vasp.workchains.batch import BatchWorkChain
+    workchain = batch_steps(BatchWorkChain, {}, 2)
+    assert workchain.initialize().status == 421
+
+
+def test_batch_failed_child(fresh_aiida_env):
+    """The outputs of the successful children are collected, a failed child fails the batch."""
+    from aiida_vasp.workchains.batch import BatchWorkChain
+    from aiida_vasp.utils.fixtures.workchains import workflow_node
+
+    workchain = batch_steps(BatchWorkChain, {'good': silicon(), 'bad': silicon(5.5)}, 2)
+    # The children are submitted in the order of the keys
+    workchain.children.extend([workflow_node(exit_status=300), workflow_node({'misc': get_data_node('dict', dict={})})])
+
+    workchain.initialize()
+    while workchain.has_pending_or_running():
+        workchain.run_next_workchains()
+        workchain.collect_finished()
+
+    assert workchain.finalize().status == 410
+    assert list(workchain.outputs) == ['misc.good']
+    assert any('bad' in report and '300' in report for report in workchain.reports)
+
+
+@pytest.mark.parametrize(['workchain_name', 'child_outputs'], [
+    ('RelaxBatchWorkChain', {
+        'misc': ('dict', 'misc.s0'),
+        'relax__structure': ('structure', 'structure.s0')
+    }),
+    ('MasterBatchWorkChain', {
+        'bands__bands': ('array.bands', 'bands.s0'),
+        'dos__dos': ('array', 'dos.s0')
+    }),
+])
+def test_batch_variant_outputs(fresh_aiida_env, workchain_name, child_outputs):
+    """The relax and master variants collect the outputs from the namespaces of their children."""
+    from aiida_vasp.workchains import batch
+    from aiida_vasp.utils.fixtures.workchains import workflow_node
+
+    workchain = batch_steps(getattr(batch, workchain_name), {'s0': silicon()}, 1)
+    outputs = {link_label: get_data_node(data_type) for link_label, (data_type, _) in child_outputs.items()}
+    workchain.children.append(workflow_node(outputs))
+
+    workchain.initialize()
+    workchain.run_next_workchains()
+    workchain.collect_finished()
+    assert workchain.finalize().status == 0
+    assert sorted(workchain.outputs) == sorted(label for _, label in child_outputs.values())
+    for link_label, (_, label) in child_outputs.items():
+        assert workchain.outputs[label].uuid == outputs[link_label].uuid
@@ -95,8 +95,9 @@ def test_converge_wc(fresh_aiida_env, potentials, mock_vasp):
 
 @pytest.mark.skip(reason='Too slow')
 @pytest.mark.wc
-def test_converge_wc_pw(fresh_aiida_env, vasp_params, potentials, mock_vasp):
-    """Test submitting only, not correctness, with mocked vasp code."""
+@pytest.mark.parametrize('parallel', [False, True])
+def test_converge_wc_pw(fresh_aiida_env, vasp_params, potentials, mock_vasp, parallel):
+    """Test submitting only, not correctness, with mocked vasp code, running the tests one after the other or at once."""
     from aiida.orm import Code
     from aiida.plugins import WorkflowFactory
     from aiida.engine import run
@@ -143,6 +144,8 @@ def test_converge_wc_pw(fresh_aiida_env, vasp_params, potentials, mock_vasp):
     converge.displace = get_data_node('bool', False)
     converge.encut_samples = get_data_node('int', 3)
     converge.k_samples = get_data_node('int', 3)
+    converge.parallel = get_data_node('bool', parallel)
+    converge.max_concurrent = get_data_node('int', 2)
     inputs.relax = relax
     inputs.converge = converge
     inputs.verbose = get_data_node('bool', True)
@@ -154,6 +157,131 @@ def test_converge_wc_pw(fresh_aiida_env, vasp_params, potentials, mock_vasp):
         conv_data = conv_data.get_array('pw_regular')
     except KeyError:
         pytest.fail('Did not find pw_regular in convergence.data')
-    conv_data_test = np.array([[200.0, -10.77974998, 0.0, 0.0, 0.5984], [250.0, -10.80762044, 0.0, 0.0, 0.5912],
-                               [300.0, -10.82261992, 0.0, 0.0, 0.5876]])
+    conv_data_test = np.array([[200.0, -10.77974998, 0.0, 6.0254, 0.5984], [250.0, -10.80762044, 0.0, 6.0121, 0.5912],
+                               [300.0, -10.82261992, 0.0, 6.0041, 0.5876]])
     np.testing.assert_allclose(conv_data, conv_data_test)
+
+
+def test_first_converged():
+    """The first sample after ``consecutive`` differences within the cutoff is converged."""
+    from aiida_vasp.workchains.converge import first_converged
+    deltas = [0.5, 0.005, 0.2, 0.005, 0.001, 0.3]
+    assert first_converged(deltas, 0.01) == 2
+    assert first_converged(deltas, 0.01, consecutive=2) == 4
+    assert first_converged(deltas, 0.01, consecutive=3) is None
+    assert first_converged([], 0.01) is None
+
+
+def conv_batch_steps(parallel, warm_start, max_concurrent):
+    """Return a ConvergeWorkChain, ready to run the plane wave cutoff tests in batches."""
+    from aiida_vasp.workchains.converge import ConvergeWorkChain
+    from aiida_vasp.utils.fixtures.workchains import workchain_steps
+    converge = AttributeDict({
+        'parallel': get_data_node('bool', parallel),
+        'warm_start': get_data_node('bool', warm_start),
+        'max_concurrent': get_data_node('int', max_concurrent)
+    })
+    workchain = workchain_steps(ConvergeWorkChain, AttributeDict({'converge': converge}))
+    workchain.ctx.inputs = AttributeDict()
+    workchain.ctx.converge = AttributeDict({
+        'parameters': get_data_node('dict', dict={'encut': 200}),
+        'settings': AttributeDict({
+            'encut': None,
+            'kgrid': None,
+            'supplied_kmesh': True
+        }),
+        'encut_sampling': [200, 250, 300, 350, 400],
+        'pw_iteration': 0,
+        'restart_folder': None,
+        'warm_start_folders': []
+    })
+    # The inputs of the tests themselves are not of interest here
+    workchain.init_next_workchain = lambda: None
+    return workchain
+
+
+@pytest.mark.parametrize(['parallel', 'max_concurrent', 'batch_sizes'], [(False, 0, [1, 1, 1, 1, 1]), (True, 0, [5]), (True, 2, [2, 2, 1])])
+def test_conv_batch(fresh_aiida_env, parallel, max_concurrent, batch_sizes):
+    """The tests are submitted in batches and the finished workchains are matched to their cutoffs by pk."""
+    # pylint: disable=protected-access
+    from aiida_vasp.utils.fixtures.workchains import workflow_node
+    workchain = conv_batch_steps(parallel, False, max_concurrent)
+    children = [workflow_node() for _ in range(5)]
+    workchain.children.extend(children)
+
+    submitted = 0
+    for batch_size in batch_sizes:
+        assert workchain._conv_batch_size(5 - submitted) == batch_size
+        workchain.run_pw_conv_batch()
+        assert len(workchain.ctx.conv_batch) == batch_size
+        submitted += batch_size
+        assert workchain.ctx.converge.pw_iteration == submitted
+        # The workchains are appended to the context in the order they finish
+        batch = workchain._conv_batch_workchains(list(reversed(workchain.ctx.pw_workchains)))
+        expected = list(zip(children, [200, 250, 300, 350, 400]))[submitted - batch_size:submitted]
+        assert [(node.pk, encut) for node, encut, _ in batch] == [(child.pk, encut) for child, encut in expected]
+    assert not workchain.children
+
+    # A workchain of the batch that is missing from the context can not be matched
+    assert workchain._conv_batch_workchains(workchain.ctx.pw_workchains[:-1]) is None
+    assert workchain.reports
+
+
+def test_conv_batch_warm_start(fresh_aiida_env, localhost):
+    """With a warm start, the first test of a series runs alone and seeds the others."""
+    # pylint: disable=protected-access
+    from aiida_vasp.utils.fixtures.workchains import workflow_node
+    workchain = conv_batch_steps(True, True, 0)
+    assert workchain._conv_batch_size(5) == 1
+    workchain.ctx.converge.restart_folder = get_data_node('remote', computer=localhost, remote_path='/tmp/seed').store()
+    assert workchain._conv_batch_size(4) == 4
+    # A new series starts from scratch again
+    workchain.children.append(workflow_node())
+    workchain.run_pw_conv_batch()
+    assert workchain.ctx.converge.restart_folder is None
+    assert len(workchain.ctx.conv_batch) == 1
+
+
+@pytest.mark.parametrize('parallel', [False, True])
+def test_conv_warm_start_clean(fresh_aiida_env, localhost, monkeypatch, parallel):
+    """Only the seeds keep their remote folders, they are cleaned once superseded and failures are reported."""
+    # pylint: disable=protected-access
+    from aiida.orm import RemoteData
+    from aiida_vasp.utils.fixtures.workchains import workflow_node
+    cleaned = []
+
+    def clean(remote_folder):
+        if remote_folder.get_remote_path() == '/tmp/broken':
+            raise OSError('permission denied')
+        cleaned.append(remote_folder.pk)
+
+    monkeypatch.setattr(RemoteData, '_clean', clean)
+    workchain = conv_batch_steps(parallel, True, 0)
+    workchain.inputs.clean_workdir = get_data_node('bool', True)
+    remote_folders = [get_data_node('remote', computer=localhost, remote_path=path).store() for path in ['/tmp/a', '/tmp/broken', '/tmp/b']]
+
+    def run_test(remote_folder):
+        workchain.ctx.inputs = AttributeDict({'parameters': get_data_node('dict', dict={}), 'clean_workdir': get_data_node('bool', True)})
+        workchain._set_warm_start()
+        workchain._update_warm_start([(workflow_node({'remote_folder': remote_folder}), 200, None)])
+        return workchain.ctx.inputs.clean_workdir.value
+
+    # The first test seeds the second one
+    assert not run_test(remote_folders[0])
+    assert workchain.ctx.converge.restart_folder.pk == remote_folders[0].pk
+    assert run_test(remote_folders[1]) is parallel
+    if parallel:
+        # The other tests of a parallel series clean their own remote folders and the seed is kept
+        assert workchain.ctx.converge.warm_start_folders == [remote_folders[0].pk]
+        assert not cleaned and not workchain.reports
+    else:
+        # Sequential tests seed the next one, the superseded seeds are cleaned and failures are reported
+        assert workchain.ctx.converge.restart_folder.pk == remote_folders[1].pk
+        assert cleaned == [remote_folders[0].pk]
+        run_test(remote_folders[2])
+        assert cleaned == [remote_folders[0].pk]
+        assert any(str(remote_folders[1].pk) in report and 'permission denied' in report for report in workchain.reports)
+    # A new series cleans the last seed
+    workchain._reset_warm_start()
+    assert cleaned[-1] == remote_folders[0 if parallel else 2].pk
+    assert not workchain.ctx.converge.warm_start_folders
@@ -0,0 +1,159 @@
+"""Test the equation of state fit and refinement of the EosWorkChain."""
+# pylint: disable=unused-import,wildcard-import,unused-wildcard-import,unused-argument,redefined-outer-name,no-member
+import numpy as np
+import pytest
+from aiida.common.extendeddicts import AttributeDict
+
+from aiida_vasp.utils.fixtures import *
+from aiida_vasp.utils.aiida_utils import get_data_node
+
+
+def birch_murnaghan(volumes, energy=-10.0, volume=40.0, bulk_modulus=0.6, bulk_modulus_derivative=4.5):
+    """The third order Birch-Murnaghan energy."""
+    eta = (volume / volumes)**(2. / 3.)
+    return energy + 9. * volume * bulk_modulus / 16. * ((eta - 1)**3 * bulk_modulus_derivative + (eta - 1)**2 * (6 - 4 * eta))
+
+
+def test_birch_murnaghan_fit():
+    """The fit recovers the parameters of a Birch-Murnaghan equation of state, also when the minimum is not enclosed."""
+    from aiida_vasp.workchains.eos import birch_murnaghan_fit
+    for volumes in [np.linspace(35, 45, 7), np.linspace(30, 36, 5)]:
+        fit = birch_murnaghan_fit(volumes, birch_murnaghan(volumes))
+        assert fit['volume'] == pytest.approx(40.0)
+        assert fit['energy'] == pytest.approx(-10.0)
+        assert fit['bulk_modulus'] == pytest.approx(0.6)
+        assert fit['bulk_modulus_derivative'] == pytest.approx(4.5)
+    volumes = np.linspace(35, 45, 3)
+    assert birch_murnaghan_fit(volumes, birch_murnaghan(volumes)) is None
+
+
+def test_refinement_volumes():
+    """Volumes are only added when the minimum is not enclosed by the sampled volumes."""
+    from aiida_vasp.workchains.eos import birch_murnaghan_fit, refinement_volumes
+    volumes = np.linspace(35, 45, 7)
+    energies = birch_murnaghan(volumes)
+    assert refinement_volumes(volumes, energies, birch_murnaghan_fit(volumes, energies), 3) == []
+
+    volumes = np.linspace(30, 36, 5)
+    energies = birch_murnaghan(volumes)
+    new_volumes = refinement_volumes(volumes, energies, birch_murnaghan_fit(volumes, energies), 3)
+    assert len(new_volumes) == 3
+    assert new_volumes[0] < 40.0 < new_volumes[-1]
+
+    # Without a fit the sampling continues beyond the lowest energy
+    volumes = np.linspace(30, 33, 3)
+    new_volumes = refinement_volumes(volumes, birch_murnaghan(volumes), None, 3)
+    assert len(new_volumes) == 3
+    assert min(new_volumes) > 33
+
+
+def eos_steps(volumes, max_concurrent=2, max_refinements=1):
+    """Return the eos workchain, ready to run its steps, for cubic structures with the given volumes."""
+    from aiida_vasp.workchains.eos import EosWorkChain
+    from aiida_vasp.utils.fixtures.workchains import workchain_steps
+    structures = {}
+    for index, volume in enumerate(volumes):
+        lattice_constant = volume**(1. / 3.)
+        structure = get_data_node('structure', cell=(np.eye(3) * lattice_constant).tolist())
+        structure.append_atom(position=(0., 0., 0.), symbols='Si')
+        structures['volume_{}'.format(index)] = structure.store()
+    inputs = AttributeDict({
+        'structures': structures,
+        'eos': AttributeDict({
+            'max_concurrent': get_data_node('int', max_concurrent),
+            'max_refinements': get_data_node('int', max_refinements),
+            'refinement_volumes': get_data_node('int', 3)
+        })
+    })
+    return workchain_steps(EosWorkChain, inputs)
+
+
+def eos_step(workchain, failed_keys=()):
+    """Run the next step of the eos workchain, the children return the Birch-Murnaghan energy of their volume."""
+    from aiida.orm import load_node
+    from aiida_vasp.utils.fixtures.workchains import workflow_node
+    # The children are submitted in the order of the pending structures
+    for key, structure_pk in workchain.ctx.pending[len(workchain.children):]:
+        if key in failed_keys:
+            workchain.children.append(workflow_node(exit_status=300))
+            continue
+        energy = float(birch_murnaghan(load_node(structure_pk).get_cell_volume()))
+        misc = get_data_node('dict', dict={'total_energies': {'energy_no_entropy': energy}})
+        workchain.children.append(workflow_node({'misc': misc}))
+    workchain.run_next_workchains()
+    workchain.collect_finished()
+
+
+def run_eos_steps(workchain, failed_keys=()):
+    """Run the steps of the eos workchain until all volumes are calculated."""
+    workchain.initialize()
+    while workchain.has_pending_or_running():
+        eos_step(workchain, failed_keys)
+    return workchain.finalize()
+
+
+def test_eos_refinement(fresh_aiida_env):
+    """Volumes are added around the minimum outside of the sampled volumes, failed volumes are skipped."""
+    from aiida.orm import load_node
+    workchain = eos_steps(np.linspace(30, 36, 5))
+    exit_code = run_eos_steps(workchain, failed_keys=['volume_4'])
+    assert exit_code.status == 0
+
+    keys = [key for key, _, _ in workchain.ctx.finished]
+    assert keys[:5] == ['volume_{}'.format(index) for index in range(5)]
+    assert keys[5:] == ['refinement_1_{}'.format(index) for index in range(3)]
+    assert workchain.ctx.refinements == 1
+    assert len(workchain.submitted) == 8
+    refined_volumes = [load_node(structure_pk).get_cell_volume() for _, structure_pk, _ in workchain.ctx.finished[5:]]
+    assert min(refined_volumes) < 40.0 < max(refined_volumes)
+
+    # The failed volume is reported and missing from the energies
+    assert any('volume_4' in report and '300' in report for report in workchain.reports)
+    volumes = workchain.outputs['eos'].get_array('eos')[:, 0]
+    assert len(volumes) == 7
+    assert not np.isclose(volumes, 36.).any()
+    assert workchain.outputs['eos_minimum'].get_dict()['volume'] == pytest.approx(40.0)
+
+
+def test_eos_early_refinement(fresh_aiida_env):
+    """Volumes are added as soon as the fitted minimum lies outside of the sampled and the pending volumes."""
+    workchain = eos_steps(np.linspace(30, 37.5, 6))
+    workchain.initialize()
+    eos_step(workchain)
+    assert not workchain.ctx.refinements
+    # Four volumes can be fitted, the refinement is queued before the remaining volumes are calculated
+    eos_step(workchain)
+    assert workchain.ctx.refinements == 1
+    assert [key for key, _ in workchain.ctx.pending] == ['volume_4', 'volume_5'] + ['refinement_1_{}'.format(index) for index in range(3)]
+    while workchain.has_pending_or_running():
+        eos_step(workchain)
+    assert workchain.ctx.refinements == 1
+    assert workchain.finalize().status == 0
+
+
+def test_eos_pending_encloses_minimum(fresh_aiida_env):
+    """No volumes are added while the volumes that are still calculated enclose the fitted minimum."""
+    workchain = eos_steps([30., 31.5, 33., 34.5, 44.])
+    assert run_eos_steps(workchain).status == 0
+    assert workchain.ctx.refinements == 0
+    assert len(workchain.submitted) == 5
+    assert not any('refinements' in report for report in workchain.reports)
+
+
+def test_eos_max_refinements(fresh_aiida_env):
+    """No volumes are added beyond the maximum number of refinements."""
+    workchain = eos_steps(np.linspace(30, 36, 5), max_refinements=0)
+    assert run_eos_steps(workchain).status == 0
+    assert len(workchain.submitted) == 5
+    assert workchain.ctx.refinements == 0
+    assert any('maximum number of refinements' in report for report in workchain.reports)
+    # The extrapolated minimum of the exact energies is still found
+    assert workchain.outputs['eos_minimum'].get_dict()['volume'] == pytest.approx(40.0)
+
+
+def test_eos_no_minimum(fresh_aiida_env):
+    """Without enough successful volumes to fit, the energies are returned with ERROR_NO_MINIMUM."""
+    workchain = eos_steps(np.linspace(36, 44, 5), max_refinements=0)
+    assert run_eos_steps(workchain, failed_keys=['volume_0', 'volume_4']).status == 430
+    assert len(workchain.outputs['eos'].get_array('eos')) == 3
+    assert 'eos_minimum' not in workchain.outputs
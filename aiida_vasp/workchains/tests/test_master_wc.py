@@ -0,0 +1,77 @@
+"""Test the band structure and density of states steps of the MasterWorkChain, by running its steps without the engine."""
+# pylint: disable=unused-import,wildcard-import,unused-wildcard-import,unused-argument,redefined-outer-name,no-member,protected-access
+import pytest
+from aiida.common.extendeddicts import AttributeDict
+
+from aiida_vasp.utils.fixtures import *
+from aiida_vasp.utils.aiida_utils import get_data_node
+
+
+def master_steps(localhost, child_exit_statuses):
+    """Run the MasterWorkChain up to and including the band structure and density of states step."""
+    from aiida_vasp.workchains.master import MasterWorkChain
+    from aiida_vasp.utils.fixtures.workchains import workchain_steps, workflow_node
+
+    structure = get_data_node('structure', cell=[[3., 0., 0.], [0., 3., 0.], [0., 0., 3.]])
+    structure.append_atom(position=(0., 0., 0.), symbols='Si')
+    inputs = AttributeDict({
+        'structure': structure,
+        'kpoints_distance': get_data_node('float', 0.2),
+        'relax': AttributeDict(),
+        'extract_bands': get_data_node('bool', True),
+        'extract_dos': get_data_node('bool', True),
+        'dos': AttributeDict({'kpoints_distance': get_data_node('float', 0.1)})
+    })
+    exposed_inputs = {'parameters': get_data_node('dict', dict={'encut': 300, 'lwave': True})}
+    workchain = workchain_steps(MasterWorkChain, inputs, exposed_inputs=exposed_inputs)
+    # Only the inputs of the base workchain are exposed
+    workchain.exposed_inputs = lambda process_class, namespace=None, agglomerate=True: AttributeDict(
+        exposed_inputs if process_class is MasterWorkChain._base_workchain else {})
+
+    remote_folder = get_data_node('remote', computer=localhost, remote_path='/tmp/base')
+    workchain.children.append(workflow_node({'remote_folder': remote_folder}))
+    for exit_status in child_exit_statuses:
+        workchain.children.append(workflow_node({'misc': get_data_node('dict', dict={})}, exit_status=exit_status))
+
+    workchain.initialize()
+    workchain.init_workchain()
+    workchain.run_next_workchain()
+    assert workchain.verify_next_workchain().status == 0
+    assert workchain.extract_bands_or_dos()
+    workchain.run_bands_and_dos()
+    return workchain, remote_folder
+
+
+def test_master_bands_and_dos(fresh_aiida_env, localhost):
+    """The band structure and density of states run at the same time, each with its own inputs and the outputs are attached."""
+    workchain, remote_folder = master_steps(localhost, [0, 0])
+    _, bands_inputs, dos_inputs = workchain.submitted
+
+    for inputs in [bands_inputs, dos_inputs]:
+        # Both restart from the base workchain, only reading the charge density, so it is symlinked
+        assert inputs.restart_folder.uuid == remote_folder.uuid
+        parameters = inputs.parameters.get_dict()
+        assert (parameters['istart'], parameters['lcharg'], parameters['lwave']) == (0, False, False)
+        assert parameters['encut'] == 300
+        assert inputs.clean_workdir.value
+    assert 'icharg' not in bands_inputs.parameters.get_dict()
+    assert dos_inputs.parameters.get_dict()['icharg'] == 11
+    assert dos_inputs.settings.get_dict()['parser_settings'] == {'add_dos': True}
+    assert 'settings' not in bands_inputs
+    # The band structure workchain generates its own path, the density of states runs on the denser grid
+    assert 'kpoints' not in bands_inputs
+    assert len(dos_inputs.kpoints.get_kpoints_mesh()[0]) == 3
+    # The parameters of the base workchain are left untouched
+    assert 'istart' not in workchain.ctx.inputs.parameters.get_dict()
+
+    assert workchain.verify_bands_and_dos().status == 0
+    workchain.finalize()
+    assert workchain.outputs['bands'].pk == workchain.ctx.bands_workchain.pk
+    assert workchain.outputs['dos'].pk == workchain.ctx.dos_workchain.pk
+
+
+@pytest.mark.parametrize(['child_exit_statuses', 'exit_status'], [([300, 0], 300), ([0, 301], 301), ([300, 301], 300)])
+def test_master_bands_and_dos_failed(fresh_aiida_env, localhost, child_exit_statuses, exit_status):
+    """The exit status of the first failed of the band structure and density of states workchains is inherited."""
+    workchain, _ = master_steps(localhost, child_exit_statuses)
+    assert workchain.verify_bands_and_dos().status == exit_status
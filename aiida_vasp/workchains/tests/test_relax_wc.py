@@ -88,3 +88,107 @@ def test_mode_values():
                 except Exception as exc:  # pylint: disable=broad-except
                     assert 'Get from DOF function has to either return the correct value or raise a ValueError ' \
                            'for invalid combinations, instead got {} exception'.format(type(exc))
+
+
+def test_scaled_kpoints_mesh(fresh_aiida_env):
+    """The k-point mesh of a relaxation stage is scaled and rounded up, explicit k-points are left alone."""
+    from aiida_vasp.workchains.relax import kpoints_mesh, scaled_kpoints_mesh
+    kpoints = get_data_node('array.kpoints')
+    kpoints.set_kpoints_mesh([8, 8, 3], [0.5, 0.5, 0.5])
+    scaled = scaled_kpoints_mesh(kpoints, 0.5)
+    assert scaled.get_kpoints_mesh() == ([4, 4, 2], [0.5, 0.5, 0.5])
+    assert kpoints_mesh(scaled_kpoints_mesh(kpoints, 0.1)) == [1, 1, 1]
+
+    explicit = get_data_node('array.kpoints')
+    explicit.set_kpoints([[0., 0., 0.], [0.5, 0.5, 0.5]])
+    assert scaled_kpoints_mesh(explicit, 0.5) is explicit
+    assert kpoints_mesh(explicit) is None
+
+
+def test_relax_stages(fresh_aiida_env, localhost, monkeypatch):
+    """Run the steps of a staged relaxation and check the inputs of each relaxation."""
+    from aiida.orm import RemoteData
+    from aiida_vasp.workchains.relax import RelaxWorkChain
+    from aiida_vasp.utils.fixtures.workchains import workchain_steps, workflow_node
+
+    structure = get_data_node('structure', cell=[[3., 0., 0.], [0., 3., 0.], [0., 0., 3.]])
+    structure.append_atom(position=(0., 0., 0.), symbols='Si')
+    displaced = structure.clone()
+    displaced.reset_sites_positions([(0.5, 0., 0.)])
+    kpoints = get_data_node('array.kpoints')
+    kpoints.set_kpoints_mesh([8, 8, 8])
+    stages = [{
+        'parameters': {
+            'ENCUT': 250,
+            'prec': 'Normal',
+            'ediffg': -0.1
+        },
+        'kpoints_scale': 0.5,
+        'steps': 10
+    }, {
+        'parameters': {
+            'encut': 250,
+            'prec': 'normal'
+        },
+        'kpoints_scale': 0.5
+    }]
+    relax = AttributeDict({
+        'perform': get_data_node('bool', True),
+        'positions': get_data_node('bool', True),
+        'shape': get_data_node('bool', False),
+        'volume': get_data_node('bool', False),
+        'steps': get_data_node('int', 60),
+        'convergence_on': get_data_node('bool', True),
+        'convergence_absolute': get_data_node('bool', False),
+        'convergence_max_iterations': get_data_node('int', 2),
+        'convergence_positions': get_data_node('float', 0.01),
+        'stages': get_data_node('list', list=stages)
+    })
+    parameters = get_data_node('dict', dict={'encut': 400, 'prec': 'Accurate'})
+    clean_workdir = get_data_node('bool', True)
+    inputs = AttributeDict({'structure': structure, 'parameters': parameters, 'relax': relax, 'clean_workdir': clean_workdir})
+    workchain = workchain_steps(RelaxWorkChain, inputs, exposed_inputs={'kpoints': kpoints, 'clean_workdir': clean_workdir})
+    cleaned = []
+    monkeypatch.setattr(RemoteData, '_clean', lambda remote_folder: cleaned.append(remote_folder.uuid))
+    # The stages return the structure unchanged, the relaxations with the target settings move the atom every time
+    remote_folders = [get_data_node('remote', computer=localhost, remote_path='/tmp/stage{}'.format(i)) for i in range(4)]
+    for i, output_structure in enumerate([structure.clone(), structure.clone(), displaced.clone(), structure.clone()]):
+        workchain.children.append(workflow_node({'structure': output_structure, 'remote_folder': remote_folders[i]}))
+
+    assert workchain.initialize() is None
+    kept = []
+    while workchain.run_next_workchains():
+        workchain.init_next_workchain()
+        workchain.run_next_workchain()
+        kept.append(list(cleaned))
+        assert not workchain.verify_next_workchain().status
+        workchain.analyze_convergence()
+
+    # The stages would be converged, but are not checked, the target relaxations use up their own budget
+    assert len(workchain.submitted) == 2 + 2
+    assert not workchain.ctx.is_converged
+
+    parameters = [submitted.parameters.get_dict() for submitted in workchain.submitted]
+    meshes = [submitted.kpoints.get_kpoints_mesh()[0] for submitted in workchain.submitted]
+    assert [(params['encut'], params['prec'], params['nsw']) for params in parameters] == [(250, 'Normal', 10), (250, 'normal', 60),
+                                                                                           (400, 'Accurate', 60), (400, 'Accurate', 60)]
+    assert meshes == [[4, 4, 4], [4, 4, 4], [8, 8, 8], [8, 8, 8]]
+    assert parameters[0]['ediffg'] == -0.1
+    assert 'ediffg' not in parameters[2]
+    assert [submitted.clean_workdir.value for submitted in workchain.submitted] == [False, False, True, True]
+
+    # The first stage starts from scratch, the second reads the wavefunctions of the first (same basis), the
+    # first target relaxation reads the charge density of the second stage (different basis) and the second
+    # target relaxation starts from scratch again
+    assert 'restart_folder' not in workchain.submitted[0]
+    assert 'istart' not in parameters[0]
+    assert workchain.submitted[1].restart_folder.uuid == remote_folders[0].uuid
+    assert (parameters[1]['istart'], parameters[1]['icharg']) == (1, 0)
+    assert workchain.submitted[2].restart_folder.uuid == remote_folders[1].uuid
+    assert (parameters[2]['istart'], parameters[2]['icharg']) == (0, 1)
+    assert 'restart_folder' not in workchain.submitted[3]
+    assert 'istart' not in parameters[3]
+
+    # The remote folder of a stage is kept until the relaxation restarting from it has finished
+    assert kept == [[], [], [remote_folders[0].uuid], [remote_folders[0].uuid, remote_folders[1].uuid]]
+    assert cleaned == [remote_folders[0].uuid, remote_folders[1].uuid]
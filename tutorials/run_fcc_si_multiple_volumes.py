@@ -1,13 +1,13 @@
 """
 Call script to calculate the total energies for different volumes of the silicon structure.
 
-This particular call script set up a standard calculation for each structure and submits
-each of them.
+This particular call script sets up a standard calculation for each structure and submits
+them all in one batch workchain, which runs at most a few of them at the same time.
 """
 # pylint: disable=too-many-arguments
 import numpy as np
 from aiida.common.extendeddicts import AttributeDict
-from aiida.orm import Code, Bool, Str
+from aiida.orm import Code, Bool, Str, Int
 from aiida.plugins import DataFactory, WorkflowFactory
 from aiida.engine import submit
 from aiida import load_profile
@@ -39,7 +39,7 @@ def get_structure(alat):
     return structure
 
 
-def main(code_string, incar, kmesh, structure, potential_family, potential_mapping, options):
+def main(code_string, incar, kmesh, structures, potential_family, potential_mapping, options, max_concurrent):
     """Main method to setup the calculation."""
 
     # First, we need to fetch the AiiDA datatypes which will
@@ -48,7 +48,7 @@ def main(code_string, incar, kmesh, structure, potential_family, potential_mappi
     kpoints_data = DataFactory('array.kpoints')
 
     # Then, we set the workchain you would like to call
-    workchain = WorkflowFactory('vasp.verify')
+    workchain = WorkflowFactory('vasp.batch')
 
     # And finally, we declare the options, settings and input containers
     settings = AttributeDict()
@@ -60,8 +60,10 @@ def main(code_string, incar, kmesh, structure, potential_family, potential_mappi
     # set inputs for the following WorkChain execution
     # set code
     inputs.code = Code.get_from_string(code_string)
-    # set structure
-    inputs.structure = structure
+    # set the structures, the keys label the outputs of each calculation
+    inputs.structures = structures
+    # set the maximum number of calculations running at the same time
+    inputs.max_concurrent = Int(max_concurrent)
     # set k-points grid density
     kpoints = kpoints_data()
     kpoints.set_kpoints_mesh(kmesh)
@@ -115,10 +117,13 @@ if __name__ == '__main__':
     OPTIONS.max_wallclock_seconds = 3600
     OPTIONS.max_memory_kb = 1024000
 
-    # Iterate over each lattice constant and pass it explicitly
+    # POSCAR equivalent
+    # Set the silicon structure for each lattice constant
+    STRUCTURES = {}
     for lattice_constant in [3.5, 3.6, 3.7, 3.8, 3.9, 4.0, 4.1, 4.2, 4.3]:
-        # POSCAR equivalent
-        # Set the silicon structure
-        STRUCTURE = get_structure(lattice_constant)
+        STRUCTURES['alat_{}'.format(lattice_constant).replace('.', '_')] = get_structure(lattice_constant)
 
-        main(CODE_STRING, INCAR, KMESH, STRUCTURE, POTENTIAL_FAMILY, POTENTIAL_MAPPING, OPTIONS)
+    # Run at most four of the calculations at the same time
+    MAX_CONCURRENT = 4
+
+    main(CODE_STRING, INCAR, KMESH, STRUCTURES, POTENTIAL_FAMILY, POTENTIAL_MAPPING, OPTIONS, MAX_CONCURRENT)